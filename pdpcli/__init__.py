@@ -1,4 +1,20 @@
+import importlib
+from typing import TYPE_CHECKING, Any
+
 __version__ = "0.4.1"
 
-from pdpcli.commands.subcommand import Subcommand  # noqa: F401
-from pdpcli.stages import Stage  # noqa: F401
+if TYPE_CHECKING:
+    from pdpcli.commands.subcommand import Subcommand  # noqa: F401
+    from pdpcli.stages import Stage  # noqa: F401
+
+# re-exported lazily not to import pandas and pdpipe on startup
+_LAZY_ATTRIBUTES = {
+    "Subcommand": "pdpcli.commands.subcommand",
+    "Stage": "pdpcli.stages",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
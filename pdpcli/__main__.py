@@ -3,8 +3,6 @@ import logging
 import os
 import sys
 
-import colt
-
 if os.environ.get("PDPCLI_DEBUG"):
     LEVEL = logging.DEBUG
 else:
@@ -19,7 +17,6 @@ from pdpcli.commands import main  # noqa: E402
 
 
 def run() -> None:
-    colt.import_modules(["pdpcli"])
     main(prog="pdp")
 
 
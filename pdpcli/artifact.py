@@ -0,0 +1,108 @@
+"""
+Pipeline artifact format which stores large buffers such as NumPy arrays
+out-of-band by using pickle protocol 5. The layout of an artifact file is:
+
+    MAGIC | header size (uint64) | header (json) | pickle | buffer | buffer | ...
+
+Sections after the header are aligned to `ALIGNMENT` bytes so that buffers can
+be memory-mapped and used by NumPy without copying. Offsets in the header are
+relative to the end of the header.
+"""
+
+import json
+import mmap
+import pickle
+import struct
+from pathlib import Path
+from typing import Any, List, Tuple, Union
+
+import minato
+
+from pdpcli import util
+from pdpcli.exceptions import PdpCLIExceptions
+
+MAGIC = b"PDPCLI\x00\x01"
+ALIGNMENT = 64
+EXTENSIONS = (".pdp",)
+
+# buffers smaller than this size are stored in-band with the pickle
+DEFAULT_THRESHOLD = 64 * 1024
+
+
+class ArtifactError(PdpCLIExceptions):
+    """ArtifactError"""
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def is_artifact_file(file_path: Union[str, Path]) -> bool:
+    return util.get_file_ext(file_path) in EXTENSIONS
+
+
+def save_pipeline(
+    obj: Any,
+    file_path: Union[str, Path],
+    threshold: int = DEFAULT_THRESHOLD,
+) -> None:
+    buffers: List[pickle.PickleBuffer] = []
+
+    def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+        if buffer.raw().nbytes < threshold:
+            return True
+        buffers.append(buffer)
+        return False
+
+    payload = pickle.dumps(obj, protocol=5, buffer_callback=buffer_callback)
+
+    sections: List[Tuple[int, int]] = []
+    offset = 0
+    for size in [len(payload)] + [buffer.raw().nbytes for buffer in buffers]:
+        sections.append((offset, size))
+        offset = _align(offset + size)
+
+    header = json.dumps({"pickle": sections[0], "buffers": sections[1:]}).encode()
+    prefix = MAGIC + struct.pack("<Q", len(header)) + header
+    data_offset = _align(len(prefix))
+
+    with minato.open(file_path, "wb") as fp:
+        fp.write(prefix)
+        fp.write(b"\x00" * (data_offset - len(prefix)))
+
+        position = 0
+        for (offset, _), data in zip(
+            sections, [memoryview(payload)] + [buffer.raw() for buffer in buffers]
+        ):
+            fp.write(b"\x00" * (offset - position))
+            fp.write(data)
+            position = offset + data.nbytes
+
+
+def load_pipeline(file_path: Union[str, Path], memory_map: bool = True) -> Any:
+    file_path = minato.cached_path(file_path)
+    with open(file_path, "rb") as fp:
+        if memory_map:
+            # copy-on-write mapping: pages are shared until they are modified
+            data: Union[mmap.mmap, bytes] = mmap.mmap(
+                fp.fileno(), 0, access=mmap.ACCESS_COPY
+            )
+        else:
+            data = fp.read()
+
+    view = memoryview(data)
+    if bytes(view[: len(MAGIC)]) != MAGIC:
+        raise ArtifactError(f"Invalid pipeline artifact: {file_path}")
+
+    (header_size,) = struct.unpack("<Q", view[len(MAGIC) : len(MAGIC) + 8])
+    header_offset = len(MAGIC) + 8
+    header = json.loads(bytes(view[header_offset : header_offset + header_size]))
+    data_offset = _align(header_offset + header_size)
+
+    def section(offset: int, size: int) -> memoryview:
+        start = data_offset + offset
+        return view[start : start + size]
+
+    payload = section(*header["pickle"])
+    buffers = [section(offset, size) for offset, size in header["buffers"]]
+    return pickle.loads(payload, buffers=buffers)
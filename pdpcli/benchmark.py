@@ -0,0 +1,241 @@
+"""
+Benchmarks of pipelines on synthetic data. Each benchmark builds a pipeline
+from a config file, fits it on generated data and measures reading, applying
+and writing the data at several sizes. Applications run in fresh processes by
+default, so peak memory usage of each case is measured separately.
+"""
+
+import multiprocessing
+import pickle
+import platform
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+import numpy
+import pandas
+
+from pdpcli import __version__
+from pdpcli.configs import ConfigBuilder, ConfigReader
+from pdpcli.data import DataReader, DataWriter
+from pdpcli.exceptions import ConfigurationError
+from pdpcli.profiler import Profiler
+from pdpcli.stages.executor import PipelineExecutor
+from pdpcli.util import get_peak_memory_usage
+
+# keys of benchmark configs which specify synthetic data
+DATA_FIELDS = (
+    "numeric_columns",
+    "categorical_columns",
+    "text_columns",
+    "categories",
+    "text_length",
+    "vocab_size",
+)
+
+
+def generate_dataframe(
+    rows: int,
+    numeric_columns: int = 8,
+    categorical_columns: int = 2,
+    text_columns: int = 0,
+    categories: int = 16,
+    text_length: int = 8,
+    vocab_size: int = 1000,
+    seed: int = 0,
+) -> pandas.DataFrame:
+    """
+    Generate a data frame with columns `num_{i}`, `cat_{i}` and `text_{i}`,
+    and a binary `target` column which depends on numeric columns.
+    """
+    rng = numpy.random.default_rng(seed)
+    columns: Dict[str, Any] = {}
+    for i in range(numeric_columns):
+        columns[f"num_{i}"] = rng.normal(size=rows)
+    for i in range(categorical_columns):
+        labels = numpy.array([f"c{k}" for k in range(categories)], dtype=object)
+        columns[f"cat_{i}"] = labels[rng.integers(categories, size=rows)]
+    vocab = numpy.array([f"w{k}" for k in range(vocab_size)], dtype=object)
+    for i in range(text_columns):
+        words = vocab[rng.integers(vocab_size, size=(rows, text_length))]
+        columns[f"text_{i}"] = [" ".join(row) for row in words]
+
+    noise = rng.normal(size=rows)
+    if numeric_columns > 0:
+        score = sum(columns[f"num_{i}"] for i in range(numeric_columns)) + noise
+    else:
+        score = noise
+    columns["target"] = (score > 0).astype(int)
+    return pandas.DataFrame(columns)
+
+
+class BenchmarkResult(NamedTuple):
+    name: str
+    rows: int
+    columns: int
+    format: str
+    fit_time: float
+    wall_time: float
+    rows_per_sec: float
+    # peak resident set size of the process which applied the pipeline
+    peak_rss: Optional[int]
+    # increase of peak resident set size while applying the pipeline
+    memory_delta: Optional[int]
+    stages: Dict[str, float]
+
+    @classmethod
+    def from_dict(cls, params: Dict[str, Any]) -> "BenchmarkResult":
+        return cls(**{key: params.get(key) for key in cls._fields})  # type: ignore
+
+
+class _Measurement(NamedTuple):
+    wall_time: float
+    peak_rss: Optional[int]
+    memory_delta: Optional[int]
+    stages: Dict[str, float]
+
+
+def _apply_case(
+    pipeline_path: str,
+    reader: DataReader,
+    writer: DataWriter,
+    input_file: str,
+    output_file: str,
+) -> _Measurement:
+    with open(pipeline_path, "rb") as fp:
+        pipeline = pickle.load(fp)
+
+    start_rss = get_peak_memory_usage()
+    profiler = Profiler(trace_memory=False)
+    reader = profiler.wrap_reader(reader)
+    writer = profiler.wrap_writer(writer)
+
+    start = time.perf_counter()
+    output = PipelineExecutor([profiler]).apply(pipeline, reader.read(input_file))
+    writer.write(output, output_file)
+    wall_time = time.perf_counter() - start
+
+    peak_rss = get_peak_memory_usage()
+    memory_delta = None
+    if start_rss is not None and peak_rss is not None:
+        memory_delta = peak_rss - start_rss
+    stages = {item["name"]: item["wall_time"] for item in profiler.summarize()}
+    return _Measurement(wall_time, peak_rss, memory_delta, stages)
+
+
+def run_benchmark(
+    config_path: Union[str, Path],
+    rows: int,
+    repeat: int = 3,
+    file_format: str = ".csv",
+    seed: int = 0,
+    isolated: bool = True,
+) -> BenchmarkResult:
+    """
+    Run a benchmark of the config with `rows` rows of synthetic data, and
+    return the result of the fastest application among `repeat` runs.
+    """
+    config_reader = ConfigReader.from_path(config_path)
+    if config_reader is None:
+        raise ConfigurationError("Failed to infer config reader.")
+    config = config_reader.read(config_path)
+    data_params = config.get("benchmark") or {}
+    unknown_fields = set(data_params) - set(DATA_FIELDS)
+    if unknown_fields:
+        raise ConfigurationError(f"Unknown benchmark fields: {unknown_fields}")
+
+    builder = ConfigBuilder.build(config)
+    pipeline = builder.pipeline
+    df = generate_dataframe(rows, seed=seed, **data_params)
+    num_columns = len(df.columns)
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        input_file = str(Path(tempdir) / f"input{file_format}")
+        output_file = str(Path(tempdir) / f"output{file_format}")
+        pipeline_path = str(Path(tempdir) / "pipeline.pkl")
+
+        reader = builder.reader or DataReader.from_path(input_file)
+        writer = builder.writer or DataWriter.from_path(output_file)
+        input_writer = DataWriter.from_path(input_file)
+        if reader is None or writer is None or input_writer is None:
+            raise ConfigurationError(f"Unsupported file format: {file_format}")
+
+        start = time.perf_counter()
+        pipeline.fit(df)
+        fit_time = time.perf_counter() - start
+
+        input_writer.write(df, input_file)
+        with open(pipeline_path, "wb") as fp:
+            pickle.dump(pipeline, fp)
+        del df, pipeline
+
+        measurements = []
+        for _ in range(repeat):
+            args = (pipeline_path, reader, writer, input_file, output_file)
+            if isolated:
+                # fresh processes do not share peak memory usage
+                with ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn")
+                ) as executor:
+                    measurements.append(executor.submit(_apply_case, *args).result())
+            else:
+                measurements.append(_apply_case(*args))
+
+    best = min(measurements, key=lambda measurement: measurement.wall_time)
+    return BenchmarkResult(
+        name=Path(config_path).stem,
+        rows=rows,
+        columns=num_columns,
+        format=file_format,
+        fit_time=fit_time,
+        wall_time=best.wall_time,
+        rows_per_sec=rows / best.wall_time if best.wall_time > 0 else float("inf"),
+        peak_rss=best.peak_rss,
+        memory_delta=best.memory_delta,
+        stages=best.stages,
+    )
+
+
+def get_environment() -> Dict[str, str]:
+    return {
+        "pdpcli": __version__,
+        "python": platform.python_version(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def compare_results(
+    results: List[BenchmarkResult],
+    baseline: List[BenchmarkResult],
+    threshold: float,
+) -> List[str]:
+    """
+    Return regressions of results against the baseline. Throughput must not
+    drop and memory usage must not grow by more than `threshold` (a ratio).
+    """
+    baseline_results = {(result.name, result.rows): result for result in baseline}
+    regressions = []
+    for result in results:
+        base = baseline_results.get((result.name, result.rows))
+        if base is None:
+            continue
+        case = f"{result.name} ({result.rows} rows)"
+        if result.rows_per_sec < base.rows_per_sec * (1 - threshold):
+            regressions.append(
+                f"{case}: throughput {result.rows_per_sec:.1f} rows/s is lower "
+                f"than baseline {base.rows_per_sec:.1f} rows/s"
+            )
+        if (
+            result.peak_rss is not None
+            and base.peak_rss is not None
+            and result.peak_rss > base.peak_rss * (1 + threshold)
+        ):
+            regressions.append(
+                f"{case}: peak memory {result.peak_rss} bytes is higher "
+                f"than baseline {base.peak_rss} bytes"
+            )
+    return regressions
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import IO, Any, List, NamedTuple, Optional, Union
+
+from pdpcli import util
+from pdpcli.exceptions import ConfigurationError
+from pdpcli.settings import CACHE_MAX_SIZE, CACHE_ROOT
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry(NamedTuple):
+    key: str
+    path: Path
+    size: int
+    last_access: float
+
+
+def compute_key(*values: Any) -> str:
+    text = json.dumps(values, sort_keys=True, default=repr)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class Cache:
+    """
+    Size-bounded on-disk cache. Data frames are stored as feather files when
+    pyarrow is available, and other objects are pickled. Entries are evicted in
+    least-recently-used order, and access times are tracked by file mtimes.
+    """
+
+    SUFFIX = ".pkl"
+    FRAME_SUFFIX = ".feather"
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        max_size: Optional[int] = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    @classmethod
+    def by_name(cls, name: str) -> Cache:
+        return cls(CACHE_ROOT / name, CACHE_MAX_SIZE)
+
+    @staticmethod
+    def names() -> List[str]:
+        if not CACHE_ROOT.is_dir():
+            return []
+        return sorted(path.name for path in CACHE_ROOT.iterdir() if path.is_dir())
+
+    @property
+    def name(self) -> str:
+        return self.directory.name
+
+    def get_path(self, key: str) -> Path:
+        frame_path = self._get_frame_path(key)
+        if frame_path.is_file():
+            return frame_path
+        return self._get_pickle_path(key)
+
+    def _get_pickle_path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.SUFFIX}"
+
+    def _get_frame_path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.FRAME_SUFFIX}"
+
+    def contains(self, key: str) -> bool:
+        return self.get_path(key).is_file()
+
+    def load(self, key: str) -> Optional[Any]:
+        path = self.get_path(key)
+        try:
+            if path.suffix == self.FRAME_SUFFIX:
+                obj = self._load_frame(path)
+                if obj is None:
+                    return None
+            else:
+                with path.open("rb") as fp:
+                    obj = pickle.load(fp)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, ValueError):
+            # pyarrow raises subclasses of ValueError for broken files
+            logger.warning("Remove broken cache entry: %s", path)
+            path.unlink()
+            return None
+
+        # update the access time for LRU eviction
+        os.utime(path)
+        return obj
+
+    def save(self, key: str, obj: Any) -> None:
+        # pandas is imported here not to load it for listing caches
+        import pandas
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=self.directory, suffix=".tmp", delete=False
+        ) as fp:
+            is_frame = isinstance(obj, pandas.DataFrame) and self._dump_frame(obj, fp)
+            if not is_frame:
+                fp.seek(0)
+                fp.truncate()
+                pickle.dump(obj, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        path, stale_path = self._get_pickle_path(key), self._get_frame_path(key)
+        if is_frame:
+            path, stale_path = stale_path, path
+        # write atomically so that concurrent readers never see partial files
+        os.replace(fp.name, path)
+        stale_path.unlink(missing_ok=True)
+        self.prune()
+
+    @staticmethod
+    def _load_frame(path: Path) -> Optional[Any]:
+        try:
+            pyarrow = util.import_pyarrow("load cached data frames")
+        except ConfigurationError:
+            # entries written with pyarrow are missed without it
+            return None
+        return pyarrow.feather.read_feather(str(path))
+
+    @staticmethod
+    def _dump_frame(df: Any, fp: IO[bytes]) -> bool:
+        try:
+            pyarrow = util.import_pyarrow("store data frames as feather files")
+        except ConfigurationError:
+            logger.info("Pickle a data frame since pyarrow is not installed")
+            return False
+        if df.columns.has_duplicates or not all(
+            isinstance(column, str) for column in df.columns
+        ):
+            logger.info("Pickle a data frame with non-string or duplicate columns")
+            return False
+        try:
+            table = pyarrow.Table.from_pandas(df)
+        except (pyarrow.ArrowException, TypeError, ValueError) as e:
+            logger.info("Pickle a data frame which arrow does not support: %s", e)
+            return False
+        # arrow converts objects like lists and integers to typed values,
+        # so only object columns of strings and bytes keep their dtypes
+        for column in df.columns[(df.dtypes == object).to_numpy()]:
+            arrow_type = table.schema.field(column).type
+            if not (
+                pyarrow.types.is_string(arrow_type)
+                or pyarrow.types.is_large_string(arrow_type)
+                or pyarrow.types.is_binary(arrow_type)
+                or pyarrow.types.is_null(arrow_type)
+            ):
+                logger.info("Pickle a data frame with objects in column: %s", column)
+                return False
+        pyarrow.feather.write_feather(table, fp)
+        return True
+
+    def entries(self) -> List[CacheEntry]:
+        if not self.directory.is_dir():
+            return []
+        entries = []
+        for suffix in (self.SUFFIX, self.FRAME_SUFFIX):
+            for path in self.directory.glob(f"*{suffix}"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append(
+                    CacheEntry(
+                        path.name[: -len(suffix)], path, stat.st_size, stat.st_mtime
+                    )
+                )
+        return sorted(entries, key=lambda entry: entry.last_access)
+
+    def size(self) -> int:
+        return sum(entry.size for entry in self.entries())
+
+    def remove(self, key: str) -> None:
+        self._get_frame_path(key).unlink(missing_ok=True)
+        self._get_pickle_path(key).unlink(missing_ok=True)
+
+    def prune(self) -> None:
+        if self.max_size is None:
+            return
+        entries = self.entries()
+        total_size = sum(entry.size for entry in entries)
+        for entry in entries:
+            if total_size <= self.max_size:
+                break
+            logger.info("Evict cache entry: %s", entry.key)
+            entry.path.unlink(missing_ok=True)
+            total_size -= entry.size
+
+    def clear(self) -> None:
+        if self.directory.is_dir():
+            shutil.rmtree(self.directory)
+
+
+def format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TiB"
+
+
+def format_time(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
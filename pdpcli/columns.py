@@ -0,0 +1,180 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence
+
+import numpy
+import pandas
+
+ColumnPredicate = Callable[[str], bool]
+
+
+class ColumnFilter:
+    """Picklable predicate over column names."""
+
+    def __call__(self, column: str) -> bool:
+        raise NotImplementedError
+
+    def __and__(self, other: ColumnPredicate) -> "ColumnFilter":
+        return ColumnIntersection([self, other])
+
+    def __or__(self, other: ColumnPredicate) -> "ColumnFilter":
+        return ColumnUnion([self, other])
+
+    def __invert__(self) -> "ColumnFilter":
+        return ColumnComplement(self)
+
+
+class ColumnNames(ColumnFilter):
+    def __init__(self, names: Iterable[str]) -> None:
+        self.names = frozenset(names)
+
+    def __call__(self, column: str) -> bool:
+        return column in self.names
+
+    def __repr__(self) -> str:
+        return f"ColumnNames({sorted(self.names)})"
+
+
+class ColumnPatterns(ColumnFilter):
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.patterns = tuple(re.compile(pattern) for pattern in patterns)
+
+    def __call__(self, column: str) -> bool:
+        return any(pattern.match(column) for pattern in self.patterns)
+
+    def __repr__(self) -> str:
+        return f"ColumnPatterns({[pattern.pattern for pattern in self.patterns]})"
+
+
+class ColumnUnion(ColumnFilter):
+    def __init__(self, filters: Iterable[ColumnPredicate]) -> None:
+        self.filters = tuple(filters)
+
+    def __call__(self, column: str) -> bool:
+        return any(column_filter(column) for column_filter in self.filters)
+
+    def __repr__(self) -> str:
+        return f"ColumnUnion({list(self.filters)})"
+
+
+class ColumnIntersection(ColumnFilter):
+    def __init__(self, filters: Iterable[ColumnPredicate]) -> None:
+        self.filters = tuple(filters)
+
+    def __call__(self, column: str) -> bool:
+        return all(column_filter(column) for column_filter in self.filters)
+
+    def __repr__(self) -> str:
+        return f"ColumnIntersection({list(self.filters)})"
+
+
+class ColumnComplement(ColumnFilter):
+    def __init__(self, column_filter: ColumnPredicate) -> None:
+        self.filter = column_filter
+
+    def __call__(self, column: str) -> bool:
+        return not self.filter(column)
+
+    def __repr__(self) -> str:
+        return f"ColumnComplement({self.filter!r})"
+
+
+class ColumnProjection(ColumnFilter):
+    """Column filter given to data readers which records pruned columns."""
+
+    def __init__(self, column_filter: ColumnPredicate) -> None:
+        self.filter = column_filter
+        self.pruned: List[str] = []
+
+    def __call__(self, column: str) -> bool:
+        keep = self.filter(column)
+        if not keep and column not in self.pruned:
+            self.pruned.append(column)
+        return keep
+
+    def __repr__(self) -> str:
+        return f"ColumnProjection({self.filter!r})"
+
+
+def union(
+    left: Optional[ColumnFilter],
+    right: Optional[ColumnFilter],
+) -> Optional[ColumnFilter]:
+    """Union of column filters where `None` stands for all columns."""
+    if left is None or right is None:
+        return None
+    return left | right
+
+
+def intersection(
+    left: Optional[ColumnFilter],
+    right: Optional[ColumnFilter],
+) -> Optional[ColumnFilter]:
+    """Intersection of column filters where `None` stands for all columns."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return left & right
+
+
+class ColumnIndexerCache:
+    """
+    Cache of positional indexers of resolved columns keyed by the columns of
+    input data frames, so that column names are resolved once per schema.
+    Cached indexers are not pickled. The cache is shared by threads applying
+    the same stage.
+    """
+
+    def __init__(self, max_size: int = 16) -> None:
+        self.max_size = max_size
+        self._indexers: "OrderedDict[Hashable, numpy.ndarray[Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        columns: pandas.Index,
+        resolve: Callable[[pandas.Index], Sequence[Any]],
+        name: str = "",
+    ) -> "numpy.ndarray[Any, Any]":
+        """
+        Return positions of columns given by `resolve(columns)`. Raise
+        `KeyError` if some of resolved columns do not exist. `name` separates
+        indexers resolved differently from the same columns.
+        """
+        key = (name, tuple(columns))
+        with self._lock:
+            indexer = self._indexers.get(key)
+            if indexer is not None:
+                self._indexers.move_to_end(key)
+                return indexer
+
+        names = resolve(columns)
+        positions: "numpy.ndarray[Any, Any]"
+        if columns.is_unique:
+            positions = columns.get_indexer(names)
+            missing = [column for column, i in zip(names, positions) if i < 0]
+        else:
+            # duplicated columns are all selected as label-based indexing does
+            matches = [numpy.flatnonzero(columns == column) for column in names]
+            missing = [column for column, m in zip(names, matches) if len(m) == 0]
+            positions = numpy.concatenate([numpy.empty(0, dtype=numpy.intp), *matches])
+        if missing:
+            raise KeyError(f"{missing} not in index")
+
+        with self._lock:
+            self._indexers[key] = positions
+            if len(self._indexers) > self.max_size:
+                self._indexers.popitem(last=False)
+        return positions
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexers.clear()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"max_size": self.max_size}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)  # type: ignore[misc]
@@ -4,6 +4,10 @@ from typing import Optional
 import colt
 
 from pdpcli import __version__
+
+# built-in commands are registered on import, and import their dependencies
+# only when they run
+from pdpcli.commands import apply, batch, bench, build, cache, serve  # noqa: F401
 from pdpcli.commands.subcommand import Subcommand
 from pdpcli.plugins import import_plugins
 
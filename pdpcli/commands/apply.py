@@ -1,21 +1,42 @@
+from __future__ import annotations
+
 import argparse
+import contextlib
+import glob
 import logging
+import os
 import pickle
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Tuple, Union
-
-import minato
-import pdpipe
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from pdpcli import util
 from pdpcli.commands.subcommand import Subcommand
-from pdpcli.configs import ConfigBuilder, ConfigReader
-from pdpcli.data import DataReader, DataWriter
 from pdpcli.exceptions import ConfigurationError
 
+if TYPE_CHECKING:
+    import pandas
+    import pdpipe
+
+    from pdpcli.data import DataReader, DataWriter
+    from pdpcli.stages.executor import PipelineExecutor
+
 logger = logging.getLogger(__name__)
 
+# pipeline, reader and writer shared by worker processes
+_worker_context: Dict[str, Any] = {}
+
 
 @Subcommand.register(
     "apply",
@@ -32,7 +53,7 @@ class ApplyCommand(Subcommand):
         self.parser.add_argument(
             "input_file",
             type=str,
-            help="path to a input file to apply pipeline",
+            help="path to a input file, a directory or a glob pattern of input files",
         )
         self.parser.add_argument(
             "-o",
@@ -57,48 +78,411 @@ class ApplyCommand(Subcommand):
             action="store_true",
             help="do not show result dataframe on stdout",
         )
+        self.parser.add_argument(
+            "--chunksize",
+            type=int,
+            default=None,
+            help="number of rows to read, apply and write at a time",
+        )
+        self.parser.add_argument(
+            "--prefetch",
+            type=int,
+            default=0,
+            help=(
+                "number of chunks to read ahead and to buffer for writing "
+                "in background threads (with --chunksize)"
+            ),
+        )
+        self.parser.add_argument(
+            "--prune-columns",
+            action="store_true",
+            help="read only columns required by the pipeline",
+        )
+        self.parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="number of worker processes to apply pipeline to multiple files",
+        )
+        self.parser.add_argument(
+            "--concat",
+            action="store_true",
+            help="concatenate results of multiple input files in input order",
+        )
+        self.parser.add_argument(
+            "--schema",
+            type=str,
+            default=None,
+            help="path to a schema file of input data saved by build command",
+        )
+        self.parser.add_argument(
+            "--cache-config",
+            action="store_true",
+            help="cache resolved configs until their files or environment change",
+        )
+        self.parser.add_argument(
+            "--cache-input",
+            action="store_true",
+            help="cache parsed input data to skip parsing in later runs",
+        )
+        self.parser.add_argument(
+            "--cache-stages",
+            action="store_true",
+            help="cache outputs of stages to skip unchanged stages in later runs",
+        )
+        self.parser.add_argument(
+            "--low-memory",
+            action="store_true",
+            help="drop columns and release data frames as early as possible",
+        )
+        self.parser.add_argument(
+            "--profile",
+            action="store_true",
+            help="show time and memory usage of each stage, reader and writer",
+        )
+        self.parser.add_argument(
+            "--profile-output",
+            type=str,
+            default=None,
+            help="path to a output JSON file of profiling results",
+        )
+        self.parser.add_argument(
+            "--profile-trace",
+            type=str,
+            default=None,
+            help="path to a output Chrome trace-event file of profiling results",
+        )
 
     def run(self, args: argparse.Namespace) -> None:
+        # dependencies are imported here to start the CLI quickly
+        from pdpcli import artifact
+        from pdpcli.data import (
+            BackgroundDataWriter,
+            CachedDataReader,
+            DataReader,
+            DataSchema,
+            DataWriter,
+            PrefetchDataReader,
+        )
+        from pdpcli.profiler import Profiler
+        from pdpcli.stages.executor import PipelineExecutor, StageHook
+        from pdpcli.stages.low_memory import LowMemoryHook
+        from pdpcli.stages.planner import push_down_columns
+        from pdpcli.stages.stage_cache import StageCache
+
         # Load pipeline
         logger.info("Load pipeline from: %s", str(args.pipeline))
         if self._is_pickle_file(args.pipeline):
             pipeline = self._load_pipeline_from_pickle(args.pipeline)
             reader, writer = None, None
+        elif artifact.is_artifact_file(args.pipeline):
+            pipeline = self._load_pipeline_from_artifact(args.pipeline)
+            reader, writer = None, None
         else:
-            pipeline, reader, writer = self._build_config(args.pipeline, args.overrides)
+            pipeline, reader, writer = self._build_config(
+                args.pipeline, args.overrides, args.cache_config
+            )
 
         logger.info("Pipeline:\n%s", str(pipeline))
 
         # Construct reader / writer from config
         if args.config:
             logger.info("Load data reader / writer from: %s", str(args.config))
-            _, reader, writer = self._build_config(args.config, args.overrides)
+            _, reader, writer = self._build_config(
+                args.config, args.overrides, args.cache_config
+            )
+
+        input_files = self._expand_input_files(args.input_file)
+        if not input_files:
+            raise ConfigurationError(f"No input files found: {args.input_file}")
 
         # Read input file
-        reader = reader or DataReader.from_path(args.input_file)
+        reader = reader or DataReader.from_path(input_files[0])
         if reader is None:
             raise ConfigurationError("Failed to infer data reader")
-        logger.info("Load input file: %s", str(args.input_file))
-        df = reader.read(args.input_file)
 
-        # Apply pipeline
-        logger.info("Apply pipeline")
-        result_df = pipeline.apply(df)
+        if args.prune_columns or args.low_memory:
+            projection = push_down_columns(pipeline, reader)
+        else:
+            projection = None
+
+        schema_path = args.schema
+        if schema_path is None and (
+            self._is_pickle_file(args.pipeline)
+            or artifact.is_artifact_file(args.pipeline)
+        ):
+            schema_path = DataSchema.find_sidecar(args.pipeline)
+        if schema_path is not None:
+            logger.info("Load input schema from: %s", schema_path)
+            if not reader.apply_schema(DataSchema.load(schema_path)):
+                logger.warning("%s does not support schemas", type(reader).__name__)
+
+        if args.cache_input:
+            reader = CachedDataReader(reader)
 
-        # Save processed data
         if args.output_file:
             writer = writer or DataWriter.from_path(args.output_file)
             if writer is None:
                 raise ConfigurationError("Failed to infer data writer.")
+        else:
+            writer = None
+
+        hooks: List[StageHook] = []
+        if args.low_memory:
+            hooks.append(LowMemoryHook())
+        if args.cache_stages:
+            hooks.append(StageCache())
 
-            logger.info("Writer result data frame: %s", str(args.output_file))
-            writer.write(result_df, args.output_file)
+        profiler: Optional[Profiler] = None
+        if args.profile or args.profile_output or args.profile_trace:
+            if input_files != [args.input_file] and args.workers > 1:
+                raise ConfigurationError("Profiling requires a single worker.")
+            profiler = Profiler()
+            reader = profiler.wrap_reader(reader)
+            if writer is not None:
+                writer = profiler.wrap_writer(writer)
+            hooks.insert(0, profiler)
 
-        if not args.quiet:
-            result_df.to_csv(sys.stdout, index=False)
+        if args.prefetch < 0:
+            raise ConfigurationError("--prefetch must be a non-negative integer.")
+        if args.prefetch:
+            if not args.chunksize:
+                raise ConfigurationError("--prefetch requires --chunksize.")
+            # reading and writing overlap with applying the pipeline
+            reader = PrefetchDataReader(reader, args.prefetch)
+            if writer is not None:
+                writer = BackgroundDataWriter(writer, args.prefetch)
+
+        pipeline_executor = PipelineExecutor(hooks)
+        with profiler or contextlib.nullcontext():
+            self._apply(pipeline, pipeline_executor, reader, writer, input_files, args)
+        if profiler is not None:
+            profiler.report(
+                table=args.profile,
+                output_file=args.profile_output,
+                trace_file=args.profile_trace,
+            )
+
+        if projection is not None and projection.pruned:
+            logger.info("Pruned columns: %s", projection.pruned)
 
         logger.info("Done")
 
+    def _apply(
+        self,
+        pipeline: pdpipe.PdPipelineStage,
+        pipeline_executor: PipelineExecutor,
+        reader: DataReader,
+        writer: Optional[DataWriter],
+        input_files: List[str],
+        args: argparse.Namespace,
+    ) -> None:
+        if input_files != [args.input_file]:
+            self._apply_files(
+                pipeline, pipeline_executor, reader, writer, input_files, args
+            )
+        elif args.chunksize:
+            logger.info(
+                "Load input file with chunksize %d: %s",
+                args.chunksize,
+                str(args.input_file),
+            )
+            chunks = reader.read_chunks(args.input_file, args.chunksize)
+
+            # Apply pipeline to each chunk
+            logger.info("Apply pipeline")
+            results: Iterable[pandas.DataFrame] = (
+                pipeline_executor.apply(pipeline, chunk) for chunk in chunks
+            )
+            if not args.quiet:
+                results = self._echo_chunks(results)
+
+            # Save processed data
+            if writer is not None:
+                logger.info("Writer result data frame: %s", str(args.output_file))
+                writer.write_chunks(results, args.output_file)
+            else:
+                for _ in results:
+                    pass
+        else:
+            # Apply pipeline without keeping the input data frame
+            logger.info("Load input file and apply pipeline: %s", args.input_file)
+            result_df = pipeline_executor.apply(pipeline, reader.read(args.input_file))
+
+            # Save processed data
+            if writer is not None:
+                logger.info("Writer result data frame: %s", str(args.output_file))
+                writer.write(result_df, args.output_file)
+
+            if not args.quiet:
+                from pdpcli.matrix import expand_matrix_columns
+
+                expand_matrix_columns(result_df).to_csv(sys.stdout, index=False)
+
+    def _apply_files(
+        self,
+        pipeline: pdpipe.PdPipelineStage,
+        pipeline_executor: PipelineExecutor,
+        reader: DataReader,
+        writer: Optional[DataWriter],
+        input_files: List[str],
+        args: argparse.Namespace,
+    ) -> None:
+        output_files: List[Optional[str]]
+        if args.output_file and not args.concat:
+            output_files = [
+                self._format_output_file(args.output_file, input_file)
+                for input_file in input_files
+            ]
+            if len(set(output_files)) != len(output_files):
+                raise ConfigurationError(
+                    "Output file must contain {stem} or {name} placeholders "
+                    "to write results of multiple input files separately."
+                )
+        else:
+            output_files = [None for _ in input_files]
+
+        # results are sent back from workers only if they are echoed or
+        # concatenated, otherwise workers stream them to output files
+        return_results = args.concat or not args.quiet
+        logger.info(
+            "Apply pipeline to %d files with %d workers",
+            len(input_files),
+            args.workers,
+        )
+
+        executor: Optional[ProcessPoolExecutor] = None
+        if args.workers > 1:
+            # workers receive the pipeline only once when they start
+            executor = ProcessPoolExecutor(
+                max_workers=args.workers,
+                initializer=self._init_worker,
+                initargs=(pipeline, pipeline_executor, reader, writer),
+            )
+            map_fn = executor.map
+        else:
+            self._init_worker(pipeline, pipeline_executor, reader, writer)
+            map_fn = map  # type: ignore[assignment]
+
+        num_rows = 0
+
+        def iterate_results() -> Iterator[pandas.DataFrame]:
+            nonlocal num_rows
+            for result in map_fn(
+                self._apply_file_in_worker,
+                input_files,
+                output_files,
+                [args.chunksize] * len(input_files),
+                [return_results] * len(input_files),
+            ):
+                if isinstance(result, int):
+                    num_rows += result
+                    continue
+                for df in result:
+                    num_rows += len(df)
+                    yield df
+
+        try:
+            dfs: Iterable[pandas.DataFrame] = iterate_results()
+            if not args.quiet:
+                dfs = self._echo_chunks(dfs)
+
+            if writer is not None and args.concat:
+                logger.info("Writer result data frame: %s", str(args.output_file))
+                writer.write_chunks(dfs, args.output_file)
+            else:
+                for _ in dfs:
+                    pass
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        logger.info("Applied pipeline to %d rows", num_rows)
+
+    @staticmethod
+    def _init_worker(
+        pipeline: pdpipe.PdPipelineStage,
+        pipeline_executor: PipelineExecutor,
+        reader: DataReader,
+        writer: Optional[DataWriter],
+    ) -> None:
+        _worker_context["pipeline"] = pipeline
+        _worker_context["executor"] = pipeline_executor
+        _worker_context["reader"] = reader
+        _worker_context["writer"] = writer
+
+    @staticmethod
+    def _apply_file_in_worker(
+        input_file: str,
+        output_file: Optional[str],
+        chunksize: Optional[int],
+        return_result: bool,
+    ) -> Union[int, List[pandas.DataFrame]]:
+        """
+        Apply the pipeline to the input file and write results to the output
+        file. Results are returned if `return_result` is set, otherwise only
+        the number of rows is returned.
+        """
+        pipeline = _worker_context["pipeline"]
+        pipeline_executor = _worker_context["executor"]
+        reader = _worker_context["reader"]
+        writer = _worker_context["writer"]
+
+        logger.info("Apply pipeline to: %s", input_file)
+        if chunksize:
+            results: List[pandas.DataFrame] = []
+            num_rows = 0
+
+            def apply_chunks() -> Iterator[pandas.DataFrame]:
+                nonlocal num_rows
+                for chunk in reader.read_chunks(input_file, chunksize):
+                    result_df = pipeline_executor.apply(pipeline, chunk)
+                    num_rows += len(result_df)
+                    if return_result:
+                        results.append(result_df)
+                    yield result_df
+
+            # chunks are written as they are applied
+            if output_file is not None:
+                writer.write_chunks(apply_chunks(), output_file)
+            else:
+                for _ in apply_chunks():
+                    pass
+            return results if return_result else num_rows
+
+        result_df = pipeline_executor.apply(pipeline, reader.read(input_file))
+        if output_file is not None:
+            writer.write(result_df, output_file)
+        return [result_df] if return_result else len(result_df)
+
+    @staticmethod
+    def _expand_input_files(input_file: str) -> List[str]:
+        if os.path.isdir(input_file):
+            return sorted(
+                str(path)
+                for path in Path(input_file).iterdir()
+                if path.is_file() and not path.name.startswith(".")
+            )
+        if any(char in input_file for char in "*?["):
+            return sorted(glob.glob(input_file))
+        return [input_file]
+
+    @staticmethod
+    def _format_output_file(output_file: str, input_file: str) -> str:
+        path = Path(input_file)
+        return output_file.format(stem=path.stem, name=path.name)
+
+    @staticmethod
+    def _echo_chunks(
+        dfs: Iterable[pandas.DataFrame],
+    ) -> Iterator[pandas.DataFrame]:
+        from pdpcli.matrix import expand_matrix_columns
+
+        header = True
+        for df in dfs:
+            expand_matrix_columns(df).to_csv(sys.stdout, index=False, header=header)
+            header = False
+            yield df
+
     @staticmethod
     def _is_pickle_file(file_path: Union[str, Path]) -> bool:
         ext = util.get_file_ext(file_path)
@@ -108,19 +492,35 @@ class ApplyCommand(Subcommand):
     def _load_pipeline_from_pickle(
         file_path: Union[str, Path]
     ) -> pdpipe.PdPipelineStage:
+        import minato
+
         file_path = minato.cached_path(file_path)
         with minato.open(file_path, "rb") as fp:
             pipeline = pickle.load(fp)
         return pipeline
 
+    @staticmethod
+    def _load_pipeline_from_artifact(
+        file_path: Union[str, Path]
+    ) -> pdpipe.PdPipelineStage:
+        from pdpcli import artifact
+
+        pipeline = artifact.load_pipeline(file_path)
+        return pipeline
+
     @staticmethod
     def _build_config(
         file_path: Union[str, Path],
         overrides: Optional[List[str]] = None,
+        cache_config: bool = False,
     ) -> Tuple[pdpipe.PdPipelineStage, Optional[DataReader], Optional[DataWriter]]:
+        from pdpcli.configs import CachedConfigReader, ConfigBuilder, ConfigReader
+
         config_reader = ConfigReader.from_path(file_path)
         if config_reader is None:
             raise ConfigurationError("Failed to infer config reader.")
+        if cache_config:
+            config_reader = CachedConfigReader(config_reader)
 
         config = config_reader.read(file_path, overrides)
         logger.info("Load config: %s", str(config))
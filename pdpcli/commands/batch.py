@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from pdpcli import util
+from pdpcli.commands.apply import ApplyCommand
+from pdpcli.commands.subcommand import Subcommand
+from pdpcli.exceptions import ConfigurationError
+
+if TYPE_CHECKING:
+    import pandas
+    import pdpipe
+
+    from pdpcli.data import DataReader, DataWriter
+    from pdpcli.stages.executor import PipelineExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class BatchEntry(NamedTuple):
+    pipeline: str
+    input_file: str
+    output_file: Optional[str] = None
+    config: Optional[str] = None
+    overrides: Tuple[str, ...] = ()
+    chunksize: Optional[int] = None
+
+
+class _LoadedConfig(NamedTuple):
+    pipeline: Optional[pdpipe.PdPipelineStage]
+    reader: Optional[DataReader]
+    writer: Optional[DataWriter]
+
+
+@Subcommand.register(
+    "batch",
+    description="Apply pipelines to input / output pairs listed in a manifest",
+    help="Apply pipelines to many files in one process",
+)
+class BatchCommand(Subcommand):
+    def set_arguments(self) -> None:
+        self.parser.add_argument(
+            "manifest",
+            type=str,
+            help=(
+                "path to a JSON Lines file of entries with pipeline, input_file, "
+                "and optional output_file, config, overrides and chunksize"
+            ),
+        )
+        self.parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="number of worker threads running entries concurrently",
+        )
+        self.parser.add_argument(
+            "--chunksize",
+            type=int,
+            default=None,
+            help="default number of rows to read, apply and write at a time",
+        )
+        self.parser.add_argument(
+            "--report",
+            type=str,
+            default=None,
+            help="path to a output JSON Lines file of status and time of entries",
+        )
+
+    def run(self, args: argparse.Namespace) -> None:
+        # dependencies are imported here to start the CLI quickly
+        from pdpcli.data.engines import dispose_engines
+        from pdpcli.stages.executor import PipelineExecutor
+
+        if args.workers <= 0:
+            raise ConfigurationError("workers must be a positive integer.")
+
+        entries = self._read_manifest(args.manifest)
+        logger.info("Load %d entries from: %s", len(entries), args.manifest)
+
+        resources = _SharedResources()
+        pipeline_executor = PipelineExecutor()
+
+        def run_entry(index: int) -> Dict[str, Any]:
+            return self._run_entry(
+                index, entries[index], resources, pipeline_executor, args.chunksize
+            )
+
+        try:
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                reports = list(executor.map(run_entry, range(len(entries))))
+        finally:
+            dispose_engines()
+
+        if args.report:
+            with open(args.report, "w") as fp:
+                for report in reports:
+                    fp.write(json.dumps(report) + "\n")
+
+        num_failed = sum(report["status"] == "failed" for report in reports)
+        logger.info(
+            "Done: %d succeeded, %d failed",
+            len(reports) - num_failed,
+            num_failed,
+        )
+        if num_failed:
+            sys.exit(1)
+
+    @staticmethod
+    def _read_manifest(file_path: str) -> List[BatchEntry]:
+        entries = []
+        with open(file_path, "r") as fp:
+            for line_number, line in enumerate(fp, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    fields = json.loads(line)
+                except ValueError as e:
+                    raise ConfigurationError(
+                        f"Invalid JSON at line {line_number} of {file_path}: {e}"
+                    ) from e
+                if not isinstance(fields, dict):
+                    raise ConfigurationError(
+                        f"Entry at line {line_number} of {file_path} must be an object"
+                    )
+                unknown_fields = set(fields) - set(BatchEntry._fields)
+                if unknown_fields:
+                    raise ConfigurationError(
+                        f"Unknown fields at line {line_number} of {file_path}: "
+                        f"{sorted(unknown_fields)}"
+                    )
+                missing_fields = {"pipeline", "input_file"} - set(fields)
+                if missing_fields:
+                    raise ConfigurationError(
+                        f"Missing fields at line {line_number} of {file_path}: "
+                        f"{sorted(missing_fields)}"
+                    )
+                fields["overrides"] = tuple(fields.get("overrides") or ())
+                entries.append(BatchEntry(**fields))
+        return entries
+
+    def _run_entry(
+        self,
+        index: int,
+        entry: BatchEntry,
+        resources: _SharedResources,
+        pipeline_executor: PipelineExecutor,
+        default_chunksize: Optional[int],
+    ) -> Dict[str, Any]:
+        report: Dict[str, Any] = {
+            "index": index,
+            "pipeline": entry.pipeline,
+            "input_file": entry.input_file,
+            "output_file": entry.output_file,
+        }
+        start_time = time.perf_counter()
+        try:
+            pipeline, reader, writer = resources.get(entry)
+            chunksize = entry.chunksize or default_chunksize
+            logger.info("Apply pipeline to: %s", entry.input_file)
+            report["rows"] = self._apply(
+                pipeline,
+                pipeline_executor,
+                reader,
+                writer,
+                entry.input_file,
+                entry.output_file,
+                chunksize,
+            )
+            report["status"] = "succeeded"
+        except Exception as e:  # pylint: disable=broad-except
+            logger.exception("Failed to apply pipeline to: %s", entry.input_file)
+            report["status"] = "failed"
+            report["error"] = f"{type(e).__name__}: {e}"
+        report["seconds"] = time.perf_counter() - start_time
+        return report
+
+    @staticmethod
+    def _apply(
+        pipeline: pdpipe.PdPipelineStage,
+        pipeline_executor: PipelineExecutor,
+        reader: DataReader,
+        writer: Optional[DataWriter],
+        input_file: str,
+        output_file: Optional[str],
+        chunksize: Optional[int],
+    ) -> int:
+        num_rows = 0
+        if chunksize:
+
+            def apply_chunks() -> Iterator[pandas.DataFrame]:
+                nonlocal num_rows
+                for chunk in reader.read_chunks(input_file, chunksize):
+                    result_df = pipeline_executor.apply(pipeline, chunk)
+                    num_rows += len(result_df)
+                    yield result_df
+
+            if writer is not None and output_file is not None:
+                writer.write_chunks(apply_chunks(), output_file)
+            else:
+                for _ in apply_chunks():
+                    pass
+            return num_rows
+
+        result_df = pipeline_executor.apply(pipeline, reader.read(input_file))
+        if writer is not None and output_file is not None:
+            writer.write(result_df, output_file)
+        return len(result_df)
+
+
+class _SharedResources:
+    """
+    Pipelines, readers and writers shared by entries. Loaded pipelines are
+    kept as templates which are never applied. Stages keep application
+    contexts on themselves, so each thread applies its own copy of fitted
+    pipelines, and each entry fits its own copy of unfitted pipelines as
+    `pdp apply` does for each input.
+    """
+
+    def __init__(self) -> None:
+        self._configs: Dict[Tuple[str, Tuple[str, ...]], Future[_LoadedConfig]] = {}
+        self._readers: Dict[Tuple[Any, ...], DataReader] = {}
+        self._writers: Dict[Tuple[Any, ...], DataWriter] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def get(
+        self,
+        entry: BatchEntry,
+    ) -> Tuple[pdpipe.PdPipelineStage, DataReader, Optional[DataWriter]]:
+        from pdpcli.data import DataReader, DataWriter
+
+        pipeline_config = self._get_config(entry.pipeline, entry.overrides)
+        template = pipeline_config.pipeline
+        assert template is not None
+
+        pipeline_key = (entry.pipeline, entry.overrides)
+        if template.is_fitted:
+            pipelines = self._local.__dict__.setdefault("pipelines", {})
+            if pipeline_key not in pipelines:
+                pipelines[pipeline_key] = copy.deepcopy(template)
+            pipeline = pipelines[pipeline_key]
+        else:
+            # pipelines are fitted to each input without reusing fitted stages
+            pipeline = copy.deepcopy(template)
+
+        if entry.config:
+            io_config = self._get_config(entry.config, entry.overrides)
+        else:
+            io_config = pipeline_config
+
+        # readers hold input schemas of pipelines
+        reader_key = (pipeline_key, entry.config, util.get_file_ext(entry.input_file))
+        with self._lock:
+            reader = self._readers.get(reader_key)
+            if reader is None:
+                if io_config.reader is not None:
+                    # schemas of different pipelines are applied to copies
+                    reader = copy.deepcopy(io_config.reader)
+                else:
+                    reader = DataReader.from_path(entry.input_file)
+                if reader is None:
+                    raise ConfigurationError("Failed to infer data reader")
+                self._apply_schema(reader, entry.pipeline)
+                self._readers[reader_key] = reader
+
+        writer: Optional[DataWriter] = None
+        if entry.output_file:
+            writer_key = (
+                entry.config or pipeline_key,
+                util.get_file_ext(entry.output_file),
+            )
+            with self._lock:
+                writer = self._writers.get(writer_key)
+                if writer is None:
+                    writer = io_config.writer or DataWriter.from_path(entry.output_file)
+                    if writer is None:
+                        raise ConfigurationError("Failed to infer data writer.")
+                    self._writers[writer_key] = writer
+
+        return pipeline, reader, writer
+
+    def _get_config(self, file_path: str, overrides: Tuple[str, ...]) -> _LoadedConfig:
+        from pdpcli import artifact
+
+        key = (file_path, overrides)
+        with self._lock:
+            future = self._configs.get(key)
+            is_loader = future is None
+            if future is None:
+                future = self._configs[key] = Future()
+
+        # other threads wait for the result of the first one, and entries of
+        # broken pipelines fail without loading them again
+        if is_loader:
+            logger.info("Load pipeline from: %s", file_path)
+            try:
+                if ApplyCommand._is_pickle_file(file_path):
+                    pipeline = ApplyCommand._load_pipeline_from_pickle(file_path)
+                    future.set_result(_LoadedConfig(pipeline, None, None))
+                elif artifact.is_artifact_file(file_path):
+                    pipeline = ApplyCommand._load_pipeline_from_artifact(file_path)
+                    future.set_result(_LoadedConfig(pipeline, None, None))
+                else:
+                    future.set_result(
+                        _LoadedConfig(
+                            *ApplyCommand._build_config(file_path, list(overrides))
+                        )
+                    )
+            except Exception as e:  # pylint: disable=broad-except
+                future.set_exception(e)
+        return future.result()
+
+    @staticmethod
+    def _apply_schema(reader: DataReader, pipeline_path: str) -> None:
+        from pdpcli import artifact
+        from pdpcli.data import DataSchema
+
+        if not (
+            ApplyCommand._is_pickle_file(pipeline_path)
+            or artifact.is_artifact_file(pipeline_path)
+        ):
+            return
+        sidecar_path = DataSchema.find_sidecar(pipeline_path)
+        if sidecar_path is not None:
+            logger.info("Load input schema from: %s", sidecar_path)
+            if not reader.apply_schema(DataSchema.load(sidecar_path)):
+                logger.warning("%s does not support schemas", type(reader).__name__)
@@ -0,0 +1,130 @@
+import argparse
+import json
+import logging
+import sys
+
+from pdpcli.cache import format_size
+from pdpcli.commands.subcommand import Subcommand
+
+logger = logging.getLogger(__name__)
+
+
+@Subcommand.register(
+    "bench",
+    description="Benchmark pipelines with synthetic data of several sizes",
+    help="Benchmark pipelines with synthetic data",
+)
+class BenchCommand(Subcommand):
+    def set_arguments(self) -> None:
+        self.parser.add_argument(
+            "configs",
+            type=str,
+            nargs="+",
+            help="paths to benchmark configuration files",
+        )
+        self.parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[1000, 10000, 100000],
+            help="numbers of rows of synthetic data",
+        )
+        self.parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="number of runs of each case (the fastest one is reported)",
+        )
+        self.parser.add_argument(
+            "--format",
+            type=str,
+            default=".csv",
+            help="file extension of input and output files",
+        )
+        self.parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="random seed of synthetic data",
+        )
+        self.parser.add_argument(
+            "-o",
+            "--output-file",
+            type=str,
+            default=None,
+            help="path to a output JSON file of results (default: stdout)",
+        )
+        self.parser.add_argument(
+            "--baseline",
+            type=str,
+            default=None,
+            help="path to a JSON file of baseline results to compare with",
+        )
+        self.parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.1,
+            help="ratio of allowed throughput drop and memory growth",
+        )
+        self.parser.add_argument(
+            "--in-process",
+            action="store_true",
+            help="run all cases in this process instead of fresh processes",
+        )
+
+    def run(self, args: argparse.Namespace) -> None:
+        # dependencies are imported here to start the CLI quickly
+        import minato
+
+        from pdpcli.benchmark import (
+            BenchmarkResult,
+            compare_results,
+            get_environment,
+            run_benchmark,
+        )
+
+        results = []
+        for config_path in args.configs:
+            for rows in args.rows:
+                logger.info("Run benchmark: %s (%d rows)", config_path, rows)
+                result = run_benchmark(
+                    config_path,
+                    rows,
+                    repeat=args.repeat,
+                    file_format=args.format,
+                    seed=args.seed,
+                    isolated=not args.in_process,
+                )
+                peak_rss = (
+                    "-" if result.peak_rss is None else format_size(result.peak_rss)
+                )
+                print(
+                    f"{result.name}\t{rows} rows\t"
+                    f"{result.rows_per_sec:.1f} rows/s\t{peak_rss}",
+                    file=sys.stderr,
+                )
+                results.append(result)
+
+        report = {
+            "environment": get_environment(),
+            "results": [result._asdict() for result in results],
+        }
+        if args.output_file is None:
+            print(json.dumps(report, indent=2))
+        else:
+            logger.info("Save results to: %s", args.output_file)
+            with minato.open(args.output_file, "w") as fp:
+                json.dump(report, fp, indent=2)
+
+        if args.baseline is not None:
+            with minato.open(args.baseline, "r") as fp:
+                baseline = [
+                    BenchmarkResult.from_dict(params)
+                    for params in json.load(fp)["results"]
+                ]
+            regressions = compare_results(results, baseline, args.threshold)
+            for regression in regressions:
+                logger.error("Regression: %s", regression)
+            if regressions:
+                sys.exit(1)
+            logger.info("No regressions against: %s", args.baseline)
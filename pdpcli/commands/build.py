@@ -1,15 +1,20 @@
+from __future__ import annotations
+
 import argparse
+import contextlib
+import functools
 import logging
 import pickle
-
-import minato
-import pdpipe  # noqa: F401
+from typing import TYPE_CHECKING, List, Optional
 
 from pdpcli.commands.subcommand import Subcommand
-from pdpcli.configs import ConfigBuilder, ConfigReader
-from pdpcli.data import DataReader
 from pdpcli.exceptions import ConfigurationError
 
+if TYPE_CHECKING:
+    import pandas
+
+    from pdpcli.data import DataReader
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,11 +47,108 @@ class BuildCommand(Subcommand):
             nargs="*",
             help="arguments to override config values",
         )
+        self.parser.add_argument(
+            "--prune-columns",
+            action="store_true",
+            help="read only columns required by the pipeline",
+        )
+        self.parser.add_argument(
+            "--save-schema",
+            action="store_true",
+            help="save the schema of input data to reuse it at apply time",
+        )
+        self.parser.add_argument(
+            "--infer-categories",
+            action="store_true",
+            help="read low-cardinality string columns as categoricals",
+        )
+        self.parser.add_argument(
+            "--cache-config",
+            action="store_true",
+            help="cache resolved configs until their files or environment change",
+        )
+        self.parser.add_argument(
+            "--cache-input",
+            action="store_true",
+            help="cache parsed input data to skip parsing in later runs",
+        )
+        self.parser.add_argument(
+            "--cache-stages",
+            action="store_true",
+            help="cache fitted stages and their outputs to skip unchanged stages",
+        )
+        self.parser.add_argument(
+            "--low-memory",
+            action="store_true",
+            help="drop columns and release data frames as early as possible",
+        )
+        self.parser.add_argument(
+            "--profile",
+            action="store_true",
+            help="show time and memory usage of each stage and reader",
+        )
+        self.parser.add_argument(
+            "--profile-output",
+            type=str,
+            default=None,
+            help="path to a output JSON file of profiling results",
+        )
+        self.parser.add_argument(
+            "--profile-trace",
+            type=str,
+            default=None,
+            help="path to a output Chrome trace-event file of profiling results",
+        )
+        self.parser.add_argument(
+            "--chunksize",
+            type=int,
+            default=None,
+            help="fit stages by partial_fit on chunks of this number of rows",
+        )
+        self.parser.add_argument(
+            "--epochs",
+            type=int,
+            default=1,
+            help="number of passes over chunks for each stage (with --chunksize)",
+        )
+        self.parser.add_argument(
+            "--sample-rows",
+            type=int,
+            default=None,
+            help="fit on this number of rows sampled while streaming the input",
+        )
+        self.parser.add_argument(
+            "--sample-frac",
+            type=float,
+            default=None,
+            help="fit on rows sampled with this probability while streaming the input",
+        )
+        self.parser.add_argument(
+            "--sample-seed",
+            type=int,
+            default=0,
+            help="random seed of sampling",
+        )
 
     def run(self, args: argparse.Namespace) -> None:
+        # dependencies are imported here to start the CLI quickly
+        import minato
+
+        from pdpcli import artifact
+        from pdpcli.configs import CachedConfigReader, ConfigBuilder, ConfigReader
+        from pdpcli.data import CachedDataReader, DataReader, SampledDataReader
+        from pdpcli.profiler import Profiler
+        from pdpcli.stages.executor import PipelineExecutor, StageHook
+        from pdpcli.stages.incremental import fit_incremental
+        from pdpcli.stages.low_memory import LowMemoryHook
+        from pdpcli.stages.planner import push_down_columns
+        from pdpcli.stages.stage_cache import StageCache
+
         config_reader = ConfigReader.from_path(args.config)
         if config_reader is None:
             raise ConfigurationError("Failed to infer config reader.")
+        if args.cache_config:
+            config_reader = CachedConfigReader(config_reader)
 
         config = config_reader.read(args.config, args.overrides)
         logger.info("Configurations:  %s", str(config))
@@ -56,18 +158,109 @@ class BuildCommand(Subcommand):
 
         logger.info("Build pipeline:\n%s", str(pipeline))
 
+        if args.chunksize is not None:
+            if args.chunksize <= 0:
+                raise ConfigurationError("chunksize must be a positive integer.")
+            # stage hooks are not applied by incremental fitting
+            if (
+                args.save_schema
+                or args.cache_stages
+                or args.low_memory
+                or args.profile
+                or args.profile_output
+                or args.profile_trace
+            ):
+                raise ConfigurationError(
+                    "--save-schema, --cache-stages, --low-memory and --profile* "
+                    "are not supported with --chunksize."
+                )
+        elif args.epochs != 1:
+            raise ConfigurationError("--epochs requires --chunksize.")
+        if args.sample_rows is not None and args.sample_frac is not None:
+            raise ConfigurationError(
+                "--sample-rows and --sample-frac cannot be used together."
+            )
+
         if args.input_file:
             reader = builder.reader or DataReader.from_path(args.input_file)
             if reader is None:
                 raise ConfigurationError("Failed to infer data reader.")
 
-            df = reader.read(args.input_file)
+            if args.prune_columns or args.low_memory:
+                projection = push_down_columns(pipeline, reader)
+            else:
+                projection = None
+
+            if args.cache_input:
+                reader = CachedDataReader(reader)
+
+            if args.sample_rows is not None or args.sample_frac is not None:
+                reader = SampledDataReader(
+                    reader,
+                    rows=args.sample_rows,
+                    frac=args.sample_frac,
+                    seed=args.sample_seed,
+                )
+
+            hooks: List[StageHook] = []
+            if args.low_memory:
+                # all output columns are kept since stages such as
+                # select_columns require them while fitting
+                hooks.append(LowMemoryHook())
+            if args.cache_stages:
+                hooks.append(StageCache())
+
+            profiler: Optional[Profiler] = None
+            if args.profile or args.profile_output or args.profile_trace:
+                profiler = Profiler()
+                reader = profiler.wrap_reader(reader)
+                hooks.insert(0, profiler)
 
             logger.info("Fit model with: %s", args.input_file)
-            pipeline.fit(df)
+            with profiler or contextlib.nullcontext():
+                if args.chunksize is not None:
+                    fit_incremental(
+                        pipeline,
+                        functools.partial(
+                            reader.read_chunks, args.input_file, args.chunksize
+                        ),
+                        epochs=args.epochs,
+                    )
+                else:
+                    # fit without keeping the input data frame
+                    PipelineExecutor(hooks).fit_transform(
+                        pipeline, self._read_input(reader, args)
+                    )
+            if profiler is not None:
+                profiler.report(
+                    table=args.profile,
+                    output_file=args.profile_output,
+                    trace_file=args.profile_trace,
+                )
+            if projection is not None:
+                logger.info("Pruned columns: %s", projection.pruned)
 
         logger.info("Save pipeline to: %s", args.pipeline)
-        with minato.open(args.pipeline, "wb") as fp:
-            pickle.dump(pipeline, fp)
+        if artifact.is_artifact_file(args.pipeline):
+            artifact.save_pipeline(pipeline, args.pipeline)
+        else:
+            with minato.open(args.pipeline, "wb") as fp:
+                pickle.dump(pipeline, fp)
 
         logger.info("Done")
+
+    @staticmethod
+    def _read_input(reader: DataReader, args: argparse.Namespace) -> pandas.DataFrame:
+        from pdpcli.data import DataSchema
+
+        df = reader.read(args.input_file)
+        if args.save_schema:
+            schema = DataSchema.from_dataframe(
+                df, infer_categories=args.infer_categories
+            )
+            df = schema.conform(df)
+
+            schema_path = DataSchema.get_sidecar_path(args.pipeline)
+            logger.info("Save input schema to: %s", schema_path)
+            schema.save(schema_path)
+        return df
@@ -0,0 +1,56 @@
+import argparse
+import logging
+
+from pdpcli.cache import Cache, format_size, format_time
+from pdpcli.commands.subcommand import Subcommand
+from pdpcli.exceptions import ConfigurationError
+
+logger = logging.getLogger(__name__)
+
+
+@Subcommand.register(
+    "cache",
+    description="Inspect or clear caches under the pdpcli directory",
+    help="Inspect or clear caches",
+)
+class CacheCommand(Subcommand):
+    requires_plugins = False
+
+    def set_arguments(self) -> None:
+        self.parser.add_argument(
+            "action",
+            type=str,
+            nargs="?",
+            default="info",
+            choices=["info", "list", "clear"],
+            help="show cache sizes, list cache entries or clear caches",
+        )
+        self.parser.add_argument(
+            "--name",
+            type=str,
+            default=None,
+            help="name of a cache to inspect or clear (default: all caches)",
+        )
+
+    def run(self, args: argparse.Namespace) -> None:
+        names = Cache.names()
+        if args.name is not None:
+            if args.name not in names:
+                raise ConfigurationError(f"Cache not found: {args.name}")
+            names = [args.name]
+
+        for name in names:
+            cache = Cache.by_name(name)
+            entries = cache.entries()
+            if args.action == "info":
+                size = sum(entry.size for entry in entries)
+                print(f"{name}\t{len(entries)} entries\t{format_size(size)}")
+            elif args.action == "list":
+                for entry in reversed(entries):
+                    print(
+                        f"{name}\t{entry.key}\t{format_size(entry.size)}\t"
+                        f"{format_time(entry.last_access)}"
+                    )
+            else:
+                logger.info("Clear cache: %s", name)
+                cache.clear()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import argparse
+import functools
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Tuple
+
+from pdpcli.commands.apply import ApplyCommand
+from pdpcli.commands.subcommand import Subcommand
+from pdpcli.exceptions import ConfigurationError
+
+if TYPE_CHECKING:
+    import pdpipe
+
+logger = logging.getLogger(__name__)
+
+
+@Subcommand.register(
+    "serve",
+    description="Keep pipelines loaded and apply them to data sent over HTTP",
+    help="Serve pipelines over HTTP",
+)
+class ServeCommand(Subcommand):
+    def set_arguments(self) -> None:
+        self.parser.add_argument(
+            "pipelines",
+            type=str,
+            nargs="+",
+            help="paths to trained models or config files, optionally as NAME=PATH",
+        )
+        self.parser.add_argument(
+            "--host",
+            type=str,
+            default="127.0.0.1",
+            help="host name to listen on",
+        )
+        self.parser.add_argument(
+            "--port",
+            type=int,
+            default=8000,
+            help="port number to listen on",
+        )
+        self.parser.add_argument(
+            "--unix-socket",
+            type=str,
+            default=None,
+            help="path to a Unix socket to listen on instead of a TCP port",
+        )
+        self.parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="number of worker threads applying each pipeline",
+        )
+        self.parser.add_argument(
+            "--max-batch-rows",
+            type=int,
+            default=10000,
+            help="maximum number of rows of requests applied at once",
+        )
+        self.parser.add_argument(
+            "--max-batch-delay",
+            type=float,
+            default=2.0,
+            help="milliseconds to wait for other requests to batch together",
+        )
+        self.parser.add_argument(
+            "--reload",
+            action="store_true",
+            help="reload pipelines when their files are modified",
+        )
+        self.parser.add_argument(
+            "--reload-interval",
+            type=float,
+            default=1.0,
+            help="seconds between checks of modified files (with --reload)",
+        )
+
+    def run(self, args: argparse.Namespace) -> None:
+        # dependencies are imported here to start the CLI quickly
+        from pdpcli.server import PipelineServer, ServedPipeline
+
+        pipelines = []
+        for spec in args.pipelines:
+            name, file_path = self._parse_pipeline_spec(spec)
+            logger.info("Load pipeline %s from: %s", name, file_path)
+            pipelines.append(
+                ServedPipeline(
+                    name,
+                    functools.partial(self._load_pipeline, file_path),
+                    file_path if args.reload else None,
+                )
+            )
+
+        server = PipelineServer(
+            pipelines,
+            workers=args.workers,
+            max_batch_rows=args.max_batch_rows,
+            max_delay=args.max_batch_delay / 1000,
+            reload_interval=args.reload_interval if args.reload else None,
+        )
+        server.serve(args.host, args.port, args.unix_socket)
+
+    @staticmethod
+    def _parse_pipeline_spec(spec: str) -> Tuple[str, str]:
+        name, sep, file_path = spec.partition("=")
+        if not sep:
+            file_path = spec
+            name = Path(spec).name.split(".")[0]
+        if not name or not file_path:
+            raise ConfigurationError(f"Invalid pipeline: {spec}")
+        return name, file_path
+
+    @staticmethod
+    def _load_pipeline(file_path: str) -> pdpipe.PdPipelineStage:
+        from pdpcli import artifact
+
+        if ApplyCommand._is_pickle_file(file_path):
+            return ApplyCommand._load_pipeline_from_pickle(file_path)
+        if artifact.is_artifact_file(file_path):
+            return ApplyCommand._load_pipeline_from_artifact(file_path)
+        pipeline, _, _ = ApplyCommand._build_config(file_path)
+        return pipeline
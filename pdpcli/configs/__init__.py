@@ -1,7 +1,30 @@
-from pdpcli.configs.config_builder import ConfigBuilder  # noqa: F401
-from pdpcli.configs.config_readers import (  # noqa: F401
-    ConfigReader,
-    JsonConfigReader,
-    JsonnetConfigReader,
-    YamlConfigReader,
-)
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pdpcli.configs.config_builder import ConfigBuilder  # noqa: F401
+    from pdpcli.configs.config_readers import (  # noqa: F401
+        CachedConfigReader,
+        ConfigReader,
+        ConfigSources,
+        JsonConfigReader,
+        JsonnetConfigReader,
+        YamlConfigReader,
+    )
+
+# re-exported lazily not to import stages, readers and writers to read configs
+_LAZY_ATTRIBUTES = {
+    "ConfigBuilder": "pdpcli.configs.config_builder",
+    "CachedConfigReader": "pdpcli.configs.config_readers",
+    "ConfigReader": "pdpcli.configs.config_readers",
+    "ConfigSources": "pdpcli.configs.config_readers",
+    "JsonConfigReader": "pdpcli.configs.config_readers",
+    "JsonnetConfigReader": "pdpcli.configs.config_readers",
+    "YamlConfigReader": "pdpcli.configs.config_readers",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
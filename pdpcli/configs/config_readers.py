@@ -1,16 +1,56 @@
+import hashlib
 import json
 import logging
+import os
+import re
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union, cast
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple, Union, cast
 
 import minato
 from omegaconf import DictConfig, ListConfig, OmegaConf
 
+from pdpcli.cache import Cache, compute_key
 from pdpcli.configs.jsonnet import load_jsonnet
 from pdpcli.registrable import RegistrableWithFile
 
 logger = logging.getLogger(__name__)
 
+# environment variables referenced by interpolations like ${oc.env:NAME}
+_OMEGACONF_ENV_PATTERN = re.compile(r"\$\{\s*(?:oc\.)?env\s*:\s*([^,}\s]*)")
+_JSONNET_EXT_VAR_PATTERN = re.compile(r"std\.extVar\(\s*(?:(['\"])(.*?)\1\s*\))?")
+
+
+def _hash_file(file_path: Union[str, Path]) -> Optional[str]:
+    try:
+        with open(file_path, "rb") as fp:
+            return hashlib.sha256(fp.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _hash_environment(names: Optional[List[str]]) -> str:
+    if names is None:
+        names = sorted(os.environ)
+    # values are hashed not to store secrets in caches
+    return compute_key([[name, os.environ.get(name)] for name in names])
+
+
+class ConfigSources(NamedTuple):
+    """Files and environment variables which a resolved config depends on."""
+
+    # hashes of file contents by their paths
+    files: Dict[str, Optional[str]]
+    # names of referenced environment variables, or `None` if references
+    # cannot be determined and the config depends on the whole environment
+    env_vars: Optional[List[str]]
+    env_hash: str
+
+    def is_valid(self) -> bool:
+        """Return whether no source has been changed since the config was read."""
+        if _hash_environment(self.env_vars) != self.env_hash:
+            return False
+        return all(_hash_file(path) == digest for path, digest in self.files.items())
+
 
 class ConfigReader(RegistrableWithFile):
     def read(
@@ -18,16 +58,44 @@ class ConfigReader(RegistrableWithFile):
         file_path: Union[str, Path],
         overrides: Optional[List[str]] = None,
     ) -> Union[Dict[str, Any]]:
-        config = self._read(file_path)
+        config = self._merge_overrides(self._read(file_path), overrides)
+        container = OmegaConf.to_container(config, resolve=True)
+        return cast(Dict[str, Any], container)
+
+    def read_with_sources(
+        self,
+        file_path: Union[str, Path],
+        overrides: Optional[List[str]] = None,
+    ) -> Tuple[Dict[str, Any], ConfigSources]:
+        """Read a resolved config with sources it depends on."""
+        local_path = minato.cached_path(file_path)
+        config, imported_files = self._read_with_imports(local_path)
+        config = self._merge_overrides(config, overrides)
+
+        file_paths = [str(local_path)] + imported_files
+        env_var_names = self._find_env_vars(OmegaConf.to_yaml(config), file_paths)
+
+        container = OmegaConf.to_container(config, resolve=True)
 
+        env_vars = None if env_var_names is None else sorted(env_var_names)
+        sources = ConfigSources(
+            files={path: _hash_file(path) for path in file_paths},
+            env_vars=env_vars,
+            env_hash=_hash_environment(env_vars),
+        )
+        return cast(Dict[str, Any], container), sources
+
+    @staticmethod
+    def _merge_overrides(
+        config: Union[DictConfig, ListConfig],
+        overrides: Optional[List[str]],
+    ) -> Union[DictConfig, ListConfig]:
         assert isinstance(config, DictConfig), "config should be a dict"
 
         if overrides:
             args_config = OmegaConf.from_dotlist(overrides)
             config = OmegaConf.merge(config, args_config)
-
-        container = OmegaConf.to_container(config, resolve=True)
-        return cast(Dict[str, Any], container)
+        return config
 
     def _read(
         self,
@@ -35,6 +103,28 @@ class ConfigReader(RegistrableWithFile):
     ) -> Union[DictConfig, ListConfig]:
         raise NotImplementedError
 
+    def _read_with_imports(
+        self,
+        file_path: Union[str, Path],
+    ) -> Tuple[Union[DictConfig, ListConfig], List[str]]:
+        """Read a config with paths of other files imported by the config."""
+        return self._read(file_path), []
+
+    def _find_env_vars(
+        self,
+        config_text: str,
+        file_paths: List[str],
+    ) -> Optional[Set[str]]:
+        """
+        Return names of environment variables referenced by the unresolved
+        config, or `None` if they cannot be determined.
+        """
+        names = set(_OMEGACONF_ENV_PATTERN.findall(config_text))
+        if any(not name or "$" in name for name in names):
+            # names given by nested interpolations
+            return None
+        return names
+
 
 @ConfigReader.register("yaml", extensions=[".yml", ".yaml"])
 class YamlConfigReader(ConfigReader):
@@ -67,3 +157,70 @@ class JsonnetConfigReader(ConfigReader):
         file_path = minato.cached_path(file_path)
         jsondict = load_jsonnet(file_path)
         return OmegaConf.create(jsondict)
+
+    def _read_with_imports(
+        self,
+        file_path: Union[str, Path],
+    ) -> Tuple[Union[DictConfig, ListConfig], List[str]]:
+        file_path = minato.cached_path(file_path)
+        imported_files: List[str] = []
+        jsondict = load_jsonnet(file_path, imported_files=imported_files)
+        return OmegaConf.create(jsondict), list(dict.fromkeys(imported_files))
+
+    def _find_env_vars(
+        self,
+        config_text: str,
+        file_paths: List[str],
+    ) -> Optional[Set[str]]:
+        names = super()._find_env_vars(config_text, file_paths)
+        if names is None:
+            return None
+        for path in file_paths:
+            with open(path, "r") as fp:
+                for match in _JSONNET_EXT_VAR_PATTERN.finditer(fp.read()):
+                    if match.group(2) is None:
+                        # names given by expressions
+                        return None
+                    names.add(match.group(2))
+        return names
+
+
+class CachedConfigReader(ConfigReader):
+    """
+    Wrap a config reader to cache resolved configs on disk. Cache entries are
+    keyed by the config file, its content and overrides, and are used only if
+    imported files and referenced environment variables are not changed.
+    """
+
+    def __init__(self, reader: ConfigReader, cache: Optional[Cache] = None) -> None:
+        self._reader = reader
+        self._cache = cache or Cache.by_name("configs")
+
+    def read(
+        self,
+        file_path: Union[str, Path],
+        overrides: Optional[List[str]] = None,
+    ) -> Union[Dict[str, Any]]:
+        return self.read_with_sources(file_path, overrides)[0]
+
+    def read_with_sources(
+        self,
+        file_path: Union[str, Path],
+        overrides: Optional[List[str]] = None,
+    ) -> Tuple[Dict[str, Any], ConfigSources]:
+        local_path = Path(minato.cached_path(file_path)).resolve()
+        key = compute_key(
+            [str(local_path), _hash_file(local_path)],
+            f"{type(self._reader).__module__}.{type(self._reader).__name__}",
+            overrides or [],
+        )
+        cached = self._cache.load(key)
+        if cached is not None:
+            config, sources = cached
+            if sources.is_valid():
+                logger.info("Load cached config of: %s", str(file_path))
+                return config, sources
+
+        config, sources = self._reader.read_with_sources(local_path, overrides)
+        self._cache.save(key, (config, sources))
+        return config, sources
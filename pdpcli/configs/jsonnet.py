@@ -1,14 +1,17 @@
 import json
 import logging
 import os
+import re
 from pathlib import Path
-from typing import Any, Dict, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
 try:
     from _jsonnet import evaluate_file
+    from _jsonnet import version as JSONNET_VERSION
 except ImportError:
+    JSONNET_VERSION = ""
 
     def evaluate_file(filename: str, **_kwargs: Any) -> str:
         logger.warning("jsonnet is unavailable, treating %{filename}s as plain json")
@@ -24,9 +27,40 @@ def _environment_variables() -> Dict[str, str]:
     return {key: value for key, value in os.environ.items() if _is_encodable(value)}
 
 
-def load_jsonnet(file_path: Union[Path, str]) -> Dict[str, Any]:
+def _imports_as_bytes() -> bool:
+    # jsonnet takes contents of imported files as bytes since 0.19.0
+    match = re.match(r"v?(\d+)\.(\d+)", JSONNET_VERSION)
+    if match is None:
+        return True
+    return (int(match.group(1)), int(match.group(2))) >= (0, 19)
+
+
+def load_jsonnet(
+    file_path: Union[Path, str],
+    imported_files: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Evaluate a jsonnet file with environment variables as external variables.
+    Paths of imported files are appended to `imported_files` if given.
+    """
     ext_vars = _environment_variables()
+    kwargs: Dict[str, Any] = {}
+    if imported_files is not None:
+        as_bytes = _imports_as_bytes()
+
+        def import_callback(
+            directory: str,
+            relative_path: str,
+        ) -> Tuple[str, Union[str, bytes]]:
+            path = os.path.join(directory, relative_path)
+            with open(path, "rb") as fp:
+                content = fp.read()
+            imported_files.append(path)
+            return path, content if as_bytes else content.decode("utf-8")
+
+        kwargs["import_callback"] = import_callback
+
     jsondict = json.loads(
-        evaluate_file(str(file_path), ext_vars=ext_vars)
+        evaluate_file(str(file_path), ext_vars=ext_vars, **kwargs)
     )  # type: Dict[str, Any]
     return jsondict
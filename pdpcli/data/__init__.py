@@ -1,12 +1,62 @@
-from pdpcli.data.data_readers import (  # noqa: F401
-    CsvDataReader,
-    DataReader,
-    JsonDataReader,
-    PickleDataReader,
-)
-from pdpcli.data.data_writers import (  # noqa: F401
-    CsvDataWriter,
-    DataWriter,
-    JsonDataWriter,
-    PickleDataWriter,
-)
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pdpcli.data.data_readers import (  # noqa: F401
+        ArrowDataReader,
+        CachedDataReader,
+        CsvDataReader,
+        DataReader,
+        FeatherDataReader,
+        JsonDataReader,
+        NpzDataReader,
+        ParquetDataReader,
+        PickleDataReader,
+    )
+    from pdpcli.data.data_writers import (  # noqa: F401
+        ArrowDataWriter,
+        CsvDataWriter,
+        DataWriter,
+        FeatherDataWriter,
+        JsonDataWriter,
+        NpzDataWriter,
+        ParquetDataWriter,
+        PickleDataWriter,
+    )
+    from pdpcli.data.prefetch import (  # noqa: F401
+        BackgroundDataWriter,
+        PrefetchDataReader,
+    )
+    from pdpcli.data.sampling import SampledDataReader  # noqa: F401
+    from pdpcli.data.schema import DataSchema  # noqa: F401
+
+# re-exported lazily not to import readers and writers of unused formats
+_LAZY_ATTRIBUTES = {
+    "ArrowDataReader": "pdpcli.data.data_readers",
+    "CachedDataReader": "pdpcli.data.data_readers",
+    "CsvDataReader": "pdpcli.data.data_readers",
+    "DataReader": "pdpcli.data.data_readers",
+    "FeatherDataReader": "pdpcli.data.data_readers",
+    "JsonDataReader": "pdpcli.data.data_readers",
+    "NpzDataReader": "pdpcli.data.data_readers",
+    "ParquetDataReader": "pdpcli.data.data_readers",
+    "PickleDataReader": "pdpcli.data.data_readers",
+    "ArrowDataWriter": "pdpcli.data.data_writers",
+    "CsvDataWriter": "pdpcli.data.data_writers",
+    "DataWriter": "pdpcli.data.data_writers",
+    "FeatherDataWriter": "pdpcli.data.data_writers",
+    "JsonDataWriter": "pdpcli.data.data_writers",
+    "NpzDataWriter": "pdpcli.data.data_writers",
+    "ParquetDataWriter": "pdpcli.data.data_writers",
+    "PickleDataWriter": "pdpcli.data.data_writers",
+    "BackgroundDataWriter": "pdpcli.data.prefetch",
+    "PrefetchDataReader": "pdpcli.data.prefetch",
+    "SampledDataReader": "pdpcli.data.sampling",
+    "DataSchema": "pdpcli.data.schema",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,285 @@
+"""
+Compression layer for text data readers and writers.
+
+Writers split data into blocks and compress them in parallel threads. Each
+block becomes an independent gzip member, bz2 stream or zstd frame, and
+concatenations of them are valid compressed files which standard tools can
+decompress. Readers decompress files in a background thread so that
+decompression overlaps with parsing.
+"""
+
+import bz2
+import collections
+import contextlib
+import gzip
+import io
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Any, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+import minato
+
+from pdpcli.exceptions import ConfigurationError
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
+
+EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".zst": "zstd"}
+COMPRESSIONS = tuple(EXTENSIONS.values())
+DEFAULT_LEVELS = {"gzip": 6, "bz2": 9, "zstd": 3}
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def with_compressions(extensions: List[str]) -> List[str]:
+    """Return given extensions and their compressed variants like `.csv.gz`."""
+    return extensions + [ext + suffix for ext in extensions for suffix in EXTENSIONS]
+
+
+def resolve_compression(
+    file_path: Union[str, Path],
+    compression: Any = "infer",
+) -> Optional[str]:
+    """
+    Return the compression handled by this module, or `None` if the file is
+    not compressed or the compression is left to pandas (e.g. zip or dict
+    options).
+    """
+    if compression == "infer":
+        return EXTENSIONS.get(Path(file_path).suffix)
+    if compression in COMPRESSIONS:
+        return str(compression)
+    return None
+
+
+def _check_compression(compression: str) -> None:
+    if compression not in COMPRESSIONS:
+        raise ConfigurationError(f"Unsupported compression: {compression}")
+    if compression == "zstd" and zstandard is None:
+        raise ConfigurationError("zstandard is required for zstd compression.")
+
+
+def compress(data: bytes, compression: str, level: Optional[int] = None) -> bytes:
+    level = DEFAULT_LEVELS[compression] if level is None else level
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if compression == "bz2":
+        return bz2.compress(data, compresslevel=level)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def _open_decompressed(
+    file_path: Union[str, Path], compression: str
+) -> io.BufferedIOBase:
+    if compression == "gzip":
+        return gzip.open(file_path, "rb")
+    if compression == "bz2":
+        return bz2.open(file_path, "rb")
+    # read_across_frames is required to read files written by multiple threads
+    fp = open(file_path, "rb")
+    return zstandard.ZstdDecompressor().stream_reader(  # type: ignore[return-value]
+        fp, read_across_frames=True, closefd=True
+    )
+
+
+class ParallelCompressionWriter(io.RawIOBase):
+    def __init__(
+        self,
+        fp: IO[bytes],
+        compression: str,
+        level: Optional[int] = None,
+        num_threads: Optional[int] = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> None:
+        _check_compression(compression)
+        self._fp = fp
+        self._compression = compression
+        self._level = level
+        self._block_size = block_size
+        self._buffer = bytearray()
+
+        num_threads = num_threads or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=num_threads)
+        # bound the number of blocks held in memory
+        self._max_pending = 2 * num_threads
+        self._pending: Deque["Future[bytes]"] = collections.deque()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        data = memoryview(data)
+        self._buffer += data
+        while len(self._buffer) >= self._block_size:
+            self._submit(bytes(self._buffer[: self._block_size]))
+            del self._buffer[: self._block_size]
+        return int(data.nbytes)
+
+    def _submit(self, block: bytes) -> None:
+        future = self._executor.submit(compress, block, self._compression, self._level)
+        self._pending.append(future)
+        while len(self._pending) > self._max_pending:
+            self._fp.write(self._pending.popleft().result())
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._buffer:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            # blocks are written in submission order
+            while self._pending:
+                self._fp.write(self._pending.popleft().result())
+        finally:
+            self._executor.shutdown()
+            super().close()
+
+
+class ThreadedDecompressionReader(io.RawIOBase):
+    _EOF = b""
+
+    def __init__(
+        self,
+        file_path: Union[str, Path],
+        compression: str,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        max_blocks: int = 4,
+    ) -> None:
+        _check_compression(compression)
+        self._fp = _open_decompressed(file_path, compression)
+        self._block_size = block_size
+        self._queue: "queue.Queue[Union[bytes, BaseException]]" = queue.Queue(
+            maxsize=max_blocks
+        )
+        self._stopped = threading.Event()
+        self._block = memoryview(b"")
+        self._eof = False
+        self._thread = threading.Thread(target=self._decompress, daemon=True)
+        self._thread.start()
+
+    def _put(self, item: Union[bytes, BaseException]) -> bool:
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decompress(self) -> None:
+        try:
+            while True:
+                block = self._fp.read(self._block_size)
+                if not self._put(block) or not block:
+                    break
+        except BaseException as error:  # pylint: disable=broad-except
+            self._put(error)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        if not self._block and not self._eof:
+            item = self._queue.get()
+            if isinstance(item, BaseException):
+                raise item
+            self._eof = item == self._EOF
+            self._block = memoryview(item)
+        size = min(len(buffer), len(self._block))
+        buffer[:size] = self._block[:size]
+        self._block = self._block[size:]
+        return size
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._fp.close()
+        super().close()
+
+
+@contextlib.contextmanager
+def open_file(
+    file_path: Union[str, Path],
+    mode: str = "r",
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+    num_threads: Optional[int] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    **kwargs: Any,
+) -> Iterator[IO[Any]]:
+    """
+    Open a file like `minato.open`, compressing or decompressing data with the
+    given compression. Other keyword arguments are passed to `io.TextIOWrapper`
+    in text mode.
+    """
+    if compression is None:
+        with minato.open(file_path, mode, **kwargs) as fp:
+            yield fp
+        return
+
+    stream: Union[io.BufferedReader, io.BufferedWriter]
+    text_options: Dict[str, Any] = {"encoding": "utf-8", "newline": "", **kwargs}
+    if "r" in mode:
+        raw = ThreadedDecompressionReader(
+            minato.cached_path(file_path), compression, block_size
+        )
+        stream = io.BufferedReader(raw, buffer_size=block_size)
+        with _wrap_stream(stream, mode, text_options) as fp:
+            yield fp
+    else:
+        with minato.open(file_path, "wb") as output_fp:
+            writer = ParallelCompressionWriter(
+                output_fp, compression, level, num_threads, block_size
+            )
+            stream = io.BufferedWriter(writer, buffer_size=block_size)
+            with _wrap_stream(stream, mode, text_options) as fp:
+                yield fp
+
+
+def _wrap_stream(stream: IO[bytes], mode: str, text_options: Dict[str, Any]) -> IO[Any]:
+    if "b" in mode:
+        return stream
+    return io.TextIOWrapper(stream, **text_options)
+
+
+@contextlib.contextmanager
+def open_for_read(
+    file_path: Union[str, Path],
+    kwargs: Dict[str, Any],
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """
+    Yield a source and keyword arguments for pandas readers. Compressed files
+    are given as decompressed streams, and others are given as they are.
+    """
+    compression = resolve_compression(file_path, kwargs.get("compression", "infer"))
+    if compression is None:
+        yield file_path, kwargs
+        return
+
+    kwargs = {key: value for key, value in kwargs.items() if key != "compression"}
+    with open_file(file_path, "rb", compression) as fp:
+        yield fp, kwargs
+
+
+@contextlib.contextmanager
+def open_for_write(
+    file_path: Union[str, Path],
+    kwargs: Dict[str, Any],
+    level: Optional[int] = None,
+    num_threads: Optional[int] = None,
+) -> Iterator[Tuple[IO[Any], Dict[str, Any]]]:
+    """Yield a text stream and keyword arguments for pandas writers."""
+    compression = resolve_compression(file_path, kwargs.get("compression", "infer"))
+    kwargs = {key: value for key, value in kwargs.items() if key != "compression"}
+    with open_file(
+        file_path, "w", compression, level=level, num_threads=num_threads
+    ) as fp:
+        yield fp, kwargs
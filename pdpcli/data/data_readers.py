@@ -1,28 +1,115 @@
 from __future__ import annotations
 
+import logging
 import os
 import warnings
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
 
 import minato
+import numpy
 import pandas
-from sqlalchemy import create_engine
 
 from pdpcli import util
+from pdpcli.cache import Cache, compute_key
+from pdpcli.columns import ColumnIntersection
+from pdpcli.data.compression import open_for_read, with_compressions
+from pdpcli.data.engines import get_engine
+from pdpcli.data.schema import DataSchema
 from pdpcli.exceptions import ConfigurationError
+from pdpcli.matrix import from_npz_arrays
 from pdpcli.registrable import RegistrableWithFile
 
+logger = logging.getLogger(__name__)
+
 
 class DataReader(RegistrableWithFile):
+    # whether results of this reader depend only on input files and options
+    cacheable = True
+
     def read(self, file_path: Union[str, Path]) -> pandas.DataFrame:
         raise NotImplementedError
 
+    def read_chunks(
+        self,
+        file_path: Union[str, Path],
+        chunksize: int,
+    ) -> Iterator[pandas.DataFrame]:
+        df = self.read(file_path)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start : start + chunksize]
+
+    def project(self, column_filter: Callable[[str], bool]) -> bool:
+        """
+        Restrict columns to read to those accepted by `column_filter`.
+        Return `False` if this reader does not support column projection.
+        """
+        return False
+
+    def apply_schema(self, schema: DataSchema) -> bool:
+        """
+        Use column types of the given schema instead of inferring them.
+        Return `False` if this reader does not support schemas.
+        """
+        return False
+
+
+class CachedDataReader(DataReader):
+    """
+    Wrap a data reader to cache parsed data frames on disk. Cache keys consist
+    of the fingerprint of the input file (path, size and modification time),
+    the reader type and its options, so modified files are parsed again.
+    """
+
+    def __init__(self, reader: DataReader, cache: Optional[Cache] = None) -> None:
+        self._reader = reader
+        self._cache = cache or Cache.by_name("data")
+
+    def _get_key(self, file_path: Union[str, Path]) -> str:
+        local_path = Path(minato.cached_path(file_path)).resolve()
+        stat = local_path.stat()
+        reader_type = f"{type(self._reader).__module__}.{type(self._reader).__name__}"
+        return compute_key(
+            [str(local_path), stat.st_size, stat.st_mtime_ns],
+            reader_type,
+            vars(self._reader),
+        )
+
+    def read(self, file_path: Union[str, Path]) -> pandas.DataFrame:
+        if not self._reader.cacheable:
+            return self._reader.read(file_path)
+
+        key = self._get_key(file_path)
+        df = self._cache.load(key)
+        if df is not None:
+            logger.info("Load cached data frame of: %s", str(file_path))
+            return df
+
+        df = self._reader.read(file_path)
+        self._cache.save(key, df)
+        return df
+
+    def read_chunks(
+        self,
+        file_path: Union[str, Path],
+        chunksize: int,
+    ) -> Iterator[pandas.DataFrame]:
+        # chunked reading is used to bound memory, and cached data frames can
+        # only be loaded as a whole, so caches are bypassed here
+        return self._reader.read_chunks(file_path, chunksize)
+
+    def project(self, column_filter: Callable[[str], bool]) -> bool:
+        return self._reader.project(column_filter)
 
-@DataReader.register("csv", extensions=[".csv"])
+    def apply_schema(self, schema: DataSchema) -> bool:
+        return self._reader.apply_schema(schema)
+
+
+@DataReader.register("csv", extensions=with_compressions([".csv"]))
 class CsvDataReader(DataReader):
     def __init__(self, **kwargs: Any) -> None:
         self._kwargs = util.filter_kwargs(pandas.read_csv, kwargs)
+        self._schema: Optional[DataSchema] = None
 
         given_args = set(kwargs)
         valid_args = set(self._kwargs)
@@ -31,18 +118,56 @@ class CsvDataReader(DataReader):
 
     def read(self, file_path: Union[str, Path]) -> pandas.DataFrame:
         file_path = minato.cached_path(file_path)
-        df = pandas.read_csv(file_path, **self._kwargs)
+        with open_for_read(file_path, self._kwargs) as (source, kwargs):
+            df = pandas.read_csv(source, **kwargs)
+        if self._schema is not None:
+            df = self._schema.conform(df)
         return df
 
+    def read_chunks(
+        self,
+        file_path: Union[str, Path],
+        chunksize: int,
+    ) -> Iterator[pandas.DataFrame]:
+        file_path = minato.cached_path(file_path)
+        with open_for_read(file_path, self._kwargs) as (source, kwargs):
+            with pandas.read_csv(source, chunksize=chunksize, **kwargs) as chunks:
+                for df in chunks:
+                    if self._schema is not None:
+                        df = self._schema.conform(df)
+                    yield df
+
+    def project(self, column_filter: Callable[[str], bool]) -> bool:
+        usecols = self._kwargs.get("usecols")
+        if usecols is None:
+            self._kwargs["usecols"] = column_filter
+        elif callable(usecols):
+            self._kwargs["usecols"] = ColumnIntersection([usecols, column_filter])
+        elif all(isinstance(column, str) for column in usecols):
+            self._kwargs["usecols"] = [c for c in usecols if column_filter(c)]
+        else:
+            # positional usecols cannot be combined with column names
+            return False
+        return True
 
-@DataReader.register("tsv", extensions=[".tsv"])
+    def apply_schema(self, schema: DataSchema) -> bool:
+        dtype = self._kwargs.get("dtype")
+        if dtype is not None and not isinstance(dtype, dict):
+            return False
+        # dtypes given explicitly to this reader take precedence
+        self._kwargs["dtype"] = {**schema.get_read_dtypes(), **(dtype or {})}
+        self._schema = schema
+        return True
+
+
+@DataReader.register("tsv", extensions=with_compressions([".tsv"]))
 class TsvDataReader(CsvDataReader):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         kwargs["sep"] = "\t"
         super().__init__(*args, **kwargs)
 
 
-@DataReader.register("json", extensions=[".json"])
+@DataReader.register("json", extensions=with_compressions([".json"]))
 class JsonDataReader(DataReader):
     def __init__(self, **kwargs: Any) -> None:
         self._kwargs = util.filter_kwargs(pandas.read_json, kwargs)
@@ -54,11 +179,27 @@ class JsonDataReader(DataReader):
 
     def read(self, file_path: Union[str, Path]) -> pandas.DataFrame:
         file_path = minato.cached_path(file_path)
-        df = pandas.read_json(file_path, **self._kwargs)
+        with open_for_read(file_path, self._kwargs) as (source, kwargs):
+            df = pandas.read_json(source, **kwargs)
         return df
 
+    def read_chunks(
+        self,
+        file_path: Union[str, Path],
+        chunksize: int,
+    ) -> Iterator[pandas.DataFrame]:
+        if not self._kwargs.get("lines"):
+            # pandas supports chunked reading only for line-delimited json
+            yield from super().read_chunks(file_path, chunksize)
+            return
+
+        file_path = minato.cached_path(file_path)
+        with open_for_read(file_path, self._kwargs) as (source, kwargs):
+            with pandas.read_json(source, chunksize=chunksize, **kwargs) as chunks:
+                yield from chunks
 
-@DataReader.register("jsonl", extensions=[".jsonl"])
+
+@DataReader.register("jsonl", extensions=with_compressions([".jsonl"]))
 class JsonLinesDataReader(JsonDataReader):
     def __init__(self, **kwargs: Any) -> None:
         kwargs["orient"] = "records"
@@ -82,16 +223,36 @@ class PickleDataReader(DataReader):
         return df
 
 
+@DataReader.register("npz", extensions=[".npz"])
+class NpzDataReader(DataReader):
+    """Read a data frame written by `NpzDataWriter`."""
+
+    def read(self, file_path: Union[str, Path]) -> pandas.DataFrame:
+        file_path = minato.cached_path(file_path)
+        # object columns are pickled as the pickle reader does
+        with numpy.load(file_path, allow_pickle=True) as arrays:
+            return from_npz_arrays(arrays)
+
+
 @DataReader.register("sql", extensions=[".sql"])
 class SqlDataReader(DataReader):
     DSN_KEY = "PDPCLI_SQL_DATA_READER_DSN"
+    cacheable = False
 
-    def __init__(self, dsn: Optional[str] = None, **kwargs: Any) -> None:
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        engine_options: Optional[Dict[str, Any]] = None,
+        stream_results: bool = True,
+        **kwargs: Any,
+    ) -> None:
         dsn = dsn or os.environ.get(self.DSN_KEY)
         if dsn is None:
             raise ConfigurationError("DSN not specifiled")
 
         self._dsn = dsn
+        self._engine_options = engine_options or {}
+        self._stream_results = stream_results
         self._kwargs = util.filter_kwargs(pandas.read_sql, kwargs)
 
         given_args = set(kwargs)
@@ -99,9 +260,180 @@ class SqlDataReader(DataReader):
         if set(given_args) != set(valid_args):
             warnings.warn("some arguments are ignored: " f"{given_args - valid_args}")
 
+        self._chunksize: Optional[int] = self._kwargs.pop("chunksize", None)
+
     def read(self, file_path: Union[str, Path]) -> pandas.DataFrame:
+        if self._chunksize:
+            # fetch rows through a server-side cursor instead of all at once
+            return pandas.concat(self.read_chunks(file_path, self._chunksize))
+
         with minato.open(file_path) as fp:
             query = fp.read()
-        engine = create_engine(self._dsn)
+        engine = get_engine(self._dsn, **self._engine_options)
         with engine.connect() as connection:
             return pandas.read_sql(query, connection, **self._kwargs)
+
+    def read_chunks(
+        self,
+        file_path: Union[str, Path],
+        chunksize: int,
+    ) -> Iterator[pandas.DataFrame]:
+        with minato.open(file_path) as fp:
+            query = fp.read()
+        engine = get_engine(self._dsn, **self._engine_options)
+        with engine.connect() as connection:
+            if self._stream_results:
+                connection = connection.execution_options(stream_results=True)
+            yield from pandas.read_sql(
+                query, connection, chunksize=chunksize, **self._kwargs
+            )
+
+
+@DataReader.register("parquet", extensions=[".parquet"])
+class ParquetDataReader(DataReader):
+    def __init__(
+        self,
+        columns: Optional[List[str]] = None,
+        filters: Optional[List[Any]] = None,
+        use_threads: bool = True,
+        memory_map: bool = False,
+    ) -> None:
+        util.import_pyarrow("read parquet files")
+
+        self._columns = columns
+        self._filters = filters
+        self._use_threads = use_threads
+        self._memory_map = memory_map
+        self._column_filter: Optional[Callable[[str], bool]] = None
+
+    def project(self, column_filter: Callable[[str], bool]) -> bool:
+        self._column_filter = column_filter
+        return True
+
+    def _get_columns(self, file_path: Union[str, Path]) -> Optional[List[str]]:
+        if self._column_filter is None:
+            return self._columns
+        pyarrow = util.import_pyarrow()
+        columns = self._columns or pyarrow.parquet.read_schema(file_path).names
+        return [column for column in columns if self._column_filter(column)]
+
+    def read(self, file_path: Union[str, Path]) -> pandas.DataFrame:
+        pyarrow = util.import_pyarrow()
+        file_path = minato.cached_path(file_path)
+        table = pyarrow.parquet.read_table(
+            file_path,
+            columns=self._get_columns(file_path),
+            filters=self._filters,
+            use_threads=self._use_threads,
+            memory_map=self._memory_map,
+        )
+        return table.to_pandas(use_threads=self._use_threads)
+
+    def read_chunks(
+        self,
+        file_path: Union[str, Path],
+        chunksize: int,
+    ) -> Iterator[pandas.DataFrame]:
+        pyarrow = util.import_pyarrow()
+        file_path = minato.cached_path(file_path)
+        dataset = pyarrow.dataset.dataset(file_path, format="parquet")
+        expression = (
+            None
+            if self._filters is None
+            else pyarrow.parquet.filters_to_expression(self._filters)
+        )
+        # row groups whose statistics do not satisfy the filters are skipped
+        for batch in dataset.to_batches(
+            columns=self._get_columns(file_path),
+            filter=expression,
+            batch_size=chunksize,
+            use_threads=self._use_threads,
+        ):
+            yield batch.to_pandas(use_threads=self._use_threads)
+
+
+@DataReader.register("arrow", extensions=[".arrow"])
+class ArrowDataReader(DataReader):
+    def __init__(
+        self,
+        columns: Optional[List[str]] = None,
+        use_threads: bool = True,
+        memory_map: bool = True,
+    ) -> None:
+        util.import_pyarrow("read arrow files")
+
+        self._columns = columns
+        self._use_threads = use_threads
+        self._memory_map = memory_map
+        self._column_filter: Optional[Callable[[str], bool]] = None
+
+    def project(self, column_filter: Callable[[str], bool]) -> bool:
+        self._column_filter = column_filter
+        return True
+
+    def _get_columns(self, file_path: Union[str, Path]) -> Optional[List[str]]:
+        if self._column_filter is None:
+            return self._columns
+        pyarrow = util.import_pyarrow()
+        with pyarrow.OSFile(str(file_path)) as source:
+            columns = self._columns or pyarrow.ipc.open_file(source).schema.names
+        return [column for column in columns if self._column_filter(column)]
+
+    def read(self, file_path: Union[str, Path]) -> pandas.DataFrame:
+        pyarrow = util.import_pyarrow()
+        file_path = minato.cached_path(file_path)
+        table = pyarrow.feather.read_table(
+            str(file_path),
+            columns=self._get_columns(file_path),
+            use_threads=self._use_threads,
+            memory_map=self._memory_map,
+        )
+        return table.to_pandas(use_threads=self._use_threads)
+
+    def read_chunks(
+        self,
+        file_path: Union[str, Path],
+        chunksize: int,
+    ) -> Iterator[pandas.DataFrame]:
+        pyarrow = util.import_pyarrow()
+        file_path = minato.cached_path(file_path)
+        columns = self._get_columns(file_path)
+        if self._memory_map:
+            source = pyarrow.memory_map(str(file_path))
+        else:
+            source = pyarrow.OSFile(str(file_path))
+
+        with source:
+            options = pyarrow.ipc.IpcReadOptions(use_threads=self._use_threads)
+            if columns is not None:
+                schema = pyarrow.ipc.open_file(source).schema
+                missing_columns = [
+                    column for column in columns if column not in schema.names
+                ]
+                if missing_columns:
+                    raise ConfigurationError(
+                        f"Columns not found in {file_path}: {missing_columns}"
+                    )
+                options = pyarrow.ipc.IpcReadOptions(
+                    use_threads=self._use_threads,
+                    included_fields=[
+                        schema.get_field_index(column) for column in columns
+                    ],
+                )
+
+            reader = pyarrow.ipc.open_file(source, options=options)
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index)
+                for offset in range(0, batch.num_rows, chunksize):
+                    df = batch.slice(offset, chunksize).to_pandas(
+                        use_threads=self._use_threads
+                    )
+                    # included fields are read in the order of the schema
+                    if columns is not None and list(df.columns) != columns:
+                        df = df[columns]
+                    yield df
+
+
+@DataReader.register("feather", extensions=[".feather"])
+class FeatherDataReader(ArrowDataReader):
+    pass
@@ -1,27 +1,70 @@
 from __future__ import annotations
 
+import csv
+import io
+import logging
 import os
+import time
 import warnings
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import minato
+import numpy
 import pandas
-from sqlalchemy import create_engine
 
 from pdpcli import util
+from pdpcli.data.compression import open_for_write, with_compressions
+from pdpcli.data.engines import get_engine
 from pdpcli.exceptions import ConfigurationError
+from pdpcli.matrix import expand_matrix_columns, to_npz_arrays
 from pdpcli.registrable import RegistrableWithFile
 
+if TYPE_CHECKING:
+    from pandas.io.sql import SQLTable
+    from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+InsertMethod = Callable[["SQLTable", "Connection", List[str], Iterable[Any]], Any]
+
 
 class DataWriter(RegistrableWithFile):
     def write(self, df: pandas.DataFrame, file_path: Union[str, Path]) -> None:
         raise NotImplementedError
 
+    def write_chunks(
+        self,
+        dfs: Iterable[pandas.DataFrame],
+        file_path: Union[str, Path],
+    ) -> None:
+        chunks = list(dfs)
+        if chunks:
+            self.write(pandas.concat(chunks), file_path)
+
 
-@DataWriter.register("csv", extensions=[".csv"])
+@DataWriter.register("csv", extensions=with_compressions([".csv"]))
 class CsvDataWriter(DataWriter):
-    def __init__(self, **kwargs: Any) -> None:
+    def __init__(
+        self,
+        compression_level: Optional[int] = None,
+        compression_threads: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._compression_level = compression_level
+        self._compression_threads = compression_threads
         self._kwargs = util.filter_kwargs(pandas.DataFrame.to_csv, kwargs)
 
         given_args = set(kwargs)
@@ -32,21 +75,49 @@ class CsvDataWriter(DataWriter):
         if "index" not in self._kwargs:
             self._kwargs["index"] = False
 
+    def _open(
+        self, file_path: Union[str, Path]
+    ) -> ContextManager[Tuple[IO[Any], Dict[str, Any]]]:
+        return open_for_write(
+            file_path,
+            self._kwargs,
+            level=self._compression_level,
+            num_threads=self._compression_threads,
+        )
+
     def write(self, df: pandas.DataFrame, file_path: Union[str, Path]) -> None:
-        with minato.open(file_path, "w") as fp:
-            df.to_csv(fp, **self._kwargs)
+        with self._open(file_path) as (fp, kwargs):
+            expand_matrix_columns(df).to_csv(fp, **kwargs)
+
+    def write_chunks(
+        self,
+        dfs: Iterable[pandas.DataFrame],
+        file_path: Union[str, Path],
+    ) -> None:
+        with self._open(file_path) as (fp, kwargs):
+            for df in dfs:
+                expand_matrix_columns(df).to_csv(fp, **kwargs)
+                # write the header only once at the top of the file
+                kwargs["header"] = False
 
 
-@DataWriter.register("tsv", extensions=[".tsv"])
+@DataWriter.register("tsv", extensions=with_compressions([".tsv"]))
 class TsvDataWriter(CsvDataWriter):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         kwargs["sep"] = "\t"
         super().__init__(*args, **kwargs)
 
 
-@DataWriter.register("json", extensions=[".json"])
+@DataWriter.register("json", extensions=with_compressions([".json"]))
 class JsonDataWriter(DataWriter):
-    def __init__(self, **kwargs: Any) -> None:
+    def __init__(
+        self,
+        compression_level: Optional[int] = None,
+        compression_threads: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._compression_level = compression_level
+        self._compression_threads = compression_threads
         self._kwargs = util.filter_kwargs(pandas.DataFrame.to_json, kwargs)
 
         given_args = set(kwargs)
@@ -54,12 +125,39 @@ class JsonDataWriter(DataWriter):
         if set(given_args) != set(valid_args):
             warnings.warn("some arguments are ignored: " f"{given_args - valid_args}")
 
+    def _open(
+        self, file_path: Union[str, Path]
+    ) -> ContextManager[Tuple[IO[Any], Dict[str, Any]]]:
+        return open_for_write(
+            file_path,
+            self._kwargs,
+            level=self._compression_level,
+            num_threads=self._compression_threads,
+        )
+
     def write(self, df: pandas.DataFrame, file_path: Union[str, Path]) -> None:
-        with minato.open(file_path, "w") as fp:
-            df.to_json(fp, **self._kwargs)
+        with self._open(file_path) as (fp, kwargs):
+            expand_matrix_columns(df).to_json(fp, **kwargs)
+
+    def write_chunks(
+        self,
+        dfs: Iterable[pandas.DataFrame],
+        file_path: Union[str, Path],
+    ) -> None:
+        if not self._kwargs.get("lines"):
+            # a json document cannot be appended, so concatenate all chunks
+            super().write_chunks(dfs, file_path)
+            return
 
+        with self._open(file_path) as (fp, kwargs):
+            for df in dfs:
+                text = expand_matrix_columns(df).to_json(**kwargs)
+                fp.write(text)
+                if text and not text.endswith("\n"):
+                    fp.write("\n")
 
-@DataWriter.register("jsonl", extensions=[".jsonl"])
+
+@DataWriter.register("jsonl", extensions=with_compressions([".jsonl"]))
 class JsonLinesDataWriter(JsonDataWriter):
     def __init__(self, **kwargs: Any) -> None:
         kwargs["orient"] = "records"
@@ -82,13 +180,66 @@ class PickleDataWriter(DataWriter):
             df.to_pickle(fp, **self._kwargs)
 
 
+@DataWriter.register("npz", extensions=[".npz"])
+class NpzDataWriter(DataWriter):
+    """
+    Write a data frame into a NumPy npz file. Matrix columns are stored as
+    they are, so sparse outputs of sklearn stages are not densified.
+    """
+
+    def __init__(self, compressed: bool = False) -> None:
+        self._compressed = compressed
+
+    def write(self, df: pandas.DataFrame, file_path: Union[str, Path]) -> None:
+        save = numpy.savez_compressed if self._compressed else numpy.savez
+        with minato.open(file_path, "wb") as fp:
+            save(fp, **to_npz_arrays(df))
+
+
+def insert_with_copy(
+    table: SQLTable,
+    conn: Connection,
+    keys: List[str],
+    data_iter: Iterable[Any],
+) -> int:
+    """Insert rows with PostgreSQL `COPY FROM STDIN` via an in-memory CSV buffer."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    num_rows = 0
+    for row in data_iter:
+        writer.writerow(row)
+        num_rows += 1
+    buffer.seek(0)
+
+    def quote(name: str) -> str:
+        return '"{}"'.format(name.replace('"', '""'))
+
+    table_name = quote(table.name)
+    if table.schema:
+        table_name = f"{quote(table.schema)}.{table_name}"
+    columns = ", ".join(quote(key) for key in keys)
+
+    dbapi_connection = conn.connection
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN WITH CSV", buffer)
+    return num_rows
+
+
 @DataWriter.register("sql")
 class SqlDataWriter(DataWriter):
     DSN_KEY = "PDPCLI_SQL_DATA_WRITER_DSN"
 
+    INSERT_METHODS: Dict[str, InsertMethod] = {
+        "copy": insert_with_copy,
+    }
+    BULK_INSERT_METHODS: Dict[str, Union[str, InsertMethod]] = {
+        "postgresql": insert_with_copy,
+    }
+
     def __init__(
         self,
         dsn: Optional[str] = None,
+        engine_options: Optional[Dict[str, Any]] = None,
         **kwargs: Any,
     ) -> None:
         dsn = dsn or os.environ.get(self.DSN_KEY)
@@ -96,6 +247,7 @@ class SqlDataWriter(DataWriter):
             raise ConfigurationError("DSN not specifiled")
 
         self._dsn = dsn
+        self._engine_options = engine_options or {}
         self._kwargs = util.filter_kwargs(pandas.DataFrame.to_sql, kwargs)
 
         given_args = set(kwargs)
@@ -103,8 +255,172 @@ class SqlDataWriter(DataWriter):
         if set(given_args) != set(valid_args):
             warnings.warn("some arguments are ignored: " f"{given_args - valid_args}")
 
+    def _get_insert_method(self, engine: Engine) -> Union[None, str, InsertMethod]:
+        method = self._kwargs.get("method")
+        if method == "bulk":
+            # use a dialect-specific bulk loader, or multi-row VALUES otherwise
+            return self.BULK_INSERT_METHODS.get(engine.dialect.name, "multi")
+        if isinstance(method, str) and method in self.INSERT_METHODS:
+            return self.INSERT_METHODS[method]
+        return method
+
     def write(self, df: pandas.DataFrame, file_path: Union[str, Path]) -> None:
+        self.write_chunks([df], file_path)
+
+    def write_chunks(
+        self,
+        dfs: Iterable[pandas.DataFrame],
+        file_path: Union[str, Path],
+    ) -> None:
         table_name = str(file_path)
-        engine = create_engine(self._dsn, echo=False)
+        engine = get_engine(self._dsn, **self._engine_options)
+        kwargs = dict(self._kwargs)
+        kwargs["method"] = self._get_insert_method(engine)
+
+        num_rows = 0
+        elapsed = 0.0
         with engine.begin() as connection:
-            df.to_sql(table_name, con=connection, **self._kwargs)
+            for df in dfs:
+                start = time.perf_counter()
+                expand_matrix_columns(df).to_sql(table_name, con=connection, **kwargs)
+                elapsed += time.perf_counter() - start
+                num_rows += len(df)
+                # following chunks are appended to the table created above
+                kwargs["if_exists"] = "append"
+
+        logger.info(
+            "Wrote %d rows into %s in %.3fs (%.1f rows/sec)",
+            num_rows,
+            table_name,
+            elapsed,
+            num_rows / elapsed if elapsed > 0 else float("inf"),
+        )
+
+
+@DataWriter.register("parquet", extensions=[".parquet"])
+class ParquetDataWriter(DataWriter):
+    def __init__(
+        self,
+        compression: Optional[str] = "snappy",
+        compression_level: Optional[int] = None,
+        row_group_size: Optional[int] = None,
+        use_dictionary: bool = True,
+        preserve_index: bool = False,
+    ) -> None:
+        util.import_pyarrow("write parquet files")
+
+        self._compression = compression
+        self._compression_level = compression_level
+        self._row_group_size = row_group_size
+        self._use_dictionary = use_dictionary
+        self._preserve_index = preserve_index
+
+    def write(self, df: pandas.DataFrame, file_path: Union[str, Path]) -> None:
+        self.write_chunks([df], file_path)
+
+    def write_chunks(
+        self,
+        dfs: Iterable[pandas.DataFrame],
+        file_path: Union[str, Path],
+    ) -> None:
+        pyarrow = util.import_pyarrow()
+        writer: Optional[Any] = None
+        schema: Optional[Any] = None
+        with minato.open(file_path, "wb") as fp:
+            try:
+                for df in dfs:
+                    table = pyarrow.Table.from_pandas(
+                        expand_matrix_columns(df),
+                        schema=schema,
+                        preserve_index=self._preserve_index,
+                    )
+                    if writer is None:
+                        # following chunks are converted with the same schema
+                        schema = table.schema
+                        writer = pyarrow.parquet.ParquetWriter(
+                            fp,
+                            schema,
+                            compression=self._compression,
+                            compression_level=self._compression_level,
+                            use_dictionary=self._use_dictionary,
+                        )
+                    writer.write_table(table, row_group_size=self._row_group_size)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+
+@DataWriter.register("arrow", extensions=[".arrow"])
+class ArrowDataWriter(DataWriter):
+    def __init__(
+        self,
+        compression: Optional[str] = None,
+        compression_level: Optional[int] = None,
+        chunksize: Optional[int] = None,
+        use_threads: bool = True,
+        preserve_index: bool = False,
+    ) -> None:
+        util.import_pyarrow("write arrow files")
+
+        self._compression = compression
+        self._compression_level = compression_level
+        self._chunksize = chunksize
+        self._use_threads = use_threads
+        self._preserve_index = preserve_index
+
+    def write(self, df: pandas.DataFrame, file_path: Union[str, Path]) -> None:
+        self.write_chunks([df], file_path)
+
+    def write_chunks(
+        self,
+        dfs: Iterable[pandas.DataFrame],
+        file_path: Union[str, Path],
+    ) -> None:
+        pyarrow = util.import_pyarrow()
+        codec = (
+            None
+            if self._compression is None
+            else pyarrow.Codec(self._compression, self._compression_level)
+        )
+        options = pyarrow.ipc.IpcWriteOptions(
+            compression=codec,
+            use_threads=self._use_threads,
+        )
+
+        writer: Optional[Any] = None
+        schema: Optional[Any] = None
+        with minato.open(file_path, "wb") as fp:
+            try:
+                for df in dfs:
+                    table = pyarrow.Table.from_pandas(
+                        expand_matrix_columns(df),
+                        schema=schema,
+                        preserve_index=self._preserve_index,
+                    )
+                    if writer is None:
+                        # following chunks are converted with the same schema
+                        schema = table.schema
+                        writer = pyarrow.ipc.new_file(fp, schema, options=options)
+                    writer.write_table(table, max_chunksize=self._chunksize)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+
+@DataWriter.register("feather", extensions=[".feather"])
+class FeatherDataWriter(ArrowDataWriter):
+    def __init__(
+        self,
+        compression: Optional[str] = "lz4",
+        compression_level: Optional[int] = None,
+        chunksize: Optional[int] = None,
+        use_threads: bool = True,
+        preserve_index: bool = False,
+    ) -> None:
+        super().__init__(
+            compression=compression,
+            compression_level=compression_level,
+            chunksize=chunksize,
+            use_threads=use_threads,
+            preserve_index=preserve_index,
+        )
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Tuple
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+_engines: Dict[Tuple[int, str, str], Engine] = {}
+_lock = threading.Lock()
+
+
+def get_engine(dsn: str, **kwargs: Any) -> Engine:
+    """
+    Return a process-wide engine for the given DSN and engine options so that
+    connection pools are reused across reads and writes. Engines are keyed by
+    process id because pooled connections must not be shared with forked
+    worker processes.
+    """
+    # sqlalchemy is imported on use since it takes long to import
+    from sqlalchemy import create_engine
+
+    key = (os.getpid(), dsn, json.dumps(kwargs, sort_keys=True, default=str))
+    with _lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = create_engine(dsn, **kwargs)
+            _engines[key] = engine
+    return engine
+
+
+def dispose_engines() -> None:
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
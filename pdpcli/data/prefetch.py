@@ -0,0 +1,162 @@
+"""
+Readers and writers which overlap I/O with applying pipelines. Chunks are read
+ahead in a background thread and results are written in another one while
+the calling thread applies pipelines. Threads communicate through bounded
+queues, so a slow stage blocks the others instead of buffering unbounded
+data, and chunks keep their order.
+"""
+
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, TypeVar, Union
+
+import pandas
+
+from pdpcli.data.data_readers import DataReader
+from pdpcli.data.data_writers import DataWriter
+from pdpcli.data.schema import DataSchema
+from pdpcli.exceptions import ConfigurationError
+
+T = TypeVar("T")
+
+_END = object()
+
+
+def _put(items: "queue.Queue[Any]", item: Any, stopped: threading.Event) -> bool:
+    while not stopped.is_set():
+        try:
+            items.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _drain(items: "queue.Queue[Any]") -> Iterator[Any]:
+    while True:
+        item = items.get()
+        if item is _END:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def prefetch(iterable: Iterable[T], max_items: int) -> Iterator[T]:
+    """
+    Iterate `iterable` in a background thread which runs at most `max_items`
+    items ahead of the caller.
+    """
+    items: "queue.Queue[Any]" = queue.Queue(maxsize=max_items)
+    stopped = threading.Event()
+
+    def produce() -> None:
+        # iterators such as those holding database connections are used only
+        # in this thread, including closing them
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not _put(items, item, stopped):
+                    return
+            _put(items, _END, stopped)
+        except BaseException as error:  # pylint: disable=broad-except
+            _put(items, error, stopped)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        yield from _drain(items)
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def _check_max_chunks(max_chunks: int) -> None:
+    if max_chunks <= 0:
+        raise ConfigurationError("max_chunks must be a positive integer.")
+
+
+class PrefetchDataReader(DataReader):
+    """
+    Wrap a data reader to read at most `max_chunks` chunks ahead in a
+    background thread.
+    """
+
+    def __init__(self, reader: DataReader, max_chunks: int = 2) -> None:
+        _check_max_chunks(max_chunks)
+        self._reader = reader
+        self._max_chunks = max_chunks
+        self.cacheable = reader.cacheable
+
+    def read(self, file_path: Union[str, Path]) -> pandas.DataFrame:
+        return self._reader.read(file_path)
+
+    def read_chunks(
+        self,
+        file_path: Union[str, Path],
+        chunksize: int,
+    ) -> Iterator[pandas.DataFrame]:
+        return prefetch(
+            self._reader.read_chunks(file_path, chunksize), self._max_chunks
+        )
+
+    def project(self, column_filter: Callable[[str], bool]) -> bool:
+        return self._reader.project(column_filter)
+
+    def apply_schema(self, schema: DataSchema) -> bool:
+        return self._reader.apply_schema(schema)
+
+
+class BackgroundDataWriter(DataWriter):
+    """
+    Wrap a data writer to write chunks in a background thread, buffering at
+    most `max_chunks` chunks which are not written yet.
+    """
+
+    def __init__(self, writer: DataWriter, max_chunks: int = 2) -> None:
+        _check_max_chunks(max_chunks)
+        self._writer = writer
+        self._max_chunks = max_chunks
+
+    def write(self, df: pandas.DataFrame, file_path: Union[str, Path]) -> None:
+        self._writer.write(df, file_path)
+
+    def write_chunks(
+        self,
+        dfs: Iterable[pandas.DataFrame],
+        file_path: Union[str, Path],
+    ) -> None:
+        items: "queue.Queue[Any]" = queue.Queue(maxsize=self._max_chunks)
+        stopped = threading.Event()
+        errors: List[BaseException] = []
+
+        def consume() -> None:
+            try:
+                self._writer.write_chunks(_drain(items), file_path)
+            except BaseException as error:  # pylint: disable=broad-except
+                errors.append(error)
+            finally:
+                # stop producing chunks which will never be written
+                stopped.set()
+
+        thread = threading.Thread(target=consume, daemon=True)
+        thread.start()
+        try:
+            for df in dfs:
+                if not _put(items, df, stopped):
+                    break
+            else:
+                _put(items, _END, stopped)
+        except BaseException as error:
+            # writers see the error as if it is raised from their inputs
+            _put(items, error, stopped)
+            thread.join()
+            raise
+        thread.join()
+        if errors:
+            raise errors[0]
@@ -0,0 +1,133 @@
+"""
+Single-pass sampling of rows while streaming chunks from data readers. Only
+sampled rows are kept in memory, so samples of files larger than memory can
+be read.
+"""
+
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Union
+
+import numpy
+import pandas
+
+from pdpcli.data.data_readers import DataReader
+from pdpcli.data.schema import DataSchema
+from pdpcli.exceptions import ConfigurationError
+
+
+def _concat(frames: List[pandas.DataFrame]) -> pandas.DataFrame:
+    if len(frames) == 1:
+        return frames[0]
+    return pandas.concat(frames)
+
+
+def bernoulli_sample(
+    chunks: Iterable[pandas.DataFrame],
+    frac: float,
+    seed: Optional[int] = None,
+) -> pandas.DataFrame:
+    """Keep each row independently with probability `frac`."""
+    rng = numpy.random.default_rng(seed)
+    samples: List[pandas.DataFrame] = []
+    for chunk in chunks:
+        mask = rng.random(len(chunk)) < frac
+        # the first chunk is always kept to keep columns of empty samples
+        if not samples or mask.any():
+            samples.append(chunk.iloc[mask.nonzero()[0]])
+    if not samples:
+        return pandas.DataFrame()
+    return _concat(samples)
+
+
+def reservoir_sample(
+    chunks: Iterable[pandas.DataFrame],
+    rows: int,
+    seed: Optional[int] = None,
+) -> pandas.DataFrame:
+    """
+    Take `rows` rows uniformly at random by reservoir sampling. Sampled rows
+    are returned in their original order.
+    """
+    rng = numpy.random.default_rng(seed)
+    reservoir: Optional[pandas.DataFrame] = None
+    positions = numpy.empty(0, dtype=numpy.int64)
+    num_seen = 0
+    for chunk in chunks:
+        chunk_positions = numpy.arange(num_seen, num_seen + len(chunk))
+        num_seen += len(chunk)
+        if reservoir is None:
+            reservoir = chunk.iloc[:0]
+
+        # the first rows fill the reservoir
+        num_fill = max(0, min(len(chunk), rows - len(positions)))
+        if num_fill > 0:
+            fill = chunk.iloc[:num_fill]
+            reservoir = fill if len(reservoir) == 0 else _concat([reservoir, fill])
+            positions = numpy.concatenate([positions, chunk_positions[:num_fill]])
+        if num_fill == len(chunk):
+            continue
+
+        # the i-th row (0-based) of the rest replaces a random slot with
+        # probability rows / (i + 1), and a slot replaced several times in a
+        # chunk keeps the last row
+        slots = numpy.floor(
+            rng.random(len(chunk) - num_fill) * (chunk_positions[num_fill:] + 1)
+        ).astype(numpy.int64)
+        accepted = (slots < rows).nonzero()[0]
+        if len(accepted) == 0:
+            continue
+        replaced, last = numpy.unique(slots[accepted][::-1], return_index=True)
+        replacing = num_fill + accepted[::-1][last]
+
+        kept = numpy.setdiff1d(numpy.arange(len(positions)), replaced)
+        reservoir = _concat([reservoir.iloc[kept], chunk.iloc[replacing]])
+        positions = numpy.concatenate([positions[kept], chunk_positions[replacing]])
+
+    if reservoir is None:
+        return pandas.DataFrame()
+    return reservoir.iloc[numpy.argsort(positions, kind="stable")]
+
+
+class SampledDataReader(DataReader):
+    """
+    Wrap a data reader to read a sample of rows instead of all rows. At most
+    `rows` rows are sampled by reservoir sampling, or each row is sampled
+    with probability `frac`. Input data are streamed by chunks of `chunksize`
+    rows.
+    """
+
+    def __init__(
+        self,
+        reader: DataReader,
+        rows: Optional[int] = None,
+        frac: Optional[float] = None,
+        seed: Optional[int] = None,
+        chunksize: int = 100000,
+    ) -> None:
+        if (rows is None) == (frac is None):
+            raise ConfigurationError("Either rows or frac must be given.")
+        if rows is not None and rows <= 0:
+            raise ConfigurationError("rows must be a positive integer.")
+        if frac is not None and not 0.0 < frac <= 1.0:
+            raise ConfigurationError("frac must be in (0, 1].")
+        if chunksize <= 0:
+            raise ConfigurationError("chunksize must be a positive integer.")
+
+        self._reader = reader
+        self._rows = rows
+        self._frac = frac
+        self._seed = seed
+        self._chunksize = chunksize
+
+    def read(self, file_path: Union[str, Path]) -> pandas.DataFrame:
+        chunks = self._reader.read_chunks(file_path, self._chunksize)
+        if self._rows is not None:
+            return reservoir_sample(chunks, self._rows, self._seed)
+        assert self._frac is not None
+        return bernoulli_sample(chunks, self._frac, self._seed)
+
+    def project(self, column_filter: Callable[[str], bool]) -> bool:
+        return self._reader.project(column_filter)
+
+    def apply_schema(self, schema: DataSchema) -> bool:
+        return self._reader.apply_schema(schema)
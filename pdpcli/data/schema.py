@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import minato
+import pandas
+from pandas.api.types import (
+    is_datetime64_any_dtype,
+    is_float_dtype,
+    is_object_dtype,
+    is_string_dtype,
+)
+
+_COMMON_DATETIME_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y/%m/%d",
+    "%Y/%m/%d %H:%M:%S",
+]
+
+try:
+    # public since pandas 2.0
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:
+
+    def guess_datetime_format(dt_str: str, dayfirst: bool = False) -> Optional[str]:
+        for datetime_format in _COMMON_DATETIME_FORMATS:
+            try:
+                datetime.strptime(dt_str, datetime_format)
+            except ValueError:
+                continue
+            return datetime_format
+        return None
+
+
+class DataSchema:
+    """
+    Column types of input data recorded at build time. Data readers use this
+    schema to give explicit dtypes to parsers instead of inferring them.
+
+    Low-cardinality string columns are converted into categoricals only if
+    `infer_categories` is enabled because some pdpipe stages such as
+    `OneHotEncode` do not accept categorical columns.
+    """
+
+    SIDECAR_SUFFIX = ".schema.json"
+
+    def __init__(
+        self,
+        dtypes: Dict[str, str],
+        categories: Optional[Dict[str, List[Any]]] = None,
+        datetime_formats: Optional[Dict[str, Optional[str]]] = None,
+    ) -> None:
+        self.dtypes = dtypes
+        self.categories = categories or {}
+        self.datetime_formats = datetime_formats or {}
+
+    def __repr__(self) -> str:
+        return f"DataSchema({self.to_dict()})"
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: pandas.DataFrame,
+        infer_categories: bool = False,
+        max_categories: int = 1000,
+        max_category_ratio: float = 0.5,
+        sample_size: int = 100,
+    ) -> DataSchema:
+        dtypes: Dict[str, str] = {}
+        categories: Dict[str, List[Any]] = {}
+        datetime_formats: Dict[str, Optional[str]] = {}
+        for column, series in df.items():
+            column = str(column)
+            dtypes[column] = str(series.dtype)
+
+            if is_datetime64_any_dtype(series.dtype):
+                datetime_formats[column] = None
+            elif isinstance(series.dtype, pandas.CategoricalDtype):
+                categories[column] = series.cat.categories.tolist()
+            elif is_object_dtype(series.dtype):
+                values = series.dropna()
+                datetime_format = cls._infer_datetime_format(values, sample_size)
+                if datetime_format is not None:
+                    datetime_formats[column] = datetime_format
+                    continue
+
+                if not infer_categories:
+                    continue
+
+                num_unique = values.nunique()
+                if (
+                    num_unique <= max_categories
+                    and num_unique <= max_category_ratio * len(series)
+                    and all(isinstance(value, str) for value in values.unique())
+                ):
+                    categories[column] = sorted(values.unique().tolist())
+
+        return cls(dtypes, categories, datetime_formats)
+
+    @staticmethod
+    def _infer_datetime_format(
+        values: pandas.Series,
+        sample_size: int,
+    ) -> Optional[str]:
+        sample = values.head(sample_size)
+        if sample.empty or not all(isinstance(value, str) for value in sample):
+            return None
+        datetime_format = guess_datetime_format(sample.iloc[0])
+        if datetime_format is None:
+            return None
+        # the whole column is checked so that conform does not fail on values
+        # which were not sampled
+        if not all(isinstance(value, str) for value in values):
+            return None
+        try:
+            pandas.to_datetime(values, format=datetime_format)
+        except (ValueError, TypeError):
+            return None
+        return str(datetime_format)
+
+    def get_read_dtypes(self) -> Dict[str, Any]:
+        """
+        Return dtypes given to parsers. Integer and boolean columns are left to
+        type inference since they cannot hold missing values, and datetime
+        columns are converted by `conform` with recorded formats.
+        """
+        read_dtypes: Dict[str, Any] = {}
+        for column, dtype in self.dtypes.items():
+            if column in self.categories:
+                read_dtypes[column] = "category"
+            elif column in self.datetime_formats:
+                continue
+            elif is_float_dtype(dtype) or is_string_dtype(dtype):
+                read_dtypes[column] = dtype
+        return read_dtypes
+
+    def conform(self, df: pandas.DataFrame) -> pandas.DataFrame:
+        """Convert categorical and datetime columns of the given data frame."""
+        for column, levels in self.categories.items():
+            if column not in df.columns:
+                continue
+            series = df[column]
+            if not isinstance(series.dtype, pandas.CategoricalDtype):
+                series = series.astype("category")
+            # keep recorded levels first so that category codes are stable
+            known = set(levels)
+            unseen = [c for c in series.cat.categories if c not in known]
+            df[column] = series.cat.set_categories(levels + unseen)
+
+        for column, datetime_format in self.datetime_formats.items():
+            if column not in df.columns or is_datetime64_any_dtype(df[column].dtype):
+                continue
+            df[column] = pandas.to_datetime(df[column], format=datetime_format)
+
+        return df
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "dtypes": self.dtypes,
+            "categories": self.categories,
+            "datetime_formats": self.datetime_formats,
+        }
+
+    @classmethod
+    def from_dict(cls, params: Dict[str, Any]) -> DataSchema:
+        return cls(
+            dtypes=params["dtypes"],
+            categories=params.get("categories"),
+            datetime_formats=params.get("datetime_formats"),
+        )
+
+    def save(self, file_path: Union[str, Path]) -> None:
+        with minato.open(file_path, "w") as fp:
+            json.dump(self.to_dict(), fp, ensure_ascii=False, default=str)
+
+    @classmethod
+    def load(cls, file_path: Union[str, Path]) -> DataSchema:
+        with minato.open(file_path, "r") as fp:
+            return cls.from_dict(json.load(fp))
+
+    @classmethod
+    def get_sidecar_path(cls, pipeline_path: Union[str, Path]) -> str:
+        return f"{pipeline_path}{cls.SIDECAR_SUFFIX}"
+
+    @classmethod
+    def find_sidecar(cls, pipeline_path: Union[str, Path]) -> Optional[str]:
+        """Return the local path of the schema saved with a pipeline if exists."""
+        try:
+            return str(minato.cached_path(cls.get_sidecar_path(pipeline_path)))
+        except OSError:
+            return None
@@ -0,0 +1,302 @@
+"""
+A pandas extension type which stores a 2-D matrix in a single column. Each
+element of the column is a row of the matrix. Sparse matrices are kept as one
+CSR block, so wide outputs of vectorizers do not need a column per feature.
+"""
+
+from __future__ import annotations
+
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
+
+import numpy
+import pandas
+from pandas.api.extensions import (
+    ExtensionArray,
+    ExtensionDtype,
+    register_extension_dtype,
+)
+from scipy import sparse
+
+Matrix = Union["numpy.ndarray[Any, Any]", sparse.csr_matrix]
+
+
+@register_extension_dtype
+class MatrixDtype(ExtensionDtype):  # type: ignore
+    name = "matrix"
+    type = object
+    kind = "O"
+    na_value = None
+
+    @classmethod
+    def construct_array_type(cls) -> Type[MatrixArray]:
+        return MatrixArray
+
+
+class MatrixArray(ExtensionArray):  # type: ignore
+    """
+    Extension array backed by a dense `numpy.ndarray` or a `scipy.sparse`
+    CSR matrix. Rows filled by reindexing are zeros since matrices have no
+    missing values.
+    """
+
+    def __init__(self, matrix: Any) -> None:
+        if sparse.issparse(matrix):
+            matrix = sparse.csr_matrix(matrix)
+        else:
+            matrix = numpy.asarray(matrix)
+            if matrix.ndim == 1:
+                matrix = matrix.reshape(-1, 1)
+        if matrix.ndim != 2:
+            raise ValueError("MatrixArray requires a 2-D matrix.")
+        self._matrix: Matrix = matrix
+
+    @property
+    def matrix(self) -> Matrix:
+        return self._matrix
+
+    @property
+    def width(self) -> int:
+        return int(self._matrix.shape[1])
+
+    @property
+    def is_sparse(self) -> bool:
+        return bool(sparse.issparse(self._matrix))
+
+    @classmethod
+    def _from_sequence(
+        cls,
+        scalars: Sequence[Any],
+        dtype: Optional[Any] = None,
+        copy: bool = False,
+    ) -> MatrixArray:
+        rows = list(scalars)
+        if rows and all(sparse.issparse(row) for row in rows):
+            return cls(sparse.vstack(rows, format="csr"))
+        return cls(numpy.vstack([numpy.asarray(row).ravel() for row in rows]))
+
+    @classmethod
+    def _from_factorized(cls, values: Any, original: MatrixArray) -> MatrixArray:
+        dtype = original.matrix.dtype
+        if not original.is_sparse:
+            matrix = numpy.array([list(row) for row in values], dtype=dtype)
+            return cls(matrix.reshape(len(values), original.width))
+
+        indptr = [0]
+        indices: List[int] = []
+        data: List[Any] = []
+        for row_indices, row_data in values:
+            indices.extend(row_indices)
+            data.extend(row_data)
+            indptr.append(len(indices))
+        return cls(
+            sparse.csr_matrix(
+                (numpy.array(data, dtype=dtype), indices, indptr),
+                shape=(len(values), original.width),
+            )
+        )
+
+    def _values_for_factorize(self) -> Tuple["numpy.ndarray[Any, Any]", Any]:
+        """
+        Return rows as hashable tuples, or tuples of indices and values of
+        nonzero elements for sparse matrices.
+        """
+        values = numpy.empty(len(self), dtype=object)
+        if self.is_sparse:
+            matrix: Any = self._matrix.copy()
+            matrix.eliminate_zeros()
+            matrix.sort_indices()
+            for i in range(len(self)):
+                start, stop = matrix.indptr[i], matrix.indptr[i + 1]
+                values[i] = (
+                    tuple(matrix.indices[start:stop]),
+                    tuple(matrix.data[start:stop]),
+                )
+        else:
+            for i, row in enumerate(self._matrix):
+                values[i] = tuple(row)
+        return values, None
+
+    @classmethod
+    def _concat_same_type(cls, to_concat: Sequence[MatrixArray]) -> MatrixArray:
+        matrices = [array.matrix for array in to_concat]
+        if any(sparse.issparse(matrix) for matrix in matrices):
+            return cls(sparse.vstack(matrices, format="csr"))
+        return cls(numpy.vstack(matrices))
+
+    @property
+    def dtype(self) -> MatrixDtype:
+        return MatrixDtype()
+
+    @property
+    def nbytes(self) -> int:
+        if self.is_sparse:
+            matrix: Any = self._matrix
+            return int(
+                matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+            )
+        return int(self._matrix.nbytes)
+
+    def __len__(self) -> int:
+        return int(self._matrix.shape[0])
+
+    def __getitem__(self, item: Any) -> Any:
+        if pandas.api.types.is_integer(item):
+            return self._matrix[item]
+        item = pandas.api.indexers.check_array_indexer(self, item)
+        return type(self)(self._matrix[item])
+
+    def __array__(self, dtype: Optional[Any] = None) -> "numpy.ndarray[Any, Any]":
+        values = numpy.empty(len(self), dtype=object)
+        for i in range(len(self)):
+            values[i] = self[i]
+        return values
+
+    def isna(self) -> "numpy.ndarray[Any, Any]":
+        return numpy.zeros(len(self), dtype=bool)
+
+    def take(
+        self,
+        indices: Sequence[int],
+        allow_fill: bool = False,
+        fill_value: Optional[Any] = None,
+    ) -> MatrixArray:
+        positions = numpy.asarray(indices, dtype=numpy.intp)
+        if not allow_fill:
+            return type(self)(self._matrix[positions])
+
+        missing = positions == -1
+        matrix = self._matrix[numpy.where(missing, 0, positions)]
+        if missing.any():
+            if sparse.issparse(matrix):
+                matrix = sparse.diags((~missing).astype(matrix.dtype)) @ matrix
+            else:
+                matrix = matrix.copy()
+                matrix[missing] = 0
+        return type(self)(matrix)
+
+    def _values_for_argsort(self) -> "numpy.ndarray[Any, Any]":
+        # rows of dense matrices are sorted lexicographically, and those of
+        # sparse matrices in a stable but arbitrary order
+        return self._values_for_factorize()[0]
+
+    def unique(self) -> MatrixArray:
+        _, uniques = self.factorize()
+        return cast(MatrixArray, uniques)
+
+    def duplicated(self, keep: Any = "first") -> "numpy.ndarray[Any, Any]":
+        codes, _ = self.factorize()
+        duplicated: "numpy.ndarray[Any, Any]" = (
+            pandas.Series(codes).duplicated(keep=keep).to_numpy()
+        )
+        return duplicated
+
+    def copy(self) -> MatrixArray:
+        return type(self)(self._matrix.copy())
+
+    def _formatter(self, boxed: bool = False) -> Any:
+        return lambda row: f"<{type(row).__name__} of width {self.width}>"
+
+
+def get_matrix(X: Any) -> Any:
+    """
+    Return the matrix of the given feature column if it is a matrix column,
+    otherwise return the input as it is.
+    """
+    if isinstance(X, pandas.DataFrame) and len(X.columns) == 1:
+        series = X.iloc[:, 0]
+    else:
+        series = X
+    if isinstance(series, pandas.Series) and isinstance(series.dtype, MatrixDtype):
+        return series.array.matrix
+    return X
+
+
+def expand_matrix_columns(df: pandas.DataFrame) -> pandas.DataFrame:
+    """
+    Replace matrix columns with a dense column per feature named
+    `{column}_{i}` as the "columns" output format of sklearn stages. This is
+    for writers which have no representation of matrices, so write npz or
+    pickle files to keep sparse matrices as they are.
+    """
+    if not any(isinstance(dtype, MatrixDtype) for dtype in df.dtypes):
+        return df
+
+    frames = []
+    for position in range(len(df.columns)):
+        series = df.iloc[:, position]
+        if not isinstance(series.dtype, MatrixDtype):
+            frames.append(series.to_frame())
+            continue
+        array = series.array
+        matrix = array.matrix.toarray() if array.is_sparse else array.matrix
+        frames.append(
+            pandas.DataFrame(
+                matrix,
+                index=df.index,
+                columns=[f"{series.name}_{i}" for i in range(array.width)],
+                copy=False,
+            )
+        )
+    return pandas.concat(frames, axis=1, copy=False)
+
+
+def to_npz_arrays(df: pandas.DataFrame) -> Dict[str, Any]:
+    """
+    Convert a data frame into arrays saved by `numpy.savez`. Matrix columns are
+    stored as their dense arrays or CSR components.
+    """
+    arrays: Dict[str, Any] = {
+        "columns": numpy.array(list(df.columns), dtype=object),
+        "dtypes": numpy.array([str(dtype) for dtype in df.dtypes]),
+    }
+    for position in range(len(df.columns)):
+        key = f"column_{position}"
+        series = df.iloc[:, position]
+        if not isinstance(series.dtype, MatrixDtype):
+            arrays[key] = series.to_numpy()
+        elif series.array.is_sparse:
+            matrix = series.array.matrix
+            arrays[f"{key}_data"] = matrix.data
+            arrays[f"{key}_indices"] = matrix.indices
+            arrays[f"{key}_indptr"] = matrix.indptr
+            arrays[f"{key}_shape"] = numpy.array(matrix.shape)
+        else:
+            arrays[key] = series.array.matrix
+    return arrays
+
+
+def from_npz_arrays(arrays: Mapping[str, Any]) -> pandas.DataFrame:
+    """Restore a data frame from arrays created by `to_npz_arrays`."""
+    columns = list(arrays["columns"])
+    values = []
+    for position, dtype in enumerate(arrays["dtypes"]):
+        key = f"column_{position}"
+        if dtype == MatrixDtype.name:
+            if f"{key}_data" in arrays:
+                matrix = sparse.csr_matrix(
+                    (
+                        arrays[f"{key}_data"],
+                        arrays[f"{key}_indices"],
+                        arrays[f"{key}_indptr"],
+                    ),
+                    shape=tuple(arrays[f"{key}_shape"]),
+                )
+            else:
+                matrix = arrays[key]
+            values.append(pandas.Series(MatrixArray(matrix)))
+        else:
+            values.append(pandas.Series(arrays[key]).astype(dtype))
+    df = pandas.concat(values, axis=1, copy=False) if values else pandas.DataFrame()
+    df.columns = columns
+    return df
@@ -0,0 +1,426 @@
+"""
+Profiling of pipeline stages, data readers and data writers. `Profiler`
+records wall time, CPU time, memory usage and the shape of input and output
+data frames of each event, and reports them as a table, a JSON file or a
+Chrome trace-event file which can be opened by `chrome://tracing` or
+Perfetto.
+
+CPU time is measured for the whole process, and memory peaks of stages
+applied concurrently by parallel pipelines are not separated.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+import minato
+import pandas
+import pdpipe
+
+from pdpcli.cache import format_size
+from pdpcli.data import DataReader, DataSchema, DataWriter
+from pdpcli.stages.executor import ApplyFunction, StageHook
+from pdpcli.util import get_peak_memory_usage
+
+logger = logging.getLogger(__name__)
+
+
+class DataStats(NamedTuple):
+    rows: int
+    columns: int
+    bytes: int
+
+    @classmethod
+    def from_dataframe(cls, df: pandas.DataFrame) -> "DataStats":
+        # deep memory usage is too slow to compute for every stage
+        return cls(len(df), len(df.columns), int(df.memory_usage(deep=False).sum()))
+
+
+class ProfileEvent(NamedTuple):
+    name: str
+    category: str
+    # seconds since the profiler was created
+    start: float
+    wall_time: float
+    cpu_time: float
+    thread_id: int
+    # increase of traced memory at the peak of the event
+    memory_peak: Optional[int]
+    # increase of the peak resident set size of the process
+    rss_peak_delta: Optional[int]
+    input: Optional[DataStats]
+    output: Optional[DataStats]
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = self._asdict()
+        for key in ("input", "output"):
+            stats = getattr(self, key)
+            result[key] = stats._asdict() if stats is not None else None
+        return result
+
+
+class _Span:
+    def __init__(self, name: str, category: str, df: Optional[pandas.DataFrame]):
+        self.name = name
+        self.category = category
+        self.input = DataStats.from_dataframe(df) if df is not None else None
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.start_rss = get_peak_memory_usage()
+        self.start_memory: Optional[int] = None
+        if tracemalloc.is_tracing() and hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+            self.start_memory = tracemalloc.get_traced_memory()[0]
+
+
+class Profiler(StageHook):
+    """
+    Stage hook to profile each stage of pipelines. Data readers and writers
+    are profiled by wrapping them with `wrap_reader` / `wrap_writer`. If
+    `trace_memory` is true, allocations are traced by `tracemalloc` while the
+    profiler is active, which slows down the execution.
+    """
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        self._trace_memory = trace_memory
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stage_names: Dict[int, str] = {}
+        self._started_tracing = False
+        self.events: List[ProfileEvent] = []
+
+    def __enter__(self) -> "Profiler":
+        if self._trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def begin(
+        self,
+        name: str,
+        category: str,
+        df: Optional[pandas.DataFrame] = None,
+    ) -> _Span:
+        return _Span(name, category, df)
+
+    def end(self, span: _Span, df: Optional[pandas.DataFrame] = None) -> None:
+        wall_time = time.perf_counter() - span.start_wall
+        cpu_time = time.process_time() - span.start_cpu
+
+        memory_peak = None
+        if span.start_memory is not None and tracemalloc.is_tracing():
+            memory_peak = max(tracemalloc.get_traced_memory()[1] - span.start_memory, 0)
+        rss_peak_delta = None
+        end_rss = get_peak_memory_usage()
+        if span.start_rss is not None and end_rss is not None:
+            rss_peak_delta = end_rss - span.start_rss
+
+        event = ProfileEvent(
+            name=span.name,
+            category=span.category,
+            start=span.start_wall - self._origin,
+            wall_time=wall_time,
+            cpu_time=cpu_time,
+            thread_id=threading.get_ident(),
+            memory_peak=memory_peak,
+            rss_peak_delta=rss_peak_delta,
+            input=span.input,
+            output=DataStats.from_dataframe(df) if df is not None else None,
+        )
+        with self._lock:
+            self.events.append(event)
+
+    def iterate(
+        self,
+        dfs: Iterable[pandas.DataFrame],
+        name: str,
+        category: str,
+    ) -> Iterator[pandas.DataFrame]:
+        """Profile the production of each data frame of the given iterable."""
+        iterator = iter(dfs)
+        while True:
+            span = self.begin(name, category)
+            try:
+                df = next(iterator)
+            except StopIteration:
+                return
+            self.end(span, df)
+            yield df
+
+    def start(
+        self, pipeline: pdpipe.PdPipelineStage, df: pandas.DataFrame, fit: bool
+    ) -> None:
+        if isinstance(pipeline, pdpipe.PdPipeline):
+            stages = list(pipeline._stages)
+        else:
+            stages = [pipeline]
+        names = getattr(pipeline, "_stage_names", None) or [
+            f"{i}_{type(stage).__name__}" for i, stage in enumerate(stages)
+        ]
+        self._stage_names = {id(stage): name for stage, name in zip(stages, names)}
+
+    def apply(
+        self,
+        stage: pdpipe.PdPipelineStage,
+        df: pandas.DataFrame,
+        fit: bool,
+        apply_stage: ApplyFunction,
+    ) -> pandas.DataFrame:
+        name = self._stage_names.get(id(stage), type(stage).__name__)
+        span = self.begin(name, "fit" if fit else "transform", df)
+        output = apply_stage(df)
+        self.end(span, output)
+        return output
+
+    def wrap_reader(self, reader: DataReader) -> DataReader:
+        return ProfiledDataReader(reader, self)
+
+    def wrap_writer(self, writer: DataWriter) -> DataWriter:
+        return ProfiledDataWriter(writer, self)
+
+    def summarize(self) -> List[Dict[str, Any]]:
+        """Aggregate events by their categories and names in order of appearance."""
+        groups: Dict[Any, List[ProfileEvent]] = {}
+        for event in sorted(self.events, key=lambda event: event.start):
+            groups.setdefault((event.category, event.name), []).append(event)
+
+        def total(
+            stats: List[Optional[DataStats]], key: Callable[[DataStats], int]
+        ) -> Optional[int]:
+            values = [key(item) for item in stats if item is not None]
+            return sum(values) if values else None
+
+        summary = []
+        for (category, name), events in groups.items():
+            inputs = [event.input for event in events]
+            outputs = [event.output for event in events]
+            memory_peaks = [e.memory_peak for e in events if e.memory_peak is not None]
+            summary.append(
+                {
+                    "name": name,
+                    "category": category,
+                    "calls": len(events),
+                    "wall_time": sum(event.wall_time for event in events),
+                    "cpu_time": sum(event.cpu_time for event in events),
+                    "memory_peak": max(memory_peaks) if memory_peaks else None,
+                    "rss_peak_delta": sum(e.rss_peak_delta or 0 for e in events),
+                    "input_rows": total(inputs, lambda stats: stats.rows),
+                    "output_rows": total(outputs, lambda stats: stats.rows),
+                    "input_columns": _last_columns(inputs),
+                    "output_columns": _last_columns(outputs),
+                    "input_bytes": total(inputs, lambda stats: stats.bytes),
+                    "output_bytes": total(outputs, lambda stats: stats.bytes),
+                }
+            )
+        return summary
+
+    def format_table(self) -> str:
+        header = [
+            "name",
+            "category",
+            "calls",
+            "wall",
+            "cpu",
+            "mem peak",
+            "rss delta",
+            "rows in/out",
+            "cols in/out",
+            "bytes in/out",
+        ]
+        rows = [header]
+        for item in self.summarize():
+            rows.append(
+                [
+                    item["name"],
+                    item["category"],
+                    str(item["calls"]),
+                    f"{item['wall_time']:.3f}s",
+                    f"{item['cpu_time']:.3f}s",
+                    _format_optional_size(item["memory_peak"]),
+                    format_size(item["rss_peak_delta"]),
+                    f"{_format_optional(item['input_rows'])}/"
+                    f"{_format_optional(item['output_rows'])}",
+                    f"{_format_optional(item['input_columns'])}/"
+                    f"{_format_optional(item['output_columns'])}",
+                    f"{_format_optional_size(item['input_bytes'])}/"
+                    f"{_format_optional_size(item['output_bytes'])}",
+                ]
+            )
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        lines = [
+            "  ".join(
+                cell.ljust(width) if i < 2 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(row, widths))
+            )
+            for row in rows
+        ]
+        lines.insert(1, "  ".join("-" * width for width in widths))
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "summary": self.summarize(),
+            "events": [event.to_dict() for event in self.events],
+        }
+
+    def to_trace_events(self) -> Dict[str, Any]:
+        """Return events in the Chrome trace-event format."""
+        pid = os.getpid()
+        thread_ids = {
+            thread_id: index
+            for index, thread_id in enumerate(
+                dict.fromkeys(event.thread_id for event in self.events)
+            )
+        }
+        trace_events = []
+        for event in self.events:
+            args = {
+                "cpu_time": event.cpu_time,
+                "memory_peak": event.memory_peak,
+                "rss_peak_delta": event.rss_peak_delta,
+            }
+            for key in ("input", "output"):
+                stats = getattr(event, key)
+                if stats is not None:
+                    args.update({f"{key}_{k}": v for k, v in stats._asdict().items()})
+            trace_events.append(
+                {
+                    "name": event.name,
+                    "cat": event.category,
+                    "ph": "X",
+                    "ts": event.start * 1e6,
+                    "dur": event.wall_time * 1e6,
+                    "pid": pid,
+                    "tid": thread_ids[event.thread_id],
+                    "args": args,
+                }
+            )
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def report(
+        self,
+        table: bool = True,
+        output_file: Optional[Union[str, Path]] = None,
+        trace_file: Optional[Union[str, Path]] = None,
+    ) -> None:
+        """Show the table on stderr and save results to given files."""
+        if table:
+            print(self.format_table(), file=sys.stderr)
+        if output_file is not None:
+            logger.info("Save profiling results to: %s", output_file)
+            self.save(output_file)
+        if trace_file is not None:
+            logger.info("Save trace events to: %s", trace_file)
+            self.save_trace(trace_file)
+
+    def save(self, file_path: Union[str, Path]) -> None:
+        with minato.open(file_path, "w") as fp:
+            json.dump(self.to_dict(), fp, indent=2)
+
+    def save_trace(self, file_path: Union[str, Path]) -> None:
+        with minato.open(file_path, "w") as fp:
+            json.dump(self.to_trace_events(), fp)
+
+
+def _last_columns(stats: List[Optional[DataStats]]) -> Optional[int]:
+    for item in reversed(stats):
+        if item is not None:
+            return item.columns
+    return None
+
+
+def _format_optional(value: Optional[int]) -> str:
+    return "-" if value is None else str(value)
+
+
+def _format_optional_size(value: Optional[int]) -> str:
+    return "-" if value is None else format_size(value)
+
+
+class ProfiledDataReader(DataReader):
+    def __init__(self, reader: DataReader, profiler: Profiler) -> None:
+        self._reader = reader
+        self._profiler = profiler
+        self.cacheable = reader.cacheable
+
+    def read(self, file_path: Union[str, Path]) -> pandas.DataFrame:
+        span = self._profiler.begin("read", "io")
+        df = self._reader.read(file_path)
+        self._profiler.end(span, df)
+        return df
+
+    def read_chunks(
+        self,
+        file_path: Union[str, Path],
+        chunksize: int,
+    ) -> Iterator[pandas.DataFrame]:
+        return self._profiler.iterate(
+            self._reader.read_chunks(file_path, chunksize), "read", "io"
+        )
+
+    def project(self, column_filter: Callable[[str], bool]) -> bool:
+        return self._reader.project(column_filter)
+
+    def apply_schema(self, schema: DataSchema) -> bool:
+        return self._reader.apply_schema(schema)
+
+
+class ProfiledDataWriter(DataWriter):
+    def __init__(self, writer: DataWriter, profiler: Profiler) -> None:
+        self._writer = writer
+        self._profiler = profiler
+
+    def write(self, df: pandas.DataFrame, file_path: Union[str, Path]) -> None:
+        span = self._profiler.begin("write", "io", df)
+        self._writer.write(df, file_path)
+        self._profiler.end(span)
+
+    def write_chunks(
+        self,
+        dfs: Iterable[pandas.DataFrame],
+        file_path: Union[str, Path],
+    ) -> None:
+        finalization: List[_Span] = []
+
+        def profiled_chunks() -> Iterator[pandas.DataFrame]:
+            # time between receiving a chunk and requesting the next one is
+            # spent by the writer, while upstream stages are profiled apart
+            for df in dfs:
+                span = self._profiler.begin("write", "io", df)
+                yield df
+                self._profiler.end(span)
+            finalization.append(self._profiler.begin("write", "io"))
+
+        self._writer.write_chunks(profiled_chunks(), file_path)
+        if finalization:
+            self._profiler.end(finalization[0])
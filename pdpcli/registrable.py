@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import importlib
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Type, TypeVar, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar, Union
 
 import colt
 
@@ -11,7 +12,41 @@ from pdpcli import util
 T = TypeVar("T", bound="RegistrableWithFile")
 
 
-class RegistrableWithFile(colt.Registrable):
+class LazyRegistrable(colt.Registrable):
+    """
+    Registrable which imports the module registering a subclass on the first
+    lookup of its name, so that only modules referenced by configs are
+    imported. Names not given by `register_lazy` are looked up after
+    importing modules given by `register_fallback` in order.
+    """
+
+    lazy_modules: Dict[Type["LazyRegistrable"], Dict[str, str]] = defaultdict(dict)
+    fallback_modules: Dict[Type["LazyRegistrable"], List[str]] = defaultdict(list)
+
+    @classmethod
+    def register_lazy(cls, name: str, module: str) -> None:
+        LazyRegistrable.lazy_modules[cls][name] = module
+
+    @classmethod
+    def register_fallback(cls, module: str) -> None:
+        LazyRegistrable.fallback_modules[cls].append(module)
+
+    @classmethod
+    def resolve_class_name(cls, name: str) -> Tuple[Type[Any], Optional[str]]:
+        registry = colt.Registrable._registry[cls]
+        if name not in registry:
+            module = LazyRegistrable.lazy_modules[cls].get(name)
+            if module is not None:
+                importlib.import_module(module)
+            elif "." not in name:
+                for module in LazyRegistrable.fallback_modules[cls]:
+                    importlib.import_module(module)
+                    if name in registry:
+                        break
+        return super().resolve_class_name(name)
+
+
+class RegistrableWithFile(LazyRegistrable):
     extensions: Dict[Type["RegistrableWithFile"], Dict[str, str]] = defaultdict(dict)
 
     @classmethod
@@ -22,7 +57,9 @@ class RegistrableWithFile(colt.Registrable):
         **kwargs: Any,
     ) -> Optional[T]:
         registry = RegistrableWithFile.extensions[cls]
-        ext = util.get_file_ext(file_path)
+        ext = util.get_file_ext(file_path, compound=True)
+        if ext not in registry:
+            ext = util.get_file_ext(file_path)
         if ext in registry:
             name = registry[ext]
             subclass = cls.by_name(name)  # type: Union[Type[T], Callable[..., T]]
@@ -0,0 +1,447 @@
+"""
+Resident server which keeps pipelines loaded and applies them to records sent
+over HTTP on a TCP port or a Unix socket. Data frames of concurrent requests
+are gathered into micro-batches, so small requests share one application of
+a pipeline, and batches are applied by a pool of worker threads.
+"""
+
+import copy
+import http.server
+import io
+import json
+import logging
+import os
+import queue
+import socketserver
+import stat
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy
+import pandas
+import pdpipe
+
+from pdpcli.exceptions import ConfigurationError
+from pdpcli.stages.executor import PipelineExecutor
+from pdpcli.stages.incremental import _flatten_stages, _requires_fit
+
+logger = logging.getLogger(__name__)
+
+# column of positions of rows in concatenated data frames of requests
+_ROW_KEY = "__pdpcli_row__"
+
+
+class ServedPipeline:
+    """
+    Pipeline loaded by `loader`. If `file_path` is given, the pipeline can be
+    reloaded when the file is modified.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], pdpipe.PdPipelineStage],
+        file_path: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self._loader = loader
+        self._file_path = file_path
+        self._mtime = self._get_mtime()
+        self.pipeline = self._load()
+        self.loaded_at = time.time()
+        # incremented on every reload to refresh copies of workers
+        self.version = 0
+
+    def _load(self) -> pdpipe.PdPipelineStage:
+        # pipelines are not fitted to requests, so that responses do not
+        # depend on which requests come first
+        pipeline = self._loader()
+        if not pipeline.is_fitted and any(
+            _requires_fit(stage) for stage in _flatten_stages(pipeline)
+        ):
+            raise ConfigurationError(
+                f"Pipeline {self.name} is not fitted. Build it with `pdp build` "
+                "before serving."
+            )
+        return pipeline
+
+    def _get_mtime(self) -> Optional[float]:
+        if self._file_path is None:
+            return None
+        try:
+            return os.stat(self._file_path).st_mtime
+        except OSError:
+            return None
+
+    def reload_if_modified(self) -> bool:
+        """Reload the pipeline if its file is modified and return whether it is."""
+        mtime = self._get_mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            pipeline = self._load()
+        except Exception:  # pylint: disable=broad-except
+            # files being written are loaded again on their next modification
+            logger.exception("Failed to reload pipeline: %s", self.name)
+            return False
+        self.pipeline = pipeline
+        self.loaded_at = time.time()
+        self.version += 1
+        logger.info("Reloaded pipeline: %s", self.name)
+        return True
+
+
+class _Request:
+    def __init__(self, df: pandas.DataFrame) -> None:
+        self.df = df
+        self.result: Optional[pandas.DataFrame] = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Apply a served pipeline to data frames of concurrent requests at once.
+    Requests are gathered until `max_batch_rows` rows are queued or
+    `max_delay` seconds pass after the first request of a batch. Each of
+    `workers` threads applies its own copy of the pipeline because stages keep
+    application contexts on themselves, and the served pipeline is never
+    applied itself.
+    """
+
+    def __init__(
+        self,
+        served: ServedPipeline,
+        workers: int = 1,
+        max_batch_rows: int = 10000,
+        max_delay: float = 0.002,
+    ) -> None:
+        if workers <= 0:
+            raise ConfigurationError("workers must be a positive integer.")
+        if max_batch_rows <= 0:
+            raise ConfigurationError("max_batch_rows must be a positive integer.")
+        if max_delay < 0:
+            raise ConfigurationError("max_delay must be non-negative.")
+
+        self._served = served
+        self._max_batch_rows = max_batch_rows
+        self._max_delay = max_delay
+        self._executor = PipelineExecutor()
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._run, daemon=True) for _ in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def apply(self, df: pandas.DataFrame) -> pandas.DataFrame:
+        request = _Request(df)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        assert request.result is not None
+        return request.result
+
+    def close(self) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self) -> None:
+        version: Optional[int] = None
+        pipeline: Optional[pdpipe.PdPipelineStage] = None
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+
+            batch = [request]
+            num_rows = len(request.df)
+            deadline = time.monotonic() + self._max_delay
+            while num_rows < self._max_batch_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    # stop after applying the current batch
+                    self._queue.put(None)
+                    break
+                batch.append(request)
+                num_rows += len(request.df)
+
+            try:
+                if version != self._served.version or pipeline is None:
+                    served_version = self._served.version
+                    served_pipeline = copy.deepcopy(self._served.pipeline)
+                    pipeline, version = served_pipeline, served_version
+
+                for requests in self._group_requests(batch):
+                    self._apply_batch(pipeline, requests)
+            except Exception as e:  # pylint: disable=broad-except
+                # requests must not wait forever and the worker keeps running
+                logger.exception("Failed to apply pipeline: %s", self._served.name)
+                for request in batch:
+                    if not request.done.is_set():
+                        request.error = e
+                        request.done.set()
+
+    @staticmethod
+    def _group_requests(batch: List[_Request]) -> List[List[_Request]]:
+        # only data frames with the same columns and dtypes are concatenated
+        groups: Dict[Tuple[Any, ...], List[_Request]] = {}
+        for request in batch:
+            key = tuple(zip(request.df.columns, map(str, request.df.dtypes)))
+            groups.setdefault(key, []).append(request)
+        return list(groups.values())
+
+    def _apply_batch(
+        self,
+        pipeline: pdpipe.PdPipelineStage,
+        requests: List[_Request],
+    ) -> None:
+        if len(requests) > 1 and _ROW_KEY not in requests[0].df.columns:
+            df = pandas.concat([request.df for request in requests], ignore_index=True)
+            df[_ROW_KEY] = numpy.arange(len(df))
+            try:
+                output = self._executor.transform(pipeline, df)
+            except Exception:  # pylint: disable=broad-except
+                # find failing requests by applying them separately
+                output = None
+            if output is not None and self._split_output(output, len(df), requests):
+                return
+
+        for request in requests:
+            try:
+                request.result = self._executor.transform(pipeline, request.df)
+            except Exception as e:  # pylint: disable=broad-except
+                request.error = e
+            request.done.set()
+
+    @staticmethod
+    def _split_output(
+        output: pandas.DataFrame,
+        num_rows: int,
+        requests: List[_Request],
+    ) -> bool:
+        # rows of outputs are mapped back to requests by positions in the
+        # concatenated input, which pipelines may drop or modify
+        if _ROW_KEY not in output.columns:
+            return False
+        keys = output[_ROW_KEY]
+        if not (
+            isinstance(keys, pandas.Series)
+            and pandas.api.types.is_integer_dtype(keys)
+            and keys.is_unique
+            and ((keys >= 0) & (keys < num_rows)).all()
+        ):
+            return False
+
+        positions = keys.to_numpy()
+        output = output.drop(columns=_ROW_KEY)
+        start = 0
+        for request in requests:
+            end = start + len(request.df)
+            mask = (positions >= start) & (positions < end)
+            result = output.iloc[numpy.flatnonzero(mask)]
+            result.index = request.df.index[positions[mask] - start]
+            request.result = result
+            start = end
+        for request in requests:
+            request.done.set()
+        return True
+
+
+class _HTTPServer(http.server.ThreadingHTTPServer):
+    pipeline_server: "PipelineServer"
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    pipeline_server: "PipelineServer"
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self) -> str:
+        # clients of Unix sockets have no addresses
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        # pylint: disable=redefined-builtin
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self) -> None:  # noqa: N802
+        server: PipelineServer = self.server.pipeline_server  # type: ignore
+        if self.path.rstrip("/") != "/health":
+            self._send_error(404, f"Not found: {self.path}")
+            return
+        pipelines = {
+            name: {"loaded_at": served.loaded_at, "version": served.version}
+            for name, served in server.pipelines.items()
+        }
+        self._send(200, json.dumps({"pipelines": pipelines}).encode())
+
+    def do_POST(self) -> None:  # noqa: N802
+        server: PipelineServer = self.server.pipeline_server  # type: ignore
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if not parts or parts[0] != "apply" or len(parts) > 2:
+            self._send_error(404, f"Not found: {self.path}")
+            return
+        if len(parts) == 2:
+            name = parts[1]
+        elif len(server.pipelines) == 1:
+            name = next(iter(server.pipelines))
+        else:
+            self._send_error(404, "Pipeline name is required: /apply/<name>")
+            return
+        batcher = server.batchers.get(name)
+        if batcher is None:
+            self._send_error(404, f"Pipeline not found: {name}")
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            # the body cannot be skipped without its length
+            self.close_connection = True
+            self._send_error(400, "Invalid Content-Length")
+            return
+        body = self.rfile.read(length)
+        is_csv = self.headers.get_content_type() == "text/csv"
+        try:
+            if is_csv:
+                df = pandas.read_csv(io.BytesIO(body))
+            else:
+                df = pandas.DataFrame(json.loads(body))
+        except ValueError as e:
+            self._send_error(400, f"Invalid input data: {e}")
+            return
+
+        try:
+            result = batcher.apply(df)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.exception("Failed to apply pipeline: %s", name)
+            self._send_error(500, f"{type(e).__name__}: {e}")
+            return
+
+        if is_csv:
+            self._send(200, result.to_csv(index=False).encode(), "text/csv")
+        else:
+            self._send(200, result.to_json(orient="records").encode())
+
+    def _send(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str = "application/json",
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send(status, json.dumps({"error": message}).encode())
+
+
+class PipelineServer:
+    """
+    Serve pipelines by HTTP. Records are posted to `/apply/<name>` as a JSON
+    array of objects or as CSV with `Content-Type: text/csv`, and results are
+    returned in the same format. `/apply` is also accepted if only one
+    pipeline is served, and `GET /health` shows loaded pipelines. Pipelines
+    are reloaded every `reload_interval` seconds if their files are modified.
+    """
+
+    def __init__(
+        self,
+        pipelines: List[ServedPipeline],
+        workers: int = 1,
+        max_batch_rows: int = 10000,
+        max_delay: float = 0.002,
+        reload_interval: Optional[float] = None,
+    ) -> None:
+        if not pipelines:
+            raise ConfigurationError("No pipelines to serve.")
+        self.pipelines = {served.name: served for served in pipelines}
+        if len(self.pipelines) != len(pipelines):
+            raise ConfigurationError("Names of pipelines must be unique.")
+
+        self.batchers = {
+            served.name: MicroBatcher(served, workers, max_batch_rows, max_delay)
+            for served in pipelines
+        }
+        self._reload_interval = reload_interval
+        self._stopped = threading.Event()
+        self._reloader: Optional[threading.Thread] = None
+
+    def _reload(self) -> None:
+        assert self._reload_interval is not None
+        while not self._stopped.wait(self._reload_interval):
+            for served in self.pipelines.values():
+                served.reload_if_modified()
+
+    def make_server(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        unix_socket: Optional[str] = None,
+    ) -> socketserver.BaseServer:
+        """Create an HTTP server and start reloading pipelines if enabled."""
+        server: socketserver.BaseServer
+        if unix_socket is not None:
+            # remove a socket file left by a previous server
+            if os.path.exists(unix_socket) and stat.S_ISSOCK(
+                os.stat(unix_socket).st_mode
+            ):
+                os.unlink(unix_socket)
+            server = _UnixHTTPServer(unix_socket, _RequestHandler)
+        else:
+            server = _HTTPServer((host, port), _RequestHandler)
+        server.pipeline_server = self
+
+        if self._reload_interval is not None and self._reloader is None:
+            self._reloader = threading.Thread(target=self._reload, daemon=True)
+            self._reloader.start()
+        return server
+
+    def serve(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        unix_socket: Optional[str] = None,
+    ) -> None:
+        server = self.make_server(host, port, unix_socket)
+        logger.info(
+            "Serve pipelines %s on %s",
+            list(self.pipelines),
+            unix_socket or f"http://{host}:{getattr(server, 'server_port', port)}",
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if unix_socket is not None and os.path.exists(unix_socket):
+                os.unlink(unix_socket)
+            self.close()
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._reloader is not None:
+            self._reloader.join()
+        for batcher in self.batchers.values():
+            batcher.close()
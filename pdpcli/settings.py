@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # colt settings
@@ -6,7 +7,11 @@ DEFAULT_COLT_SETTING = {
 }
 
 # pdpcli directory settings
-PDPCLI_ROOT = Path.home() / ".pdpcli"
+PDPCLI_ROOT = Path(os.environ.get("PDPCLI_ROOT", Path.home() / ".pdpcli"))
+
+# cache settings
+CACHE_ROOT = PDPCLI_ROOT / "cache"
+CACHE_MAX_SIZE = int(os.environ.get("PDPCLI_CACHE_MAX_SIZE", 10 * 1024**3))
 
 # plugin settings
 LOCAL_PLUGINS_FILENAME = ".pdpcli_plugins"
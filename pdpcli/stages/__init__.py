@@ -1,7 +1,10 @@
-from pdpcli.stages.pdpipe import load_pdpie_stages
+from pdpcli.stages.pass_through_stage import PassThroughStage  # noqa: F401
+from pdpcli.stages.pipeline import Pipeline  # noqa: F401
+from pdpcli.stages.stage import Stage  # noqa: F401
 
-load_pdpie_stages()
-
-from pdpcli.stages.pass_through_stage import PassThroughStage  # noqa: F401, E402
-from pdpcli.stages.pipeline import Pipeline  # noqa: F401, E402
-from pdpcli.stages.stage import Stage  # noqa: F401, E402
+# modules of stages are imported when configs reference them
+Stage.register_lazy("select_columns", "pdpcli.stages.select_columns")
+Stage.register_lazy("rex_columns", "pdpcli.stages.select_columns")
+Stage.register_lazy("sklearn_predictor", "pdpcli.stages.sklearn_stages")
+Stage.register_lazy("sklearn_transformer", "pdpcli.stages.sklearn_stages")
+Stage.register_fallback("pdpcli.stages.pdpipe")
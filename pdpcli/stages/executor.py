@@ -0,0 +1,190 @@
+"""
+Stage-by-stage execution of pipelines. `PipelineExecutor` applies top-level
+stages of a pipeline like `PdPipeline.fit_transform` / `transform` do, and
+lets `StageHook`s wrap the application of each stage, e.g. to cache, profile
+or release intermediate data frames.
+"""
+
+import functools
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+import pandas
+import pdpipe
+from pdpipe.core import PdpApplicationContext
+from pdpipe.exceptions import PipelineApplicationError, UnfittedPipelineStageError
+
+from pdpcli.stages.scheduler import (
+    ColumnAccess,
+    ColumnChange,
+    plan_levels,
+    run_level,
+    sequential_columns,
+)
+
+logger = logging.getLogger(__name__)
+
+ApplyFunction = Callable[[pandas.DataFrame], pandas.DataFrame]
+
+
+class StageHook:
+    """
+    Hook around the application of stages. `apply` receives a function which
+    applies the stage to a data frame, and must return the output of the stage.
+    `finish` is called even if the application fails.
+    """
+
+    def start(
+        self, pipeline: pdpipe.PdPipelineStage, df: pandas.DataFrame, fit: bool
+    ) -> None:
+        pass
+
+    def apply(
+        self,
+        stage: pdpipe.PdPipelineStage,
+        df: pandas.DataFrame,
+        fit: bool,
+        apply_stage: ApplyFunction,
+    ) -> pandas.DataFrame:
+        return apply_stage(df)
+
+    def finish(self, df: pandas.DataFrame) -> None:
+        pass
+
+
+class PipelineExecutor:
+    """
+    Apply pipelines stage by stage with given hooks. Stages of pipelines with
+    `parallel` enabled are scheduled by their column accesses.
+    """
+
+    def __init__(self, hooks: Sequence[StageHook] = ()) -> None:
+        self._hooks = list(hooks)
+
+    def run(
+        self,
+        pipeline: pdpipe.PdPipelineStage,
+        df: pandas.DataFrame,
+        fit: Optional[bool] = None,
+        exraise: Optional[bool] = None,
+        verbose: Optional[bool] = None,
+    ) -> pandas.DataFrame:
+        """
+        Apply the pipeline to the data frame. If `fit` is not given, stages are
+        fitted only if the pipeline is not fitted yet. The given data frame is
+        released after the first stage unless callers keep references to it.
+        """
+        is_pipeline = isinstance(pipeline, pdpipe.PdPipeline)
+        stages = list(pipeline._stages) if is_pipeline else [pipeline]
+        if fit is None:
+            fit = not pipeline.is_fitted and (is_pipeline or pipeline._is_fittable())
+        if not fit:
+            for stage in stages:
+                if stage._is_fittable() and not stage.is_fitted:
+                    raise UnfittedPipelineStageError(
+                        f"PipelineStage {stage} in pipeline is fittable but unfitted!"
+                    )
+
+        application_context = PdpApplicationContext()
+        fit_context = PdpApplicationContext() if fit else None
+
+        def apply_stage(
+            stage: pdpipe.PdPipelineStage, df: pandas.DataFrame
+        ) -> pandas.DataFrame:
+            if fit_context is not None:
+                stage._fit_context = fit_context
+            stage._application_context = application_context
+
+            method = stage.fit_transform if fit else stage.transform
+            func: ApplyFunction = functools.partial(
+                method, y=None, exraise=exraise, verbose=verbose
+            )
+            for hook in reversed(self._hooks):
+                func = functools.partial(hook.apply, stage, fit=fit, apply_stage=func)
+            return func(df)
+
+        names = getattr(pipeline, "_stage_names", None) or [
+            f"[ {i}] {stage}" for i, stage in enumerate(stages)
+        ]
+        accesses: List[Optional[ColumnAccess]]
+        if getattr(pipeline, "_parallel", False):
+            accesses = pipeline._get_column_accesses()
+            levels = plan_levels(accesses)
+        else:
+            accesses = [None] * len(stages)
+            levels = [[i] for i in range(len(stages))]
+
+        executor: Optional[Executor] = None
+        input_columns = list(df.columns)
+        column_changes: Dict[int, ColumnChange] = {}
+        run_stage = apply_stage
+        if any(len(level) > 1 for level in levels):
+            logger.debug("Stage levels: %s", levels)
+            executor = ThreadPoolExecutor(
+                max_workers=getattr(pipeline, "_n_jobs", None)
+            )
+            positions = {id(stage): i for i, stage in enumerate(stages)}
+
+            def record_columns(
+                stage: pdpipe.PdPipelineStage, df: pandas.DataFrame
+            ) -> pandas.DataFrame:
+                # columns are recorded to order outputs as sequential runs do
+                output = apply_stage(stage, df)
+                column_changes[positions[id(stage)]] = ColumnChange(
+                    list(df.columns), list(output.columns)
+                )
+                return output
+
+            run_stage = record_columns
+
+        for hook in self._hooks:
+            hook.start(pipeline, df, fit)
+        try:
+            for level in levels:
+                try:
+                    # the input of each level is released after the level
+                    df = run_level(
+                        [stages[i] for i in level],
+                        [accesses[i] for i in level],
+                        df,
+                        run_stage,
+                        executor,
+                    )
+                except Exception as e:
+                    if not is_pipeline:
+                        raise
+                    level_names = [names[i] for i in level]
+                    raise PipelineApplicationError(
+                        f"Exception raised in stages {level_names}"
+                    ) from e
+            if column_changes:
+                order = sequential_columns(
+                    input_columns, [column_changes[i] for i in range(len(stages))]
+                )
+                columns = list(df.columns)
+                if order != columns and set(order) == set(columns):
+                    df = df[order]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            for hook in self._hooks:
+                hook.finish(df)
+
+        if is_pipeline:
+            pipeline._application_context = application_context
+            if fit_context is not None:
+                pipeline._fit_context = fit_context
+            if pipeline._fit_context is None:
+                # stateless pipelines may be transformed without being fitted
+                pipeline._application_context.lock()
+            else:
+                pipeline._post_transform_lock()
+            if fit:
+                pipeline.is_fitted = True
+        return df
+
+    # partial methods do not keep references to input data frames
+    apply = functools.partialmethod(run, fit=None)
+    fit_transform = functools.partialmethod(run, fit=True)
+    transform = functools.partialmethod(run, fit=False)
@@ -0,0 +1,124 @@
+"""
+Out-of-core fitting of pipelines on chunks of data. Fittable stages are
+fitted one after another by `partial_fit` over all chunks, and each chunk is
+transformed by already fitted upstream stages before it is fed to the stage,
+so that only one chunk is in memory at a time.
+"""
+
+import logging
+from typing import Any, Callable, Iterable, Iterator, List, Set
+
+import pandas
+import pdpipe
+from pdpipe.core import (
+    ColumnsBasedPipelineStage,
+    PdpApplicationContext,
+    PdPipelineStage,
+)
+
+from pdpcli.exceptions import ConfigurationError
+from pdpcli.stages.sklearn_stages import SklearnPredictor
+from pdpcli.stages.stage import Stage
+
+logger = logging.getLogger(__name__)
+
+ChunkFactory = Callable[[], Iterable[pandas.DataFrame]]
+
+# implementations of `_fit_transform` which learn nothing but column qualifiers
+_STATELESS_FIT_TRANSFORMS = (
+    PdPipelineStage._fit_transform,
+    ColumnsBasedPipelineStage._fit_transform,
+)
+
+
+def _requires_fit(stage: pdpipe.PdPipelineStage) -> bool:
+    # `_is_fittable` of pdpipe ignores stages like `OneHotEncode` which
+    # override `_fit_transform` to learn their states
+    return bool(
+        stage._is_fittable()
+        or type(stage)._fit_transform not in _STATELESS_FIT_TRANSFORMS
+    )
+
+
+def _flatten_stages(pipeline: pdpipe.PdPipelineStage) -> List[pdpipe.PdPipelineStage]:
+    if not isinstance(pipeline, pdpipe.PdPipeline):
+        return [pipeline]
+    return [stage for child in pipeline._stages for stage in _flatten_stages(child)]
+
+
+def _iter_pipelines(pipeline: pdpipe.PdPipelineStage) -> Iterator[pdpipe.PdPipeline]:
+    if isinstance(pipeline, pdpipe.PdPipeline):
+        yield pipeline
+        for stage in pipeline._stages:
+            yield from _iter_pipelines(stage)
+
+
+def fit_incremental(
+    pipeline: pdpipe.PdPipelineStage,
+    read_chunks: ChunkFactory,
+    epochs: int = 1,
+) -> None:
+    """
+    Fit the pipeline on chunks of data. `read_chunks` is called for each pass
+    over the data and must return a new iterable of chunks. Every fittable
+    stage must support `partial_fit`, and is updated with all chunks `epochs`
+    times.
+    """
+    if epochs <= 0:
+        raise ConfigurationError("epochs must be a positive integer.")
+
+    stages = _flatten_stages(pipeline)
+    for stage in stages:
+        if _requires_fit(stage) and not (
+            isinstance(stage, Stage) and stage.supports_partial_fit()
+        ):
+            raise ConfigurationError(
+                f"Stage {type(stage).__name__} cannot be fitted on chunks of data."
+            )
+
+    fit_context = PdpApplicationContext()
+    for stage in stages:
+        stage._fit_context = fit_context
+
+    def transformed_chunks(
+        upstream: List[pdpipe.PdPipelineStage],
+    ) -> Iterator[pandas.DataFrame]:
+        for chunk in read_chunks():
+            application_context = PdpApplicationContext()
+            for stage in upstream:
+                stage._application_context = application_context
+                chunk = stage.transform(chunk)
+            yield chunk
+
+    for index, stage in enumerate(stages):
+        if not _requires_fit(stage):
+            continue
+
+        upstream = stages[:index]
+        if isinstance(stage, SklearnPredictor) and stage.requires_classes():
+            # classifiers need all classes on the first call of partial_fit
+            classes: Set[Any] = set()
+            for chunk in transformed_chunks(upstream):
+                classes.update(stage.get_classes(chunk))
+            stage._fitted_classes = sorted(classes)
+            logger.info("Collected classes: %s", stage._fitted_classes)
+
+        stage.is_fitted = False
+        for epoch in range(epochs):
+            logger.info(
+                "Fit stage %s incrementally (epoch %d/%d)",
+                type(stage).__name__,
+                epoch + 1,
+                epochs,
+            )
+            num_rows = 0
+            for chunk in transformed_chunks(upstream):
+                stage.partial_fit(chunk)
+                num_rows += len(chunk)
+            logger.info("Fitted with %d rows", num_rows)
+
+    for stage in stages:
+        stage.is_fitted = True
+    for child in _iter_pipelines(pipeline):
+        child._fit_context = fit_context
+        child.is_fitted = True
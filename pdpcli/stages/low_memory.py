@@ -0,0 +1,95 @@
+"""
+Low-memory execution of pipelines. `LowMemoryHook` drops columns which no
+following stage or the output requires before each stage, runs stages in the
+copy-on-write mode of pandas (1.5 or later) so that selections and drops do
+not copy data, and collects intermediate data frames as soon as they are
+consumed.
+"""
+
+import gc
+import logging
+import threading
+from typing import Dict, Optional
+
+import pandas
+import pdpipe
+
+from pdpcli.cache import format_size
+from pdpcli.columns import ColumnFilter
+from pdpcli.stages.executor import ApplyFunction, StageHook
+from pdpcli.stages.planner import required_columns
+from pdpcli.util import copy_on_write_enabled, get_peak_memory_usage, set_copy_on_write
+
+logger = logging.getLogger(__name__)
+
+
+class LowMemoryHook(StageHook):
+    """
+    Stage hook to reduce peak memory usage. `output_columns` is a filter of
+    columns required in the output of the pipeline, and all columns are
+    required if it is not given.
+    """
+
+    def __init__(self, output_columns: Optional[ColumnFilter] = None) -> None:
+        self._output_columns = output_columns
+        self._required_columns: Dict[int, Optional[ColumnFilter]] = {}
+        # previous copy-on-write mode if this hook has changed it
+        self._copy_on_write: Optional[bool] = None
+        self.input_size = 0
+        self.peak_memory_usage: Optional[int] = None
+
+    def start(
+        self, pipeline: pdpipe.PdPipelineStage, df: pandas.DataFrame, fit: bool
+    ) -> None:
+        if isinstance(pipeline, pdpipe.PdPipeline):
+            stages = list(pipeline._stages)
+        else:
+            stages = [pipeline]
+
+        # columns required at the input of each stage
+        columns = self._output_columns
+        self._required_columns = {}
+        for stage in reversed(stages):
+            columns = required_columns(stage, columns)
+            self._required_columns[id(stage)] = columns
+
+        self.input_size = int(df.memory_usage(deep=True).sum())
+        # the mode is a process-wide option, so it is changed only by the main
+        # thread and not by workers applying other pipelines concurrently
+        self._copy_on_write = None
+        if threading.current_thread() is threading.main_thread():
+            copy_on_write = copy_on_write_enabled()
+            if set_copy_on_write(True):
+                self._copy_on_write = copy_on_write
+
+    def apply(
+        self,
+        stage: pdpipe.PdPipelineStage,
+        df: pandas.DataFrame,
+        fit: bool,
+        apply_stage: ApplyFunction,
+    ) -> pandas.DataFrame:
+        column_filter = self._required_columns.get(id(stage))
+        if column_filter is not None:
+            dropped = [column for column in df.columns if not column_filter(column)]
+            if dropped:
+                logger.info("Drop columns not required anymore: %s", dropped)
+                df = df.drop(columns=dropped)
+
+        output = apply_stage(df)
+        del df
+        gc.collect()
+        return output
+
+    def finish(self, df: pandas.DataFrame) -> None:
+        if self._copy_on_write is not None:
+            set_copy_on_write(self._copy_on_write)
+            self._copy_on_write = None
+        self._required_columns = {}
+        self.peak_memory_usage = get_peak_memory_usage()
+        if self.peak_memory_usage is not None:
+            logger.info(
+                "Peak memory usage: %s (input data frame: %s)",
+                format_size(self.peak_memory_usage),
+                format_size(self.input_size),
+            )
@@ -7,8 +7,14 @@ from pdpcli.util import camel_to_snake
 
 
 def load_pdpie_stages() -> None:
-    # register PdPipeStages in pdpipe
+    # register PdPipeStages in pdpipe unless names are already registered
+    registered = Stage._registry[Stage]
     for pdpname, pdpcls in inspect.getmembers(pdpipe):
         if isinstance(pdpcls, type) and issubclass(pdpcls, pdpipe.PdPipelineStage):
             name = f"{camel_to_snake(pdpname)}"
-            Stage.register(name)(pdpcls)
+            if name not in registered:
+                Stage.register(name)(pdpcls)
+
+
+# this module is imported when names of stages are not found
+load_pdpie_stages()
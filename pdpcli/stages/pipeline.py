@@ -1,15 +1,73 @@
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
+import pandas
 import pdpipe
 
+from pdpcli.stages.executor import PipelineExecutor
+from pdpcli.stages.scheduler import ColumnAccess, column_access
 from pdpcli.stages.stage import Stage
 
 
 @Stage.register("pipeline", exist_ok=True)
 class Pipeline(pdpipe.PdPipeline):  # type: ignore
+    """
+    Pipeline of named stages. If `parallel` is enabled, stages which access
+    disjoint columns are applied concurrently by `n_jobs` threads. Accessed
+    columns are derived from stages such as sklearn stages, or declared by
+    `column_access` like `{"stage_name": {"reads": [...], "writes": [...]}}`.
+    """
+
     def __init__(
         self,
         stages: Dict[str, Stage],
+        parallel: bool = False,
+        n_jobs: Optional[int] = None,
+        column_access: Optional[Dict[str, Dict[str, Any]]] = None,
         **kwargs: Any,
     ) -> None:
         super().__init__(stages=list(stages.values()), **kwargs)
+        self._stage_names = list(stages.keys())
+        self._parallel = parallel
+        self._n_jobs = n_jobs
+        self._column_access = column_access or {}
+
+    def _get_column_accesses(self) -> List[Optional[ColumnAccess]]:
+        accesses: List[Optional[ColumnAccess]] = []
+        for name, stage in zip(self._stage_names, self._stages):
+            if name in self._column_access:
+                accesses.append(ColumnAccess.from_dict(self._column_access[name]))
+            else:
+                accesses.append(column_access(stage))
+        return accesses
+
+    def fit_transform(
+        self,
+        X: pandas.DataFrame,
+        y: Any = None,
+        exraise: Optional[bool] = None,
+        verbose: Optional[bool] = None,
+        time: bool = False,
+    ) -> pandas.DataFrame:
+        if not getattr(self, "_parallel", False) or time:
+            return super().fit_transform(
+                X, y=y, exraise=exraise, verbose=verbose, time=time
+            )
+
+        return PipelineExecutor().fit_transform(
+            self, X, exraise=exraise, verbose=verbose
+        )
+
+    def transform(
+        self,
+        X: pandas.DataFrame,
+        y: Any = None,
+        exraise: Optional[bool] = None,
+        verbose: Optional[bool] = None,
+        time: bool = False,
+    ) -> pandas.DataFrame:
+        if not getattr(self, "_parallel", False) or time:
+            return super().transform(
+                X, y=y, exraise=exraise, verbose=verbose, time=time
+            )
+
+        return PipelineExecutor().transform(self, X, exraise=exraise, verbose=verbose)
@@ -0,0 +1,133 @@
+import functools
+import logging
+from typing import List, Optional, Union
+
+import pdpipe
+
+from pdpcli.columns import (
+    ColumnFilter,
+    ColumnNames,
+    ColumnPatterns,
+    ColumnProjection,
+    intersection,
+    union,
+)
+from pdpcli.data import DataReader
+from pdpcli.stages.pass_through_stage import PassThroughStage
+from pdpcli.stages.select_columns import RexColumns, SelectColumns
+from pdpcli.stages.sklearn_stages import SklearnPredictor, SklearnTransformer
+
+logger = logging.getLogger(__name__)
+
+
+def _as_list(columns: Union[str, List[str]]) -> List[str]:
+    if isinstance(columns, str):
+        return [columns]
+    return list(columns)
+
+
+@functools.singledispatch
+def required_columns(
+    stage: pdpipe.PdPipelineStage,
+    columns: Optional[ColumnFilter] = None,
+) -> Optional[ColumnFilter]:
+    """
+    Return a filter of input columns which the given stage requires to produce
+    `columns` of its output. `None` stands for all columns, and stages which
+    cannot be analyzed statically require all columns. Plugins can add rules
+    for their own stages via `required_columns.register(MyStage)`.
+    """
+    return None
+
+
+@required_columns.register(pdpipe.PdPipeline)
+def _required_columns_for_pipeline(
+    stage: pdpipe.PdPipeline,
+    columns: Optional[ColumnFilter] = None,
+) -> Optional[ColumnFilter]:
+    for substage in reversed(stage._stages):
+        columns = required_columns(substage, columns)
+    return columns
+
+
+@required_columns.register(PassThroughStage)
+def _required_columns_for_pass_through(
+    stage: PassThroughStage,
+    columns: Optional[ColumnFilter] = None,
+) -> Optional[ColumnFilter]:
+    return columns
+
+
+@required_columns.register(SelectColumns)
+def _required_columns_for_select_columns(
+    stage: SelectColumns,
+    columns: Optional[ColumnFilter] = None,
+) -> Optional[ColumnFilter]:
+    return intersection(ColumnNames(stage._columns), columns)
+
+
+@required_columns.register(RexColumns)
+def _required_columns_for_rex_columns(
+    stage: RexColumns,
+    columns: Optional[ColumnFilter] = None,
+) -> Optional[ColumnFilter]:
+    patterns = ColumnPatterns(pattern.pattern for pattern in stage._columns)
+    return intersection(patterns, columns)
+
+
+@required_columns.register(SklearnTransformer)
+def _required_columns_for_sklearn_transformer(
+    stage: SklearnTransformer,
+    columns: Optional[ColumnFilter] = None,
+) -> Optional[ColumnFilter]:
+    if not stage._feature_columns:
+        return None
+    return union(ColumnNames(_as_list(stage._feature_columns)), columns)
+
+
+@required_columns.register(SklearnPredictor)
+def _required_columns_for_sklearn_predictor(
+    stage: SklearnPredictor,
+    columns: Optional[ColumnFilter] = None,
+) -> Optional[ColumnFilter]:
+    if not stage._feature_columns:
+        return None
+    names = _as_list(stage._feature_columns) + _as_list(stage._target_columns)
+    return union(ColumnNames(names), columns)
+
+
+@required_columns.register(pdpipe.ColDrop)
+def _required_columns_for_col_drop(
+    stage: pdpipe.ColDrop,
+    columns: Optional[ColumnFilter] = None,
+) -> Optional[ColumnFilter]:
+    if callable(stage._col_arg) or stage._exclude_columns:
+        return None
+    dropped = ColumnNames(stage._col_arg)
+    if stage._errors == "ignore":
+        # dropped columns are needed neither by this stage nor downstream
+        return intersection(~dropped, columns)
+    # the precondition of this stage requires dropped columns to exist
+    return union(dropped, columns)
+
+
+def plan_projection(stage: pdpipe.PdPipelineStage) -> Optional[ColumnProjection]:
+    column_filter = required_columns(stage)
+    if column_filter is None:
+        return None
+    return ColumnProjection(column_filter)
+
+
+def push_down_columns(
+    stage: pdpipe.PdPipelineStage,
+    reader: DataReader,
+) -> Optional[ColumnProjection]:
+    projection = plan_projection(stage)
+    if projection is None:
+        logger.info("All columns are required by the pipeline")
+        return None
+    if not reader.project(projection):
+        logger.info("%s does not support column projection", type(reader).__name__)
+        return None
+    logger.info("Push down column filter to reader: %r", projection.filter)
+    return projection
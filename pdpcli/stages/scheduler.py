@@ -0,0 +1,222 @@
+"""
+Dependency analysis of pipeline stages for parallel execution. Each stage is
+described by a `ColumnAccess` which tells columns the stage reads, writes and
+drops. Stages without conflicting accesses are grouped into the same level,
+applied to the same input data frame concurrently and merged.
+"""
+
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Set
+
+import pandas
+import pdpipe
+
+from pdpcli.stages.pass_through_stage import PassThroughStage
+from pdpcli.stages.sklearn_stages import SklearnPredictor, SklearnTransformer
+
+
+class ColumnAccess(NamedTuple):
+    # `None` stands for unknown columns, i.e. all columns
+    reads: Optional[List[str]]
+    writes: Optional[List[str]]
+    drops: List[str] = []
+    # whether written columns may be suffixed like `{name}_{i}`
+    prefixed: bool = False
+
+    @classmethod
+    def from_dict(cls, params: Dict[str, Any]) -> "ColumnAccess":
+        return cls(
+            reads=_as_list(params.get("reads", [])),
+            writes=_as_list(params.get("writes", [])),
+            drops=_as_list(params.get("drops", [])),
+            prefixed=params.get("prefixed", False),
+        )
+
+    def may_write(self, column: str) -> bool:
+        if self.writes is None:
+            return True
+        return any(
+            column == name or (self.prefixed and str(column).startswith(f"{name}_"))
+            for name in self.writes
+        )
+
+
+def _as_list(columns: Any) -> List[str]:
+    if isinstance(columns, str):
+        return [columns]
+    return list(columns)
+
+
+@functools.singledispatch
+def column_access(stage: pdpipe.PdPipelineStage) -> Optional[ColumnAccess]:
+    """
+    Return columns accessed by the given stage, or `None` if they cannot be
+    analyzed. Stages without analysis are never run concurrently. Plugins can
+    add rules via `column_access.register(MyStage)`.
+    """
+    return None
+
+
+@column_access.register(PassThroughStage)
+def _column_access_for_pass_through(stage: PassThroughStage) -> ColumnAccess:
+    return ColumnAccess(reads=[], writes=[])
+
+
+@column_access.register(SklearnTransformer)
+def _column_access_for_sklearn_transformer(
+    stage: SklearnTransformer,
+) -> Optional[ColumnAccess]:
+    if not stage._feature_columns:
+        return None
+    feature_columns = _as_list(stage._feature_columns)
+    return ColumnAccess(
+        reads=feature_columns,
+        writes=_as_list(stage._output_columns),
+        drops=feature_columns if stage._drop else [],
+        prefixed=isinstance(stage._output_columns, str),
+    )
+
+
+@column_access.register(SklearnPredictor)
+def _column_access_for_sklearn_predictor(
+    stage: SklearnPredictor,
+) -> Optional[ColumnAccess]:
+    if not stage._feature_columns:
+        return None
+    return ColumnAccess(
+        reads=_as_list(stage._feature_columns) + _as_list(stage._target_columns),
+        writes=_as_list(stage._output_columns),
+        prefixed=isinstance(stage._output_columns, str),
+    )
+
+
+def conflicts(first: Optional[ColumnAccess], second: Optional[ColumnAccess]) -> bool:
+    """Return whether `second` must run after `first`."""
+    if first is None or second is None:
+        return True
+    if first.reads is None or second.reads is None:
+        return True
+    if first.writes is None or second.writes is None:
+        return True
+    return (
+        # read after write and write after read
+        any(first.may_write(column) for column in second.reads)
+        or any(second.may_write(column) for column in first.reads)
+        # write after write
+        or any(first.may_write(column) for column in second.writes)
+        or any(second.may_write(column) for column in first.writes)
+        # columns dropped by one stage must not be used by the other
+        or bool(set(first.drops) & set(second.reads + second.writes + second.drops))
+        or bool(set(second.drops) & set(first.reads + first.writes))
+    )
+
+
+def plan_levels(accesses: Sequence[Optional[ColumnAccess]]) -> List[List[int]]:
+    """
+    Group stage indices into levels. Stages in a level depend only on stages
+    in former levels, and stages of each level keep their pipeline order.
+    """
+    stage_levels: List[int] = []
+    for j, access in enumerate(accesses):
+        level = 0
+        for i in range(j):
+            if conflicts(accesses[i], access):
+                level = max(level, stage_levels[i] + 1)
+        stage_levels.append(level)
+
+    levels: List[List[int]] = [[] for _ in range(max(stage_levels, default=-1) + 1)]
+    for index, level in enumerate(stage_levels):
+        levels[level].append(index)
+    return levels
+
+
+def merge_outputs(
+    df: pandas.DataFrame,
+    outputs: Sequence[pandas.DataFrame],
+    accesses: Sequence[Optional[ColumnAccess]],
+) -> pandas.DataFrame:
+    """Merge outputs of stages which were applied to the same data frame."""
+    original = set(df.columns)
+    dropped: Set[str] = set()
+    for output in outputs:
+        dropped |= original - set(output.columns)
+
+    pieces = []
+    written: Set[str] = set()
+    for output, access in zip(outputs, accesses):
+        columns = [
+            c
+            for c in output.columns
+            if c not in original or access is None or access.may_write(c)
+        ]
+        if columns:
+            pieces.append(output[columns])
+            written.update(c for c in columns if c in original)
+
+    base = df[[c for c in df.columns if c not in dropped and c not in written]]
+    result = pandas.concat([base, *pieces], axis=1, copy=False)
+    if written:
+        # overwritten columns keep their positions
+        order = [c for c in df.columns if c not in dropped]
+        order += [c for c in result.columns if c not in original]
+        result = result[order]
+    return result
+
+
+class ColumnChange(NamedTuple):
+    """Columns of the input and the output of a stage."""
+
+    inputs: List[str]
+    outputs: List[str]
+
+
+def sequential_columns(
+    columns: Sequence[str],
+    changes: Sequence[ColumnChange],
+) -> List[str]:
+    """
+    Return the column order which applying stages one by one gives, from
+    columns of the pipeline input and changes of all stages in pipeline order.
+    Columns kept by a stage keep their positions, new columns placed before a
+    kept column are inserted before it and other new columns are appended.
+    """
+    order = list(columns)
+    for inputs, outputs in changes:
+        known = set(inputs)
+        kept = known & set(outputs)
+        # columns unknown to the stage are added by other stages of its level
+        order = [c for c in order if c in kept or c not in known]
+        present = set(order)
+        pending: List[str] = []
+        for column in outputs:
+            if column not in known:
+                pending.append(column)
+            elif column in present and pending:
+                position = order.index(column)
+                order[position:position] = pending
+                pending = []
+        order += pending
+    return order
+
+
+def run_level(
+    stages: Sequence[pdpipe.PdPipelineStage],
+    accesses: Sequence[Optional[ColumnAccess]],
+    df: pandas.DataFrame,
+    apply_stage: Callable[[pdpipe.PdPipelineStage, pandas.DataFrame], pandas.DataFrame],
+    executor: Optional[Executor] = None,
+) -> pandas.DataFrame:
+    if len(stages) == 1:
+        return apply_stage(stages[0], df)
+
+    # each stage gets its own shallow copy since pandas consolidates blocks
+    # and caches columns of data frames in place
+    if executor is None:
+        outputs = [apply_stage(stage, df.copy(deep=False)) for stage in stages]
+    else:
+        futures = [
+            executor.submit(apply_stage, stage, df.copy(deep=False)) for stage in stages
+        ]
+        outputs = [future.result() for future in futures]
+    return merge_outputs(df, outputs, accesses)
@@ -25,8 +25,12 @@ class SelectColumns(Stage):
     def _prec(self, df: pandas.DataFrame) -> bool:
         return True
 
+    def _resolve(self, columns: pandas.Index) -> List[str]:
+        return self._columns
+
     def _transform(self, df: pandas.DataFrame, verbose: bool) -> pandas.DataFrame:
-        return df[self._columns]
+        indexer = self._column_indexers.get(df.columns, self._resolve)
+        return df.iloc[:, indexer]
 
 
 @Stage.register("rex_columns")
@@ -48,6 +52,9 @@ class RexColumns(Stage):
     def _prec(self, df: pandas.DataFrame) -> bool:
         return True
 
+    def _resolve(self, columns: pandas.Index) -> List[str]:
+        return [c for c in columns if any(re.match(r, c) for r in self._columns)]
+
     def _transform(self, df: pandas.DataFrame, verbose: bool) -> pandas.DataFrame:
-        columns = [c for c in df.columns if any(re.match(r, c) for r in self._columns)]
-        return df[columns]
+        indexer = self._column_indexers.get(df.columns, self._resolve)
+        return df.iloc[:, indexer]
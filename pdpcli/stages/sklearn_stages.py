@@ -1,11 +1,133 @@
-from typing import Any, List, Optional, Tuple, Union
+import math
+import os
+import threading
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy
 import pandas
 from scipy import sparse
-from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.base import BaseEstimator, TransformerMixin, is_classifier
 
+from pdpcli.exceptions import ConfigurationError
+from pdpcli.matrix import MatrixArray, get_matrix
 from pdpcli.stages.stage import Stage
+from pdpcli.util import copy_on_write_enabled
+
+OUTPUT_FORMATS = ("columns", "matrix")
+PREDICTION_METHODS = ("predict", "predict_proba", "decision_function")
+BACKENDS = ("thread", "process")
+
+# estimator and prediction method shared by worker processes
+_worker_context: Dict[str, Any] = {}
+
+
+def _as_list(columns: Union[str, List[str]]) -> List[str]:
+    if isinstance(columns, str):
+        return [columns]
+    return list(columns)
+
+
+def _select_columns(
+    stage: Stage,
+    df: pandas.DataFrame,
+    columns: Union[str, List[str]],
+    name: str = "",
+) -> Union[pandas.DataFrame, pandas.Series]:
+    """Select columns by positions cached for the schema of `df`."""
+    indexer = stage._column_indexers.get(df.columns, lambda _: _as_list(columns), name)
+    if isinstance(columns, str):
+        return df.iloc[:, indexer[0]]
+    if copy_on_write_enabled() and len(indexer) > 0:
+        # selecting a list of columns consolidates blocks of `df` in place,
+        # which copies all columns of frames with inserted columns
+        return pandas.concat([df.iloc[:, i] for i in indexer], axis=1)
+    return df.iloc[:, indexer]
+
+
+def _has_columns(stage: Stage, df: pandas.DataFrame, columns: List[str]) -> bool:
+    try:
+        stage._column_indexers.get(df.columns, lambda _: columns, "required")
+    except KeyError:
+        return False
+    return True
+
+
+def _check_output_format(
+    output_format: str,
+    output_columns: Union[str, List[str]],
+) -> None:
+    if output_format not in OUTPUT_FORMATS:
+        raise ConfigurationError(
+            f"output_format must be one of {OUTPUT_FORMATS}: {output_format}"
+        )
+    if output_format == "matrix" and not isinstance(output_columns, str):
+        raise ConfigurationError("output_columns must be a column name for matrix.")
+
+
+def _assemble_output(
+    df: pandas.DataFrame,
+    output: Any,
+    output_columns: List[str],
+    drop_columns: Optional[List[str]] = None,
+) -> pandas.DataFrame:
+    """
+    Add outputs of an estimator to the given data frame. Dropped columns are
+    removed before assembling and existing blocks are not copied.
+    """
+    if drop_columns:
+        df = df.drop(columns=drop_columns)
+
+    if isinstance(output, MatrixArray):
+        df = df.copy(deep=False)
+        df[output_columns[0]] = output
+        return df
+
+    if sparse.issparse(output):
+        vec_df = pandas.DataFrame.sparse.from_spmatrix(
+            data=output,
+            index=df.index,
+            columns=output_columns,
+        )
+    else:
+        vec_df = pandas.DataFrame(
+            data=output,
+            index=df.index,
+            columns=output_columns,
+            copy=False,
+        )
+
+    return _join_columns(df, vec_df)
+
+
+def _join_columns(left: pandas.DataFrame, right: pandas.DataFrame) -> pandas.DataFrame:
+    """
+    Join columns of data frames with the same index. The result is built from
+    arrays of the existing columns, while concat consolidates and copies all
+    blocks of the same dtype and inserting columns one by one is slow.
+    """
+    arrays: Dict[int, Any] = {}
+    for frame in (left, right):
+        for position in range(len(frame.columns)):
+            arrays[len(arrays)] = frame.iloc[:, position].array
+    df = pandas.DataFrame(arrays, index=left.index, copy=False)
+    df.columns = left.columns.append(right.columns)
+    return df
+
+
+def _init_worker(estimator: BaseEstimator, prediction_method: str) -> None:
+    _worker_context["predict"] = getattr(estimator, prediction_method)
+
+
+def _predict_in_worker(X: Any) -> Any:
+    return _worker_context["predict"](X)
+
+
+def _slice_rows(X: Any, start: int, stop: int) -> Any:
+    if isinstance(X, (pandas.DataFrame, pandas.Series)):
+        return X.iloc[start:stop]
+    return X[start:stop]
 
 
 @Stage.register("sklearn_predictor")
@@ -18,8 +140,24 @@ class SklearnPredictor(Stage):
         target_columns: Union[str, List[str]],
         output_columns: Union[str, List[str]],
         feature_columns: Optional[Union[str, List[str]]] = None,
+        output_format: str = "columns",
+        prediction_method: str = "predict",
+        batch_size: Optional[int] = None,
+        n_jobs: Optional[int] = None,
+        backend: str = "thread",
+        classes: Optional[List[Any]] = None,
         **kwargs: Any,
     ) -> None:
+        _check_output_format(output_format, output_columns)
+        if prediction_method not in PREDICTION_METHODS:
+            raise ConfigurationError(
+                f"prediction_method must be one of {PREDICTION_METHODS}: "
+                f"{prediction_method}"
+            )
+        if backend not in BACKENDS:
+            raise ConfigurationError(f"backend must be one of {BACKENDS}: {backend}")
+        if batch_size is not None and batch_size <= 0:
+            raise ConfigurationError("batch_size must be a positive integer.")
         desc = SklearnPredictor._DEF_SKLEARN_PREDICTOR_DESC.format(
             type(estimator).__name__,
             feature_columns or "ALL COLUMNS",
@@ -34,22 +172,67 @@ class SklearnPredictor(Stage):
         self._feature_columns = feature_columns
         self._target_columns = target_columns
         self._output_columns = output_columns
+        self._output_format = output_format
+        self._prediction_method = prediction_method
+        self._batch_size = batch_size
+        self._n_jobs = n_jobs
+        self._backend = backend
+        self._classes = classes
+        self._fitted_feature_columns: Optional[List[str]] = None
+        self._fitted_classes: Optional[List[Any]] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._process_pool_lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        # worker processes are not shared with copies of the stage
+        del state["_process_pool"]
+        del state["_process_pool_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._process_pool = None
+        self._process_pool_lock = threading.Lock()
+
+    def _get_process_pool(self, n_jobs: int) -> ProcessPoolExecutor:
+        """
+        Return worker processes kept by this stage. Workers receive the
+        estimator only once when they start, so they are reused by later
+        transforms until the estimator is fitted again.
+        """
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=n_jobs,
+                    initializer=_init_worker,
+                    initargs=(self._estimator, self._prediction_method),
+                )
+                # workers exit when the stage is garbage collected
+                weakref.finalize(self, self._process_pool.shutdown, wait=False)
+            return self._process_pool
+
+    def _shutdown_process_pool(self) -> None:
+        with self._process_pool_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown()
+                self._process_pool = None
 
     def _prec(self, df: pandas.DataFrame) -> bool:
-        target_columns = self._target_columns
-        if isinstance(target_columns, str):
-            target_columns = [target_columns]
-
-        condition = set(target_columns) <= set(df.columns)
-
+        columns = _as_list(self._target_columns)
         if self._feature_columns is not None:
-            feature_columns = self._feature_columns
-            if isinstance(feature_columns, str):
-                feature_columns = [feature_columns]
+            columns += _as_list(self._feature_columns)
+        return _has_columns(self, df, columns)
 
-            condition = condition and set(feature_columns) <= set(df.columns)
-
-        return condition
+    def _get_feature_columns(self, df: pandas.DataFrame) -> Union[str, List[str]]:
+        if self._feature_columns:
+            return self._feature_columns
+        # feature columns are fixed at fit time to keep their order
+        fitted_feature_columns = getattr(self, "_fitted_feature_columns", None)
+        if fitted_feature_columns is not None:
+            return list(fitted_feature_columns)
+        target_columns = set(_as_list(self._target_columns))
+        return [c for c in df.columns if c not in target_columns]
 
     def _get_X_y(
         self,
@@ -59,28 +242,74 @@ class SklearnPredictor(Stage):
         Union[pandas.DataFrame, pandas.Series],
         Optional[Union[pandas.DataFrame, pandas.Series]],
     ]:
-        if self._feature_columns:
-            feature_columns = self._feature_columns
-        else:
-            target_columns = self._target_columns
-            if isinstance(target_columns, str):
-                target_columns = [target_columns]
-
-            feature_columns = list(set(df.columns) - set(target_columns))
-
-        X = df[feature_columns]
+        feature_columns = self._get_feature_columns(df)
+        X = get_matrix(_select_columns(self, df, feature_columns, "features"))
         y = df[self._target_columns] if return_y else None
         return X, y
 
     def _fit_transform(self, df: pandas.DataFrame, verbose: bool) -> pandas.DataFrame:
+        self._column_indexers.clear()
+        self._fitted_feature_columns = None
+        if not self._feature_columns:
+            self._fitted_feature_columns = _as_list(self._get_feature_columns(df))
+        self._shutdown_process_pool()
         X, y = self._get_X_y(df)
         self._estimator.fit(X, y)
         self.is_fitted = True
         return self._transform(df, verbose)
 
+    def supports_partial_fit(self) -> bool:
+        return hasattr(self._estimator, "partial_fit")
+
+    def requires_classes(self) -> bool:
+        """
+        Return whether all classes of targets must be collected before fitting
+        the classifier on chunks of data.
+        """
+        return (
+            is_classifier(self._estimator)
+            and self._classes is None
+            and getattr(self, "_fitted_classes", None) is None
+        )
+
+    def get_classes(self, df: pandas.DataFrame) -> List[Any]:
+        """Return sorted unique values of the target column of the data frame."""
+        if len(_as_list(self._target_columns)) != 1:
+            raise ConfigurationError(
+                "Classifiers with multiple target columns cannot be fitted "
+                "on chunks of data."
+            )
+        target = df[_as_list(self._target_columns)[0]]
+        return sorted(target.dropna().unique().tolist())
+
+    def _partial_fit(self, df: pandas.DataFrame) -> None:
+        if not self.is_fitted:
+            self._column_indexers.clear()
+            self._fitted_feature_columns = None
+            if not self._feature_columns:
+                self._fitted_feature_columns = _as_list(self._get_feature_columns(df))
+        self._shutdown_process_pool()
+        X, y = self._get_X_y(df)
+        if is_classifier(self._estimator):
+            classes = self._classes
+            if classes is None:
+                classes = getattr(self, "_fitted_classes", None)
+            if classes is None:
+                raise ConfigurationError(
+                    "classes are required to fit classifiers on chunks of data."
+                )
+            self._estimator.partial_fit(X, y, classes=classes)
+        else:
+            self._estimator.partial_fit(X, y)
+
     def _transform(self, df: pandas.DataFrame, verbose: bool) -> pandas.DataFrame:
         X, _ = self._get_X_y(df, return_y=False)
-        output = self._estimator.predict(X)
+        output = self._predict(X)
+
+        if self._output_format == "matrix":
+            return _assemble_output(
+                df, MatrixArray(output), _as_list(self._output_columns)
+            )
 
         if output.ndim == 1:
             output = numpy.expand_dims(output, axis=1)  # type: ignore
@@ -103,21 +332,57 @@ class SklearnPredictor(Stage):
                 f"({len(self._output_columns)} != {output_size})"
             )
 
-        if sparse.issparse(output):
-            vec_df = pandas.DataFrame.sparse.from_spmatrix(
-                data=output,
-                index=df.index,
-                columns=output_columns,
-            )
+        return _assemble_output(df, output, output_columns)
+
+    def _predict(self, X: Any) -> Any:
+        """
+        Predict outputs for row batches of `X`. Batches are processed one by one
+        or by a pool of `n_jobs` workers, and dense outputs are assembled into
+        a preallocated array.
+        """
+        predict = getattr(self._estimator, self._prediction_method)
+
+        n_jobs = self._n_jobs or 1
+        if n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+
+        num_rows = X.shape[0]
+        batch_size = self._batch_size or max(1, math.ceil(num_rows / n_jobs))
+        if num_rows <= batch_size:
+            return predict(X)
+
+        starts = list(range(0, num_rows, batch_size))
+        batches = (_slice_rows(X, start, start + batch_size) for start in starts)
+
+        executor: Optional[Executor] = None
+        if n_jobs > 1 and self._backend == "process":
+            results = self._get_process_pool(n_jobs).map(_predict_in_worker, batches)
+        elif n_jobs > 1:
+            executor = ThreadPoolExecutor(max_workers=n_jobs)
+            results = executor.map(predict, batches)
         else:
-            vec_df = pandas.DataFrame(
-                data=output,
-                index=df.index,
-                columns=output_columns,
-            )
-
-        inter_df = pandas.concat([df, vec_df], axis=1)
-        return inter_df
+            results = map(predict, batches)
+
+        try:
+            output: Optional["numpy.ndarray[Any, Any]"] = None
+            sparse_outputs: List[Any] = []
+            for start, result in zip(starts, results):
+                if sparse.issparse(result):
+                    sparse_outputs.append(result)
+                    continue
+                result = numpy.asarray(result)
+                if output is None:
+                    # fixed-width strings may be truncated by later batches
+                    dtype = object if result.dtype.kind in "SU" else result.dtype
+                    output = numpy.empty((num_rows,) + result.shape[1:], dtype=dtype)
+                output[start : start + len(result)] = result
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if sparse_outputs:
+            return sparse.vstack(sparse_outputs, format="csr")
+        return output
 
 
 @Stage.register("sklearn_transformer")
@@ -130,8 +395,10 @@ class SklearnTransformer(Stage):
         output_columns: Union[str, List[str]],
         feature_columns: Optional[Union[str, List[str]]] = None,
         drop: bool = True,
+        output_format: str = "columns",
         **kwargs: Any,
     ) -> None:
+        _check_output_format(output_format, output_columns)
         desc = SklearnTransformer._DEF_SKLEARN_TRANSFORMER_DESC.format(
             type(transformer).__name__,
             feature_columns or "ALL COLUMNS",
@@ -145,30 +412,58 @@ class SklearnTransformer(Stage):
         self._feature_columns = feature_columns
         self._output_columns = output_columns
         self._drop = drop
+        self._output_format = output_format
+        self._fitted_feature_columns: Optional[List[str]] = None
 
     def _prec(self, df: pandas.DataFrame) -> bool:
         if self._feature_columns is None:
             return True
-        feature_columns = self._feature_columns
-        if isinstance(feature_columns, str):
-            feature_columns = [feature_columns]
-        return set(feature_columns) <= set(df.columns)
+        return _has_columns(self, df, _as_list(self._feature_columns))
+
+    def _get_feature_columns(self, df: pandas.DataFrame) -> Union[str, List[str]]:
+        if self._feature_columns:
+            return self._feature_columns
+        # feature columns are fixed at fit time to keep their order
+        fitted_feature_columns = getattr(self, "_fitted_feature_columns", None)
+        if fitted_feature_columns is not None:
+            return list(fitted_feature_columns)
+        return list(df.columns)
 
     def _fit_transform(self, df: pandas.DataFrame, verbose: bool) -> pandas.DataFrame:
-        X = df[self._feature_columns] if self._feature_columns else df
+        self._column_indexers.clear()
+        self._fitted_feature_columns = None
+        if not self._feature_columns:
+            self._fitted_feature_columns = list(df.columns)
+        feature_columns = self._get_feature_columns(df)
+        X = get_matrix(_select_columns(self, df, feature_columns, "features"))
         self._transformer.fit(X)
         self.is_fitted = True
         return self._transform(df, verbose)
 
-    def _transform(self, df: pandas.DataFrame, verbose: bool) -> pandas.DataFrame:
-        if self._feature_columns:
-            feature_columns = self._feature_columns
-        else:
-            feature_columns = list(df.columns)
+    def supports_partial_fit(self) -> bool:
+        return hasattr(self._transformer, "partial_fit")
+
+    def _partial_fit(self, df: pandas.DataFrame) -> None:
+        if not self.is_fitted:
+            self._column_indexers.clear()
+            self._fitted_feature_columns = None
+            if not self._feature_columns:
+                self._fitted_feature_columns = list(df.columns)
+        feature_columns = self._get_feature_columns(df)
+        X = get_matrix(_select_columns(self, df, feature_columns, "features"))
+        self._transformer.partial_fit(X)
 
-        X = df[feature_columns]
+    def _transform(self, df: pandas.DataFrame, verbose: bool) -> pandas.DataFrame:
+        feature_columns = self._get_feature_columns(df)
+        X = get_matrix(_select_columns(self, df, feature_columns, "features"))
         output = self._transformer.transform(X)
 
+        drop_columns = _as_list(feature_columns) if self._drop else None
+        if self._output_format == "matrix":
+            return _assemble_output(
+                df, MatrixArray(output), _as_list(self._output_columns), drop_columns
+            )
+
         if output.ndim == 1:
             output = numpy.expand_dims(output, axis=1)  # type: ignore
         elif output.ndim > 2:
@@ -200,22 +495,4 @@ class SklearnTransformer(Stage):
                 f"({len(self._output_columns)} != {output_size})"
             )
 
-        if sparse.issparse(output):
-            vec_df = pandas.DataFrame.sparse.from_spmatrix(
-                data=output,
-                index=df.index,
-                columns=output_columns,
-            )
-        else:
-            vec_df = pandas.DataFrame(
-                data=output,
-                index=df.index,
-                columns=output_columns,
-            )
-
-        inter_df = pandas.concat([df, vec_df], axis=1)
-
-        if self._drop:
-            inter_df = inter_df.drop(feature_columns, axis=1)
-
-        return inter_df
+        return _assemble_output(df, output, output_columns, drop_columns)
@@ -1,7 +1,37 @@
-import colt
+import pandas
 import pdpipe
+from pdpipe.exceptions import FailedPreconditionError
 
+from pdpcli.columns import ColumnIndexerCache
+from pdpcli.registrable import LazyRegistrable
 
-class Stage(pdpipe.PdPipelineStage, colt.Registrable):  # type: ignore
+
+class Stage(pdpipe.PdPipelineStage, LazyRegistrable):  # type: ignore
     # pylint: disable=abstract-method
-    pass
+
+    @property
+    def _column_indexers(self) -> ColumnIndexerCache:
+        # created lazily to support stages pickled without the cache
+        indexers = self.__dict__.get("_column_indexer_cache")
+        if indexers is None:
+            indexers = self.__dict__["_column_indexer_cache"] = ColumnIndexerCache()
+        return indexers
+
+    def supports_partial_fit(self) -> bool:
+        """Return whether this stage can be fitted on chunks of data one by one."""
+        return False
+
+    def partial_fit(self, df: pandas.DataFrame) -> None:
+        """
+        Update this stage with a chunk of data without transforming it. The
+        state of the stage is reset by the first call on an unfitted stage.
+        """
+        if not self._compound_prec(df):
+            if self._exraise:
+                raise FailedPreconditionError(self._exmsg)
+            return
+        self._partial_fit(df)
+        self.is_fitted = True
+
+    def _partial_fit(self, df: pandas.DataFrame) -> None:
+        raise NotImplementedError
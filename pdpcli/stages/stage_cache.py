@@ -0,0 +1,123 @@
+"""
+On-disk memoization of stage outputs. The key of each stage output chains the
+key of its input with a fingerprint of the stage, so that only the first data
+frame is hashed and a pipeline with an edited tail recomputes only stages
+after the first changed one. Fitted stages are stored next to outputs to
+restore their state without fitting them again.
+"""
+
+import hashlib
+import logging
+import pickle
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas
+import pdpipe
+
+from pdpcli.cache import Cache, compute_key
+from pdpcli.stages.executor import ApplyFunction, StageHook
+
+logger = logging.getLogger(__name__)
+
+# attributes assigned by pipelines at application time
+_CONTEXT_ATTRIBUTES = ("_fit_context", "_application_context")
+
+
+def fingerprint_dataframe(df: pandas.DataFrame) -> str:
+    digest = hashlib.sha256()
+    digest.update(repr([(column, str(df[column].dtype)) for column in df]).encode())
+    try:
+        hashes = pandas.util.hash_pandas_object(df, index=True)
+        digest.update(hashes.to_numpy().tobytes())
+    except TypeError:
+        # unhashable values such as lists
+        digest.update(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()
+
+
+def fingerprint_stage(stage: pdpipe.PdPipelineStage) -> str:
+    # stages may leave resources such as worker processes out of their state
+    get_state = getattr(stage, "__getstate__", None)
+    state = {
+        key: value
+        for key, value in (get_state() if get_state else vars(stage)).items()
+        if key not in _CONTEXT_ATTRIBUTES
+    }
+    digest = hashlib.sha256()
+    digest.update(f"{type(stage).__module__}.{type(stage).__qualname__}".encode())
+    digest.update(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()
+
+
+class StageCache(StageHook):
+    """Stage hook which stores and restores outputs of stages."""
+
+    def __init__(self, cache: Optional[Cache] = None) -> None:
+        self._cache = cache or Cache.by_name("stages")
+        # data frames are weakly referenced not to keep intermediate outputs
+        self._keys: Dict[int, Tuple["weakref.ref[pandas.DataFrame]", str]] = {}
+        self.hits: List[str] = []
+        self.misses: List[str] = []
+
+    def start(
+        self, pipeline: pdpipe.PdPipelineStage, df: pandas.DataFrame, fit: bool
+    ) -> None:
+        self._keys = {}
+        self.hits = []
+        self.misses = []
+
+    def _get_input_key(self, df: pandas.DataFrame) -> str:
+        ref, key = self._keys.get(id(df), (None, None))
+        if ref is not None and ref() is df and key is not None:
+            return key
+        # inputs not produced by a single stage, e.g. merged outputs
+        key = fingerprint_dataframe(df)
+        self._remember(df, key)
+        return key
+
+    def _remember(self, df: pandas.DataFrame, key: str) -> None:
+        self._keys[id(df)] = (weakref.ref(df), key)
+
+    def apply(
+        self,
+        stage: pdpipe.PdPipelineStage,
+        df: pandas.DataFrame,
+        fit: bool,
+        apply_stage: ApplyFunction,
+    ) -> pandas.DataFrame:
+        key = compute_key(self._get_input_key(df), fingerprint_stage(stage), fit)
+        # outputs are kept apart from pickled stages to store them as columns
+        stage_key = compute_key(key, "stage")
+        output = self._cache.load(key)
+        fitted_stage = (
+            self._cache.load(stage_key) if fit and output is not None else None
+        )
+        if output is not None and (not fit or fitted_stage is not None):
+            logger.info("Load cached output of stage: %s", type(stage).__name__)
+            if fitted_stage is not None:
+                self._restore(stage, fitted_stage)
+            self.hits.append(key)
+        else:
+            output = apply_stage(df)
+            if fit:
+                # fitted stages are saved to restore them on cache hits
+                self._cache.save(stage_key, stage)
+            self._cache.save(key, output)
+            self.misses.append(key)
+
+        self._remember(output, key)
+        return output
+
+    def finish(self, df: pandas.DataFrame) -> None:
+        logger.info("Stage cache: %d hits, %d misses", len(self.hits), len(self.misses))
+        self._keys = {}
+
+    @staticmethod
+    def _restore(stage: pdpipe.PdPipelineStage, fitted_stage: Any) -> None:
+        state = {
+            key: value
+            for key, value in vars(fitted_stage).items()
+            if key not in _CONTEXT_ATTRIBUTES
+        }
+        vars(stage).update(state)
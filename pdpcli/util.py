@@ -1,9 +1,12 @@
 import inspect
 import logging
 import re
+import sys
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Union
 
+from pdpcli.exceptions import ConfigurationError
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,6 +36,64 @@ def filter_kwargs(
     return valid_kwargs
 
 
-def get_file_ext(file_path: Union[str, Path]) -> str:
+def get_file_ext(file_path: Union[str, Path], compound: bool = False) -> str:
+    """
+    Return the extension of the given file. If `compound` is true, return the
+    last two suffixes like `.csv.gz`.
+    """
     file_path = Path(file_path)
+    if compound:
+        return "".join(file_path.suffixes[-2:])
     return file_path.suffix
+
+
+def import_pyarrow(purpose: str = "use parquet or arrow files") -> Any:
+    """
+    Import pyarrow with submodules used by data readers and writers. pyarrow is
+    imported on use since it takes long to import.
+    """
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.feather
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ConfigurationError(f"pyarrow is required to {purpose}.") from e
+    return pyarrow
+
+
+def get_peak_memory_usage() -> Optional[int]:
+    """Return the peak resident set size of this process in bytes if available."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return int(usage) if sys.platform == "darwin" else int(usage) * 1024
+
+
+def copy_on_write_enabled() -> bool:
+    """Return whether the copy-on-write mode of pandas (1.5 or later) is enabled."""
+    import pandas
+
+    try:
+        return bool(pandas.get_option("mode.copy_on_write"))
+    except KeyError:
+        # OptionError of older versions is a subclass of KeyError
+        return False
+
+
+def set_copy_on_write(enabled: bool) -> bool:
+    """
+    Enable or disable the copy-on-write mode of pandas, and return whether
+    the mode is available.
+    """
+    import pandas
+
+    try:
+        pandas.set_option("mode.copy_on_write", enabled)
+    except KeyError:
+        return False
+    return True
@@ -1,3 +1,4 @@
+import pickle
 import tempfile
 from pathlib import Path
 
@@ -5,6 +6,8 @@ import pandas
 
 from pdpcli.commands import create_parser
 from pdpcli.commands.apply import ApplyCommand
+from pdpcli.data import CsvDataReader, DataWriter
+from pdpcli.stages.executor import PipelineExecutor
 
 
 def test_apply_from_config():
@@ -102,3 +105,180 @@ def test_apply_with_cli_args():
         assert len(input_df) == len(output_df)
         assert "name" not in output_df.columns
         assert "job" in output_df.columns
+
+
+def test_apply_with_chunksize():
+    fixture_path = Path("tests/fixture")
+    pipeline_path = fixture_path / "data" / "pipeline.pkl"
+    input_file = fixture_path / "data" / "data.csv"
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        output_file = tempdir / "output.csv"
+
+        parser = create_parser()
+        args = parser.parse_args(
+            [
+                "apply",
+                str(pipeline_path),
+                str(input_file),
+                "-o",
+                str(output_file),
+                "--chunksize",
+                "2",
+            ]
+        )
+
+        args.func(args)
+
+        assert output_file.is_file()
+
+        input_df = pandas.read_csv(input_file)
+        output_df = pandas.read_csv(output_file)
+
+        assert len(input_df) == len(output_df)
+        assert "name" not in output_df.columns
+        assert "job" not in output_df.columns
+
+
+def test_apply_with_prefetch():
+    fixture_path = Path("tests/fixture")
+    pipeline_path = fixture_path / "data" / "pipeline.pkl"
+    input_file = fixture_path / "data" / "data.csv"
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        output_files = [tempdir / "output.csv", tempdir / "prefetch.csv"]
+
+        parser = create_parser()
+        for output_file, options in zip(output_files, [[], ["--prefetch", "2"]]):
+            args = parser.parse_args(
+                [
+                    "apply",
+                    str(pipeline_path),
+                    str(input_file),
+                    "-o",
+                    str(output_file),
+                    "--chunksize",
+                    "2",
+                    "--quiet",
+                ]
+                + options
+            )
+            args.func(args)
+
+        expected_df, output_df = [pandas.read_csv(path) for path in output_files]
+        assert output_df.equals(expected_df)
+
+
+def test_apply_to_multiple_files_with_workers():
+    fixture_path = Path("tests/fixture")
+    pipeline_path = fixture_path / "data" / "pipeline.pkl"
+    input_files = [fixture_path / "data" / name for name in ("test.csv", "train.csv")]
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        output_file = tempdir / "output.csv"
+
+        parser = create_parser()
+        args = parser.parse_args(
+            [
+                "apply",
+                str(pipeline_path),
+                str(fixture_path / "data" / "t*.csv"),
+                "-o",
+                str(output_file),
+                "--workers",
+                "2",
+                "--concat",
+            ]
+        )
+
+        args.func(args)
+
+        assert output_file.is_file()
+
+        input_df = pandas.concat([pandas.read_csv(path) for path in input_files])
+        output_df = pandas.read_csv(output_file)
+
+        assert len(input_df) == len(output_df)
+        assert "name" not in output_df.columns
+
+
+def test_apply_to_multiple_files_separately():
+    fixture_path = Path("tests/fixture")
+    pipeline_path = fixture_path / "data" / "pipeline.pkl"
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+
+        parser = create_parser()
+        args = parser.parse_args(
+            [
+                "apply",
+                str(pipeline_path),
+                str(fixture_path / "data" / "t*.csv"),
+                "-o",
+                str(tempdir / "{stem}.jsonl"),
+                "--quiet",
+            ]
+        )
+
+        args.func(args)
+
+        assert (tempdir / "test.jsonl").is_file()
+        assert (tempdir / "train.jsonl").is_file()
+
+
+def test_apply_file_in_worker_streams_chunks():
+    fixture_path = Path("tests/fixture")
+    with open(fixture_path / "data" / "pipeline.pkl", "rb") as fp:
+        pipeline = pickle.load(fp)
+    input_file = str(fixture_path / "data" / "train.csv")
+
+    written = []
+
+    class RecordingWriter(DataWriter):
+        def write_chunks(self, dfs, file_path):
+            # chunks must be streamed instead of collected before writing
+            assert not isinstance(dfs, list)
+            written.extend(dfs)
+
+    ApplyCommand._init_worker(
+        pipeline, PipelineExecutor(), CsvDataReader(), RecordingWriter()
+    )
+    num_rows = ApplyCommand._apply_file_in_worker(input_file, "output.csv", 5, False)
+    assert num_rows == len(pandas.read_csv(input_file))
+    assert sum(len(df) for df in written) == num_rows
+
+    results = ApplyCommand._apply_file_in_worker(input_file, None, 5, True)
+    assert [len(df) for df in results] == [len(df) for df in written]
+
+
+def test_apply_with_low_memory():
+    fixture_path = Path("tests/fixture")
+    config_path = fixture_path / "configs" / "config.yml"
+    input_file = fixture_path / "data" / "data.csv"
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        parser = create_parser()
+
+        output_dfs = []
+        for options in ([], ["--low-memory"]):
+            output_file = tempdir / "output.csv"
+            args = parser.parse_args(
+                [
+                    "apply",
+                    str(config_path),
+                    str(input_file),
+                    "-o",
+                    str(output_file),
+                    "--quiet",
+                    *options,
+                ]
+            )
+            args.func(args)
+            output_dfs.append(pandas.read_csv(output_file))
+
+        assert output_dfs[0].equals(output_dfs[1])
@@ -0,0 +1,117 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas
+import pytest
+
+from pdpcli.commands import create_parser
+from pdpcli.commands.apply import ApplyCommand
+from pdpcli.commands.batch import BatchCommand  # noqa: F401
+
+
+def test_batch():
+    fixture_path = Path("tests/fixture")
+    pipeline_path = fixture_path / "data" / "pipeline.pkl"
+    config_path = fixture_path / "configs" / "config.yml"
+    input_file = fixture_path / "data" / "data.csv"
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        manifest_path = tempdir / "manifest.jsonl"
+        report_path = tempdir / "report.jsonl"
+        entries = [
+            {"pipeline": str(pipeline_path), "input_file": str(input_file)},
+            {
+                "pipeline": str(pipeline_path),
+                "input_file": str(input_file),
+                "output_file": str(tempdir / "output_0.csv"),
+            },
+            {
+                "pipeline": str(pipeline_path),
+                "input_file": str(input_file),
+                "output_file": str(tempdir / "output_1.jsonl"),
+                "chunksize": 2,
+            },
+            {
+                "pipeline": str(config_path),
+                "input_file": str(input_file),
+                "output_file": str(tempdir / "output_2.csv"),
+            },
+            {"pipeline": str(pipeline_path), "input_file": str(tempdir / "x.csv")},
+        ]
+        with manifest_path.open("w") as fp:
+            for entry in entries:
+                fp.write(json.dumps(entry) + "\n")
+
+        parser = create_parser()
+        args = parser.parse_args(
+            [
+                "batch",
+                str(manifest_path),
+                "--workers",
+                "2",
+                "--report",
+                str(report_path),
+            ]
+        )
+
+        load_pipeline = ApplyCommand._load_pipeline_from_pickle
+        with patch.object(
+            ApplyCommand, "_load_pipeline_from_pickle", side_effect=load_pipeline
+        ) as mock_load, patch(
+            # not available on minato 0.6.1
+            "minato.exists",
+            create=True,
+            side_effect=AssertionError,
+        ), pytest.raises(
+            SystemExit
+        ):
+            args.func(args)
+        mock_load.assert_called_once()
+
+        with report_path.open() as fp:
+            reports = [json.loads(line) for line in fp]
+        assert [report["status"] for report in reports] == ["succeeded"] * 4 + [
+            "failed"
+        ]
+        assert "error" in reports[-1]
+
+        num_rows = len(pandas.read_csv(input_file))
+        assert reports[0]["rows"] == num_rows
+        assert len(pandas.read_csv(tempdir / "output_0.csv")) == num_rows
+        assert len(pandas.read_json(tempdir / "output_1.jsonl", lines=True)) == num_rows
+        assert "name" not in pandas.read_csv(tempdir / "output_2.csv").columns
+
+
+def test_batch_fits_config_pipelines_for_each_entry():
+    fixture_path = Path("tests/fixture")
+    config_path = fixture_path / "configs" / "config.yml"
+    input_file = fixture_path / "data" / "data.csv"
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        other_input_file = tempdir / "other.csv"
+        df = pandas.read_csv(input_file)
+        df["sex"] = "X"
+        df.to_csv(other_input_file, index=False)
+
+        manifest_path = tempdir / "manifest.jsonl"
+        with manifest_path.open("w") as fp:
+            for i, path in enumerate([input_file, other_input_file] * 2):
+                entry = {
+                    "pipeline": str(config_path),
+                    "input_file": str(path),
+                    "output_file": str(tempdir / f"output_{i}.csv"),
+                }
+                fp.write(json.dumps(entry) + "\n")
+
+        parser = create_parser()
+        args = parser.parse_args(["batch", str(manifest_path), "--workers", "2"])
+        args.func(args)
+
+        for i in range(4):
+            columns = list(pandas.read_csv(tempdir / f"output_{i}.csv").columns)
+            # categories are learned from each input file
+            assert ("sex_M" in columns) == (i % 2 == 0)
@@ -1,8 +1,14 @@
+import pickle
 import tempfile
 from pathlib import Path
 
+import pandas
+import pytest
+
 from pdpcli.commands import create_parser
+from pdpcli.commands.apply import ApplyCommand  # noqa: F401
 from pdpcli.commands.build import BuildCommand
+from pdpcli.exceptions import ConfigurationError
 
 
 def test_build_without_input_file():
@@ -50,3 +56,255 @@ def test_build_with_input_file():
         args.func(args)
 
         assert pipeline_path.is_file()
+
+
+def test_build_with_prune_columns():
+    fixture_path = Path("tests/fixture")
+    config_path = fixture_path / "configs" / "config.yml"
+    input_file = fixture_path / "data" / "data.csv"
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        pipeline_path = tempdir / "pipeline.pkl"
+
+        parser = create_parser()
+        args = parser.parse_args(
+            [
+                "build",
+                str(config_path),
+                str(pipeline_path),
+                "-i",
+                str(input_file),
+                "--prune-columns",
+            ]
+        )
+
+        args.func(args)
+
+        assert pipeline_path.is_file()
+
+
+def test_build_with_save_schema():
+    fixture_path = Path("tests/fixture")
+    config_path = fixture_path / "configs" / "config.yml"
+    input_file = fixture_path / "data" / "train.csv"
+    test_file = fixture_path / "data" / "test.csv"
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        pipeline_path = tempdir / "pipeline.pkl"
+        output_file = tempdir / "output.csv"
+
+        parser = create_parser()
+        args = parser.parse_args(
+            [
+                "build",
+                str(config_path),
+                str(pipeline_path),
+                "-i",
+                str(input_file),
+                "--save-schema",
+            ]
+        )
+
+        args.func(args)
+
+        assert pipeline_path.is_file()
+        assert Path(f"{pipeline_path}.schema.json").is_file()
+
+        args = parser.parse_args(
+            [
+                "apply",
+                str(pipeline_path),
+                str(test_file),
+                "-o",
+                str(output_file),
+            ]
+        )
+
+        args.func(args)
+
+        assert output_file.is_file()
+
+
+def test_build_artifact():
+    fixture_path = Path("tests/fixture")
+    config_path = fixture_path / "configs" / "config.yml"
+    input_file = fixture_path / "data" / "train.csv"
+    test_file = fixture_path / "data" / "test.csv"
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        pipeline_path = tempdir / "pipeline.pdp"
+        output_file = tempdir / "output.csv"
+
+        parser = create_parser()
+        args = parser.parse_args(
+            ["build", str(config_path), str(pipeline_path), "-i", str(input_file)]
+        )
+
+        args.func(args)
+
+        assert pipeline_path.is_file()
+
+        args = parser.parse_args(
+            ["apply", str(pipeline_path), str(test_file), "-o", str(output_file)]
+        )
+
+        args.func(args)
+
+        assert output_file.is_file()
+
+
+def test_build_with_chunksize():
+    fixture_path = Path("tests/fixture")
+    input_file = fixture_path / "data" / "train.csv"
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        config_path = tempdir / "config.yml"
+        pipeline_path = tempdir / "pipeline.pkl"
+        config_path.write_text(
+            "\n".join(
+                [
+                    "pipeline:",
+                    "  type: pipeline",
+                    "  stages:",
+                    "    hash:",
+                    "      type: sklearn_transformer",
+                    "      transformer:",
+                    "        type: sklearn.feature_extraction.text.HashingVectorizer",
+                    "        n_features: 16",
+                    "      feature_columns: content",
+                    "      output_columns: features",
+                    "      output_format: matrix",
+                    "    predict:",
+                    "      type: sklearn_predictor",
+                    "      estimator:",
+                    "        type: sklearn.linear_model.SGDClassifier",
+                    "      feature_columns: features",
+                    "      target_columns: sex",
+                    "      output_columns: prediction",
+                ]
+            )
+        )
+
+        parser = create_parser()
+        args = parser.parse_args(
+            [
+                "build",
+                str(config_path),
+                str(pipeline_path),
+                "-i",
+                str(input_file),
+                "--chunksize",
+                "5",
+                "--epochs",
+                "2",
+            ]
+        )
+
+        args.func(args)
+
+        with open(pipeline_path, "rb") as fp:
+            pipeline = pickle.load(fp)
+        assert pipeline.is_fitted
+        output = pipeline.transform(pandas.read_csv(input_file))
+        assert set(output["prediction"]) <= {"F", "M"}
+
+
+@pytest.mark.parametrize(
+    "option",
+    [["--low-memory"], ["--profile"], ["--profile-trace", "trace.json"]],
+)
+def test_build_with_chunksize_rejects_stage_hooks(option):
+    fixture_path = Path("tests/fixture")
+    parser = create_parser()
+    args = parser.parse_args(
+        [
+            "build",
+            str(fixture_path / "configs" / "config.yml"),
+            "pipeline.pkl",
+            "-i",
+            str(fixture_path / "data" / "train.csv"),
+            "--chunksize",
+            "5",
+            *option,
+        ]
+    )
+    with pytest.raises(ConfigurationError):
+        args.func(args)
+
+
+def test_build_with_sample_rows():
+    fixture_path = Path("tests/fixture")
+    config_path = fixture_path / "configs" / "config.yml"
+    input_file = fixture_path / "data" / "train.csv"
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        pipeline_path = tempdir / "pipeline.pkl"
+
+        parser = create_parser()
+        args = parser.parse_args(
+            [
+                "build",
+                str(config_path),
+                str(pipeline_path),
+                "-i",
+                str(input_file),
+                "--sample-rows",
+                "10",
+                "--sample-seed",
+                "1",
+            ]
+        )
+
+        args.func(args)
+
+        assert pipeline_path.is_file()
+
+
+def test_build_with_low_memory():
+    fixture_path = Path("tests/fixture")
+    input_file = fixture_path / "data" / "train.csv"
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        config_path = tempdir / "config.yml"
+        pipeline_path = tempdir / "pipeline.pkl"
+        config_path.write_text(
+            "\n".join(
+                [
+                    "pipeline:",
+                    "  type: pipeline",
+                    "  stages:",
+                    "    encode:",
+                    "      type: one_hot_encode",
+                    "      columns: sex",
+                    "    select:",
+                    "      type: select_columns",
+                    "      columns: [job, name]",
+                ]
+            )
+        )
+
+        parser = create_parser()
+        args = parser.parse_args(
+            [
+                "build",
+                str(config_path),
+                str(pipeline_path),
+                "-i",
+                str(input_file),
+                "--low-memory",
+            ]
+        )
+
+        # columns selected by the last stage are kept while fitting
+        args.func(args)
+
+        with open(pipeline_path, "rb") as fp:
+            pipeline = pickle.load(fp)
+        output = pipeline.transform(pandas.read_csv(input_file))
+        assert list(output.columns) == ["job", "name"]
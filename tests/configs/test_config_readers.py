@@ -1,10 +1,18 @@
+import json
+import os
+import tempfile
 from pathlib import Path
+from typing import List
+from unittest.mock import patch
 
+from pdpcli.cache import Cache
 from pdpcli.configs.config_readers import (
+    CachedConfigReader,
     JsonConfigReader,
     JsonnetConfigReader,
     YamlConfigReader,
 )
+from pdpcli.configs.jsonnet import load_jsonnet
 
 FIXTURE_PATH = Path("tests/fixture")
 
@@ -28,3 +36,76 @@ def test_jsonnet_config_reader():
     reader = JsonnetConfigReader()
     config = reader.read(config_path)
     assert isinstance(config, dict)
+
+
+def test_jsonnet_config_reader_with_imports():
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        (tempdir / "lib.libsonnet").write_text("{ a: 1 }")
+        config_path = tempdir / "config.jsonnet"
+        config_path.write_text('(import "lib.libsonnet") + { b: 2 }')
+
+        assert JsonnetConfigReader().read(config_path) == {"a": 1, "b": 2}
+
+        # jsonnet before 0.19.0 takes contents of imported files as strings
+        imported_files: List[str] = []
+        with patch("pdpcli.configs.jsonnet.JSONNET_VERSION", "v0.17.0"), patch(
+            "pdpcli.configs.jsonnet.evaluate_file",
+            side_effect=lambda file_path, import_callback, **kwargs: json.dumps(
+                import_callback(str(tempdir) + "/", "lib.libsonnet")[1]
+            ),
+        ):
+            content = load_jsonnet(config_path, imported_files=imported_files)
+        assert content == "{ a: 1 }"
+        assert imported_files == [str(tempdir / "lib.libsonnet")]
+
+
+def test_config_reader_finds_sources():
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        (tempdir / "lib.libsonnet").write_text('{ name: std.extVar("PDP_NAME") }')
+        config_path = tempdir / "config.jsonnet"
+        config_path.write_text('(import "lib.libsonnet") + { b: "${oc.env:PDP_B,x}" }')
+
+        with patch.dict(os.environ, {"PDP_NAME": "foo"}):
+            config, sources = JsonnetConfigReader().read_with_sources(config_path)
+
+        assert config == {"name": "foo", "b": "x"}
+        assert sorted(Path(path).name for path in sources.files) == [
+            "config.jsonnet",
+            "lib.libsonnet",
+        ]
+        assert sources.env_vars == ["PDP_B", "PDP_NAME"]
+
+
+def test_cached_config_reader():
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        lib_path = tempdir / "lib.libsonnet"
+        lib_path.write_text('{ a: 1, name: std.extVar("PDP_NAME") }')
+        config_path = tempdir / "config.jsonnet"
+        config_path.write_text('(import "lib.libsonnet") + { b: 2 }')
+
+        cache = Cache(tempdir / "cache")
+        reader = CachedConfigReader(JsonnetConfigReader(), cache)
+
+        with patch.dict(os.environ, {"PDP_NAME": "foo"}):
+            config = reader.read(config_path)
+            assert config == {"a": 1, "b": 2, "name": "foo"}
+            assert len(cache.entries()) == 1
+
+            with patch("pdpcli.configs.config_readers.load_jsonnet") as load_jsonnet:
+                assert reader.read(config_path) == config
+            load_jsonnet.assert_not_called()
+
+            # overrides are cached separately
+            assert reader.read(config_path, ["b=3"])["b"] == 3
+            assert len(cache.entries()) == 2
+
+            # modified imported files invalidate cached configs
+            lib_path.write_text('{ a: 10, name: std.extVar("PDP_NAME") }')
+            assert reader.read(config_path)["a"] == 10
+
+        # so do modified environment variables
+        with patch.dict(os.environ, {"PDP_NAME": "bar"}):
+            assert reader.read(config_path)["name"] == "bar"
@@ -0,0 +1,39 @@
+import gzip
+import tempfile
+from pathlib import Path
+
+import pandas
+import pytest
+
+from pdpcli.data import DataReader, DataWriter
+from pdpcli.data.compression import open_file
+
+
+@pytest.mark.parametrize("ext", [".csv.gz", ".csv.bz2", ".csv.zst", ".jsonl.gz"])
+def test_read_and_write_compressed_files(ext):
+    df = pandas.DataFrame({"a": list(range(1000)), "b": ["x", "y"] * 500})
+    with tempfile.TemporaryDirectory() as tempdir:
+        file_path = Path(tempdir) / f"data{ext}"
+
+        writer = DataWriter.from_path(file_path, compression_threads=2)
+        writer.write(df, file_path)
+
+        reader = DataReader.from_path(file_path)
+        assert reader.read(file_path).equals(df)
+
+        chunks = list(reader.read_chunks(file_path, chunksize=300))
+        assert [len(chunk) for chunk in chunks] == [300, 300, 300, 100]
+
+
+def test_parallel_compression_writes_valid_multi_member_gzip():
+    text = "".join(f"line {i}\n" for i in range(10000))
+    with tempfile.TemporaryDirectory() as tempdir:
+        file_path = Path(tempdir) / "data.txt.gz"
+        with open_file(file_path, "w", "gzip", num_threads=4, block_size=1024) as fp:
+            fp.write(text)
+
+        with gzip.open(file_path, "rt") as fp:
+            assert fp.read() == text
+
+        with open_file(file_path, "r", "gzip", block_size=1024) as fp:
+            assert fp.read() == text
@@ -1,14 +1,23 @@
+import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
 import pandas
+import pytest
 
+from pdpcli.cache import Cache
 from pdpcli.data.data_readers import (
+    ArrowDataReader,
+    CachedDataReader,
     CsvDataReader,
+    FeatherDataReader,
     JsonLinesDataReader,
+    ParquetDataReader,
     PickleDataReader,
     SqlDataReader,
     TsvDataReader,
 )
+from pdpcli.exceptions import ConfigurationError
 
 FIXTURE_DIR = Path("./tests/fixture/")
 
@@ -52,3 +61,129 @@ def test_sql_data_reader():
     df = reader.read(input_file)
 
     assert isinstance(df, pandas.DataFrame)
+
+
+def test_csv_data_reader_read_chunks():
+    input_file = FIXTURE_DIR / "data" / "data.csv"
+    reader = CsvDataReader()
+    chunks = list(reader.read_chunks(input_file, chunksize=2))
+
+    assert all(len(chunk) <= 2 for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == len(reader.read(input_file))
+
+
+def test_jsonl_data_reader_read_chunks():
+    input_file = FIXTURE_DIR / "data" / "data.jsonl"
+    reader = JsonLinesDataReader()
+    chunks = list(reader.read_chunks(input_file, chunksize=2))
+
+    assert all(len(chunk) <= 2 for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == len(reader.read(input_file))
+
+
+def test_sql_data_reader_read_chunks():
+    input_file = FIXTURE_DIR / "data" / "query.sql"
+    dsn = "sqlite:///tests/fixture/data/data.db"
+    reader = SqlDataReader(dsn=dsn)
+    chunks = list(reader.read_chunks(input_file, chunksize=2))
+
+    assert all(len(chunk) <= 2 for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == len(reader.read(input_file))
+
+
+def test_parquet_data_reader():
+    input_file = FIXTURE_DIR / "data" / "data.parquet"
+    reader = ParquetDataReader(columns=["name", "sex"], filters=[("sex", "=", "F")])
+    df = reader.read(input_file)
+
+    assert isinstance(df, pandas.DataFrame)
+    assert list(df.columns) == ["name", "sex"]
+    assert set(df["sex"]) == {"F"}
+
+
+def test_parquet_data_reader_read_chunks():
+    input_file = FIXTURE_DIR / "data" / "data.parquet"
+    reader = ParquetDataReader(columns=["name"])
+    chunks = list(reader.read_chunks(input_file, chunksize=2))
+
+    assert all(len(chunk) <= 2 for chunk in chunks)
+    assert all(list(chunk.columns) == ["name"] for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == len(reader.read(input_file))
+
+
+def test_feather_data_reader():
+    input_file = FIXTURE_DIR / "data" / "data.feather"
+    reader = FeatherDataReader(columns=["name", "sex"])
+    df = reader.read(input_file)
+
+    assert isinstance(df, pandas.DataFrame)
+    assert list(df.columns) == ["name", "sex"]
+
+
+def test_arrow_data_reader_read_chunks():
+    input_file = FIXTURE_DIR / "data" / "data.arrow"
+    reader = ArrowDataReader(columns=["sex"])
+    chunks = list(reader.read_chunks(input_file, chunksize=3))
+
+    assert all(len(chunk) <= 3 for chunk in chunks)
+    assert all(list(chunk.columns) == ["sex"] for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == len(reader.read(input_file))
+
+
+def test_arrow_data_reader_read_chunks_with_unknown_columns():
+    input_file = FIXTURE_DIR / "data" / "data.arrow"
+    reader = ArrowDataReader(columns=["sex", "unknown"])
+    with pytest.raises(ConfigurationError):
+        list(reader.read_chunks(input_file, chunksize=3))
+
+
+def test_arrow_data_reader_read_chunks_keeps_column_order():
+    input_file = FIXTURE_DIR / "data" / "data.arrow"
+    reader = ArrowDataReader(columns=["sex", "name"])
+    chunks = list(reader.read_chunks(input_file, chunksize=3))
+
+    assert all(list(chunk.columns) == ["sex", "name"] for chunk in chunks)
+
+
+def test_sql_data_reader_with_streaming_chunksize():
+    input_file = FIXTURE_DIR / "data" / "query.sql"
+    dsn = "sqlite:///tests/fixture/data/data.db"
+    reader = SqlDataReader(dsn=dsn, chunksize=2)
+    df = reader.read(input_file)
+
+    assert isinstance(df, pandas.DataFrame)
+    assert len(df) == len(SqlDataReader(dsn=dsn).read(input_file))
+
+
+def test_cached_data_reader():
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        file_path = tempdir / "data.csv"
+        pandas.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]}).to_csv(
+            file_path, index=False
+        )
+
+        cache = Cache(tempdir / "cache")
+        reader = CachedDataReader(CsvDataReader(), cache)
+
+        df = reader.read(file_path)
+        assert len(cache.entries()) == 1
+
+        with patch("pandas.read_csv") as read_csv:
+            cached_df = reader.read(file_path)
+        read_csv.assert_not_called()
+        assert cached_df.equals(df)
+
+        # chunks are streamed from the file instead of loading cached data
+        with patch.object(reader._cache, "load") as load:
+            chunks = list(reader.read_chunks(file_path, chunksize=2))
+        load.assert_not_called()
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+
+        # different options and modified files are cached separately
+        CachedDataReader(CsvDataReader(usecols=["a"]), cache).read(file_path)
+        assert len(cache.entries()) == 2
+
+        pandas.DataFrame({"a": [1]}).to_csv(file_path, index=False)
+        assert len(reader.read(file_path)) == 1
+        assert len(cache.entries()) == 3
@@ -1,16 +1,25 @@
 import os
 import sqlite3
 import tempfile
+from types import SimpleNamespace
 
 import pandas
+from scipy import sparse
 
+from pdpcli.data.data_readers import NpzDataReader
 from pdpcli.data.data_writers import (
+    ArrowDataWriter,
     CsvDataWriter,
+    FeatherDataWriter,
     JsonLinesDataWriter,
+    NpzDataWriter,
+    ParquetDataWriter,
     PickleDataWriter,
     SqlDataWriter,
     TsvDataWriter,
+    insert_with_copy,
 )
+from pdpcli.matrix import MatrixArray
 
 
 def _generate_dataframe():
@@ -106,3 +115,210 @@ def test_sql_data_reader():
         assert "age" in exported_df.columns
     finally:
         os.remove(temp_file.name)
+
+
+def test_csv_data_writer_write_chunks():
+    df = _generate_dataframe()
+    writer = CsvDataWriter()
+
+    try:
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            writer.write_chunks([df, df], temp_file.name)
+
+        exported_df = pandas.read_csv(temp_file.name)
+        assert list(exported_df.columns) == ["name", "age"]
+        assert len(exported_df) == 2 * len(df)
+    finally:
+        os.remove(temp_file.name)
+
+
+def test_jsonl_data_writer_write_chunks():
+    df = _generate_dataframe()
+    writer = JsonLinesDataWriter()
+
+    try:
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            writer.write_chunks([df, df], temp_file.name)
+
+        exported_df = pandas.read_json(temp_file.name, orient="records", lines=True)
+        assert list(exported_df.columns) == ["name", "age"]
+        assert len(exported_df) == 2 * len(df)
+    finally:
+        os.remove(temp_file.name)
+
+
+def test_sql_data_writer_write_chunks():
+    df = _generate_dataframe()
+
+    try:
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            dsn = f"sqlite:////{temp_file.name}"
+            writer = SqlDataWriter(dsn=dsn)
+            writer.write_chunks([df, df], "test_table")
+
+        query = "select * from test_table"
+        with sqlite3.connect(temp_file.name) as con:
+            exported_df = pandas.read_sql(query, con=con)
+        assert len(exported_df) == 2 * len(df)
+    finally:
+        os.remove(temp_file.name)
+
+
+def test_parquet_data_writer():
+    df = _generate_dataframe()
+    writer = ParquetDataWriter(compression="zstd")
+
+    try:
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            writer.write_chunks([df, df], temp_file.name)
+
+        exported_df = pandas.read_parquet(temp_file.name)
+        assert list(exported_df.columns) == ["name", "age"]
+        assert len(exported_df) == 2 * len(df)
+    finally:
+        os.remove(temp_file.name)
+
+
+def test_feather_data_writer():
+    df = _generate_dataframe()
+    writer = FeatherDataWriter()
+
+    try:
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            writer.write(df, temp_file.name)
+
+        exported_df = pandas.read_feather(temp_file.name)
+        assert list(exported_df.columns) == ["name", "age"]
+        assert len(exported_df) == len(df)
+    finally:
+        os.remove(temp_file.name)
+
+
+def test_arrow_data_writer():
+    df = _generate_dataframe()
+    writer = ArrowDataWriter()
+
+    try:
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            writer.write_chunks([df, df], temp_file.name)
+
+        exported_df = pandas.read_feather(temp_file.name)
+        assert list(exported_df.columns) == ["name", "age"]
+        assert len(exported_df) == 2 * len(df)
+    finally:
+        os.remove(temp_file.name)
+
+
+def test_sql_data_writer_with_bulk_insert():
+    df = _generate_dataframe()
+
+    try:
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            dsn = f"sqlite:////{temp_file.name}"
+            writer = SqlDataWriter(dsn=dsn, method="bulk", chunksize=2)
+            writer.write_chunks([df, df], "test_table")
+
+        query = "select * from test_table"
+        with sqlite3.connect(temp_file.name) as con:
+            exported_df = pandas.read_sql(query, con=con)
+        assert len(exported_df) == 2 * len(df)
+    finally:
+        os.remove(temp_file.name)
+
+
+def test_insert_with_copy():
+    class Cursor:
+        def __init__(self):
+            self.statements = []
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def copy_expert(self, sql, buffer):
+            self.statements.append((sql, buffer.read()))
+
+    cursor = Cursor()
+    table = SimpleNamespace(name="test_table", schema="public")
+    conn = SimpleNamespace(connection=SimpleNamespace(cursor=lambda: cursor))
+
+    num_rows = insert_with_copy(
+        table, conn, ["name", "age"], [("foo", 10), ("bar", None)]
+    )
+
+    assert num_rows == 2
+    assert cursor.statements == [
+        (
+            'COPY "public"."test_table" ("name", "age") FROM STDIN WITH CSV',
+            "foo,10\r\nbar,\r\n",
+        )
+    ]
+
+
+def _generate_dataframe_with_matrices():
+    df = _generate_dataframe()
+    df["dense"] = MatrixArray([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+    df["sparse"] = MatrixArray(sparse.csr_matrix([[0.0, 1.0], [0.0, 0.0], [2.0, 0.0]]))
+    return df
+
+
+def test_csv_data_writer_with_matrix_columns():
+    df = _generate_dataframe_with_matrices()
+    writer = CsvDataWriter()
+
+    try:
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            writer.write_chunks([df, df], temp_file.name)
+
+        exported_df = pandas.read_csv(temp_file.name)
+        assert list(exported_df.columns) == [
+            "name",
+            "age",
+            "dense_0",
+            "dense_1",
+            "sparse_0",
+            "sparse_1",
+        ]
+        assert exported_df["dense_1"].tolist() == [2.0, 4.0, 6.0] * 2
+        assert exported_df["sparse_0"].tolist() == [0.0, 0.0, 2.0] * 2
+    finally:
+        os.remove(temp_file.name)
+
+
+def test_jsonl_data_writer_with_matrix_columns():
+    df = _generate_dataframe_with_matrices()
+    writer = JsonLinesDataWriter()
+
+    try:
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            writer.write_chunks([df], temp_file.name)
+
+        exported_df = pandas.read_json(temp_file.name, lines=True)
+        assert exported_df["sparse_1"].tolist() == [1.0, 0.0, 0.0]
+    finally:
+        os.remove(temp_file.name)
+
+
+def test_npz_data_writer():
+    df = _generate_dataframe_with_matrices()
+    df["category"] = pandas.Categorical(["a", "b", "a"])
+    writer = NpzDataWriter(compressed=True)
+
+    try:
+        with tempfile.NamedTemporaryFile(suffix=".npz", delete=False) as temp_file:
+            writer.write_chunks([df, df], temp_file.name)
+
+        exported_df = NpzDataReader().read(temp_file.name)
+        assert list(exported_df.columns) == list(df.columns)
+        assert exported_df["name"].tolist() == df["name"].tolist() * 2
+        assert exported_df["category"].dtype == "category"
+        assert sparse.issparse(exported_df["sparse"].array.matrix)
+        assert (
+            exported_df["sparse"].array.matrix.toarray()
+            == sparse.vstack([df["sparse"].array.matrix] * 2).toarray()
+        ).all()
+        assert (exported_df["dense"].array.matrix[3:] == df["dense"].array.matrix).all()
+    finally:
+        os.remove(temp_file.name)
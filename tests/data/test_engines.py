@@ -0,0 +1,12 @@
+from pdpcli.data.engines import dispose_engines, get_engine
+
+
+def test_get_engine_reuses_engines():
+    dsn = "sqlite:///tests/fixture/data/data.db"
+    try:
+        engine = get_engine(dsn)
+
+        assert get_engine(dsn) is engine
+        assert get_engine(dsn, echo=True) is not engine
+    finally:
+        dispose_engines()
@@ -0,0 +1,96 @@
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Union
+
+import pandas
+import pytest
+
+from pdpcli.data.data_readers import DataReader
+from pdpcli.data.data_writers import DataWriter
+from pdpcli.data.prefetch import BackgroundDataWriter, PrefetchDataReader, prefetch
+
+
+class _EventReader(DataReader):
+    def __init__(self, num_chunks: int) -> None:
+        self.read_events = [threading.Event() for _ in range(num_chunks)]
+
+    def read_chunks(
+        self, file_path: Union[str, Path], chunksize: int
+    ) -> Iterator[pandas.DataFrame]:
+        for i, event in enumerate(self.read_events):
+            event.set()
+            yield pandas.DataFrame({"a": [i] * chunksize})
+
+
+class _EventWriter(DataWriter):
+    def __init__(self, num_chunks: int) -> None:
+        self.write_events = [threading.Event() for _ in range(num_chunks)]
+        self.dfs: List[pandas.DataFrame] = []
+
+    def write_chunks(
+        self, dfs: Iterable[pandas.DataFrame], file_path: Union[str, Path]
+    ) -> None:
+        for df, event in zip(dfs, self.write_events):
+            self.dfs.append(df)
+            event.set()
+
+
+def test_prefetch_data_reader():
+    reader = _EventReader(4)
+    chunks = PrefetchDataReader(reader, max_chunks=2).read_chunks("x", 3)
+
+    outputs = []
+    for i, chunk in enumerate(chunks):
+        # the next chunk is read while the current one is processed
+        if i + 1 < len(reader.read_events):
+            assert reader.read_events[i + 1].wait(timeout=10)
+        outputs.append(chunk)
+    assert [chunk["a"].iloc[0] for chunk in outputs] == [0, 1, 2, 3]
+
+
+def test_background_data_writer():
+    writer = _EventWriter(4)
+
+    def results() -> Iterator[pandas.DataFrame]:
+        for i in range(4):
+            # previous chunks are written while the next one is produced
+            if i > 0:
+                assert writer.write_events[i - 1].wait(timeout=10)
+            yield pandas.DataFrame({"a": [i]})
+
+    BackgroundDataWriter(writer, max_chunks=2).write_chunks(results(), "x")
+    assert [df["a"].iloc[0] for df in writer.dfs] == [0, 1, 2, 3]
+
+
+def test_prefetch_propagates_errors():
+    def items() -> Iterator[int]:
+        yield 1
+        raise ValueError("broken input")
+
+    with pytest.raises(ValueError):
+        list(prefetch(items(), 1))
+
+    class BrokenWriter(DataWriter):
+        def write_chunks(
+            self, dfs: Iterable[pandas.DataFrame], file_path: Union[str, Path]
+        ) -> None:
+            raise ValueError("broken output")
+
+    dfs = (pandas.DataFrame({"a": [i]}) for i in range(100))
+    with pytest.raises(ValueError):
+        BackgroundDataWriter(BrokenWriter(), max_chunks=1).write_chunks(dfs, "x")
+
+
+def test_prefetch_closes_iterators_in_background_thread():
+    threads = []
+
+    def items() -> Iterator[int]:
+        try:
+            yield from range(100)
+        finally:
+            threads.append(threading.get_ident())
+
+    for item in prefetch(items(), 1):
+        if item == 3:
+            break
+    assert threads and threads[0] != threading.get_ident()
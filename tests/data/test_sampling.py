@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import numpy
+import pandas
+import pytest
+
+from pdpcli.data.data_readers import CsvDataReader, JsonLinesDataReader
+from pdpcli.data.sampling import (
+    SampledDataReader,
+    bernoulli_sample,
+    reservoir_sample,
+)
+from pdpcli.exceptions import ConfigurationError
+
+FIXTURE_DIR = Path("./tests/fixture/")
+
+
+def _chunks(df: pandas.DataFrame, chunksize: int):
+    return (df.iloc[i : i + chunksize] for i in range(0, len(df), chunksize))
+
+
+def test_reservoir_sample():
+    df = pandas.DataFrame({"a": numpy.arange(1000)})
+    output = reservoir_sample(_chunks(df, 37), 100, seed=1)
+
+    assert len(output) == 100
+    assert output["a"].is_unique
+    assert output["a"].is_monotonic_increasing
+    assert output.equals(reservoir_sample(_chunks(df, 37), 100, seed=1))
+    assert reservoir_sample(_chunks(df, 37), 2000).equals(df)
+
+
+def test_reservoir_sample_is_uniform():
+    df = pandas.DataFrame({"a": numpy.arange(20)})
+    counts = numpy.zeros(len(df))
+    for seed in range(500):
+        output = reservoir_sample(_chunks(df, 3), 5, seed=seed)
+        counts[output["a"].to_numpy()] += 1
+
+    assert numpy.allclose(counts / 500, 5 / 20, atol=0.08)
+
+
+def test_bernoulli_sample():
+    df = pandas.DataFrame({"a": numpy.arange(1000)})
+    output = bernoulli_sample(_chunks(df, 64), 0.2, seed=0)
+
+    assert 100 < len(output) < 300
+    assert output["a"].is_monotonic_increasing
+    assert output.equals(bernoulli_sample(_chunks(df, 64), 0.2, seed=0))
+
+
+def test_sampled_data_reader():
+    input_file = FIXTURE_DIR / "data" / "data.csv"
+    df = CsvDataReader().read(input_file)
+
+    reader = SampledDataReader(CsvDataReader(), rows=3, seed=0, chunksize=2)
+    output = reader.read(input_file)
+
+    assert list(output.columns) == list(df.columns)
+    assert len(output) == 3
+
+    reader = SampledDataReader(JsonLinesDataReader(), frac=1.0, chunksize=2)
+    output = reader.read(FIXTURE_DIR / "data" / "data.jsonl")
+    assert len(output) == len(df)
+
+
+def test_sampled_data_reader_with_invalid_options():
+    with pytest.raises(ConfigurationError):
+        SampledDataReader(CsvDataReader())
+    with pytest.raises(ConfigurationError):
+        SampledDataReader(CsvDataReader(), rows=10, frac=0.5)
+    with pytest.raises(ConfigurationError):
+        SampledDataReader(CsvDataReader(), frac=1.5)
@@ -0,0 +1,63 @@
+import pandas
+
+from pdpcli.data.data_readers import CsvDataReader
+from pdpcli.data.schema import DataSchema
+
+
+def _generate_dataframe():
+    df = pandas.DataFrame()
+    df["name"] = ["foo", "bar", "baz", "qux"]
+    df["sex"] = ["F", "M", "F", "F"]
+    df["date"] = ["2021-01-01", "2021-02-01", "2021-03-01", "2021-04-01"]
+    df["score"] = [1.0, 2.5, 3.0, 4.5]
+    return df
+
+
+def test_data_schema_from_dataframe():
+    schema = DataSchema.from_dataframe(_generate_dataframe(), infer_categories=True)
+
+    assert schema.categories == {"sex": ["F", "M"]}
+    assert schema.datetime_formats == {"date": "%Y-%m-%d"}
+    assert schema.get_read_dtypes() == {
+        "name": "object",
+        "sex": "category",
+        "score": "float64",
+    }
+
+
+def test_data_schema_validates_datetime_formats_of_whole_columns():
+    df = pandas.DataFrame({"date": ["2021-01-01"] * 3 + ["not a date"]})
+
+    assert DataSchema.from_dataframe(df, sample_size=3).datetime_formats == {}
+    assert DataSchema.from_dataframe(df.head(3), sample_size=3).datetime_formats == {
+        "date": "%Y-%m-%d"
+    }
+
+
+def test_csv_data_reader_with_schema(tmp_path):
+    df = _generate_dataframe()
+    schema = DataSchema.from_dataframe(df, infer_categories=True)
+    schema = DataSchema.from_dict(schema.to_dict())
+
+    input_file = tmp_path / "data.csv"
+    df.iloc[1:].to_csv(input_file, index=False)
+
+    reader = CsvDataReader()
+    assert reader.apply_schema(schema)
+    output = reader.read(input_file)
+
+    assert list(output["sex"].cat.categories) == ["F", "M"]
+    assert str(output["date"].dtype) == "datetime64[ns]"
+    assert str(output["score"].dtype) == "float64"
+
+
+def test_data_schema_find_sidecar(tmp_path):
+    pipeline_path = tmp_path / "pipeline.pkl"
+    assert DataSchema.find_sidecar(pipeline_path) is None
+
+    DataSchema.from_dataframe(_generate_dataframe()).save(
+        DataSchema.get_sidecar_path(pipeline_path)
+    )
+    sidecar_path = DataSchema.find_sidecar(pipeline_path)
+    assert sidecar_path is not None
+    assert DataSchema.load(sidecar_path).datetime_formats == {"date": "%Y-%m-%d"}
@@ -0,0 +1,56 @@
+import numpy
+import pandas
+import pdpipe
+import pytest
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from pdpcli.exceptions import ConfigurationError
+from pdpcli.stages import Pipeline
+from pdpcli.stages.incremental import fit_incremental
+from pdpcli.stages.sklearn_stages import SklearnPredictor, SklearnTransformer
+
+
+def _chunks(df: pandas.DataFrame, chunksize: int):
+    return lambda: (df.iloc[i : i + chunksize] for i in range(0, len(df), chunksize))
+
+
+def test_fit_incremental() -> None:
+    df = pandas.DataFrame(
+        data=numpy.random.normal(loc=3.0, size=(100, 3)),
+        columns=["a", "b", "x"],
+    )
+    df["c"] = ((df["a"] + df["b"]) > 6).map({True: "pos", False: "neg"})
+
+    pipeline = Pipeline(
+        stages={
+            "drop": pdpipe.ColDrop("x"),
+            "scale": SklearnTransformer(
+                transformer=StandardScaler(),
+                feature_columns=["a", "b"],
+                output_columns="s",
+            ),
+            "predict": SklearnPredictor(
+                estimator=SGDClassifier(random_state=0),
+                feature_columns=["s_0", "s_1"],
+                target_columns="c",
+                output_columns="d",
+            ),
+        }
+    )
+    fit_incremental(pipeline, _chunks(df, 16), epochs=2)
+
+    assert pipeline.is_fitted
+    scaler = pipeline._stages[1]._transformer
+    assert numpy.allclose(scaler.mean_, df[["a", "b"]].mean().to_numpy())
+    assert list(pipeline._stages[2]._estimator.classes_) == ["neg", "pos"]
+
+    output = pipeline.transform(df)
+    assert list(output.columns) == ["c", "s_0", "s_1", "d"]
+
+
+def test_fit_incremental_with_unsupported_stage() -> None:
+    df = pandas.DataFrame({"a": ["x", "y", "z"]})
+    pipeline = Pipeline(stages={"encode": pdpipe.OneHotEncode("a")})
+    with pytest.raises(ConfigurationError):
+        fit_incremental(pipeline, _chunks(df, 2))
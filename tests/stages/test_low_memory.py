@@ -0,0 +1,81 @@
+import threading
+
+import numpy
+import pandas
+import pdpipe
+from sklearn.preprocessing import StandardScaler
+
+from pdpcli import util
+from pdpcli.columns import ColumnNames
+from pdpcli.stages import Pipeline
+from pdpcli.stages.executor import PipelineExecutor
+from pdpcli.stages.low_memory import LowMemoryHook
+from pdpcli.stages.sklearn_stages import SklearnTransformer
+
+
+class RecordColumns(LowMemoryHook):
+    def __init__(self, *args, **kwargs) -> None:  # type: ignore
+        super().__init__(*args, **kwargs)
+        self.inputs = []
+
+    def apply(self, stage, df, fit, apply_stage):  # type: ignore
+        def record(df: pandas.DataFrame) -> pandas.DataFrame:
+            self.inputs.append(list(df.columns))
+            return apply_stage(df)
+
+        return super().apply(stage, df, fit, record)
+
+
+def build_pipeline() -> Pipeline:
+    return Pipeline(
+        stages={
+            "scale": SklearnTransformer(
+                StandardScaler(), ["a_scaled"], feature_columns=["a"]
+            ),
+            "drop": pdpipe.ColDrop(["b"], errors="ignore"),
+        }
+    )
+
+
+def test_low_memory_hook() -> None:
+    df = pandas.DataFrame(
+        data=numpy.random.normal(size=(16, 3)),
+        columns=["a", "b", "c"],
+    )
+    expected = build_pipeline().fit_transform(df)
+
+    hook = RecordColumns()
+    output = PipelineExecutor([hook]).fit_transform(build_pipeline(), df.copy())
+
+    assert output.equals(expected)
+    # "b" is dropped before the first stage since no stage requires it
+    assert hook.inputs == [["a", "c"], ["c", "a_scaled"]]
+    assert hook.input_size == df.memory_usage(deep=True).sum()
+    assert not util.copy_on_write_enabled()
+
+    # only columns required by the following stages are kept while fitting
+    hook = RecordColumns(output_columns=ColumnNames([]))
+    PipelineExecutor([hook]).fit_transform(build_pipeline(), df.copy())
+    assert hook.inputs == [["a"], []]
+
+
+def test_low_memory_hook_in_thread() -> None:
+    df = pandas.DataFrame(
+        data=numpy.random.normal(size=(16, 3)),
+        columns=["a", "b", "c"],
+    )
+    modes = []
+
+    class RecordMode(LowMemoryHook):
+        def apply(self, stage, df, fit, apply_stage):  # type: ignore
+            modes.append(util.copy_on_write_enabled())
+            return super().apply(stage, df, fit, apply_stage)
+
+    # the process-wide mode is not changed by worker threads
+    thread = threading.Thread(
+        target=PipelineExecutor([RecordMode()]).fit_transform,
+        args=(build_pipeline(), df),
+    )
+    thread.start()
+    thread.join()
+    assert modes == [False, False]
@@ -0,0 +1,54 @@
+import pdpipe
+from sklearn.preprocessing import StandardScaler
+
+from pdpcli.data.data_readers import CsvDataReader
+from pdpcli.stages.pipeline import Pipeline
+from pdpcli.stages.planner import push_down_columns, required_columns
+from pdpcli.stages.select_columns import RexColumns, SelectColumns
+from pdpcli.stages.sklearn_stages import SklearnTransformer
+
+
+def test_required_columns_with_select_columns() -> None:
+    pipeline = Pipeline(
+        stages={
+            "scale": SklearnTransformer(
+                transformer=StandardScaler(),
+                feature_columns=["a"],
+                output_columns="scaled",
+            ),
+            "select": SelectColumns(["b", "scaled"]),
+        }
+    )
+    column_filter = required_columns(pipeline)
+
+    assert column_filter is not None
+    assert [c for c in ["a", "b", "c"] if column_filter(c)] == ["a", "b"]
+
+
+def test_required_columns_with_rex_columns() -> None:
+    pipeline = Pipeline(
+        stages={
+            "drop": pdpipe.ColDrop("col_2", errors="ignore"),
+            "select": RexColumns(r"col_\d+"),
+        }
+    )
+    column_filter = required_columns(pipeline)
+
+    assert column_filter is not None
+    assert [c for c in ["col_1", "col_2", "xyz"] if column_filter(c)] == ["col_1"]
+
+
+def test_required_columns_without_projection() -> None:
+    pipeline = Pipeline(stages={"drop": pdpipe.ColDrop("name")})
+    assert required_columns(pipeline) is None
+
+
+def test_push_down_columns_to_csv_reader() -> None:
+    pipeline = Pipeline(stages={"select": SelectColumns(["name", "sex"])})
+    reader = CsvDataReader()
+    projection = push_down_columns(pipeline, reader)
+    df = reader.read("tests/fixture/data/data.csv")
+
+    assert projection is not None
+    assert list(df.columns) == ["name", "sex"]
+    assert projection.pruned == ["job", "content"]
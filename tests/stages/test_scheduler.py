@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+import pandas
+import pdpipe
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from pdpcli.stages import Pipeline
+from pdpcli.stages.scheduler import ColumnAccess, column_access, plan_levels, run_level
+from pdpcli.stages.select_columns import SelectColumns
+from pdpcli.stages.sklearn_stages import SklearnPredictor, SklearnTransformer
+
+
+def build_pipeline(parallel: bool) -> Pipeline:
+    return Pipeline(
+        stages={
+            "scale_a": SklearnTransformer(
+                StandardScaler(), ["a_scaled"], feature_columns=["a"]
+            ),
+            "scale_b": SklearnTransformer(
+                StandardScaler(), ["b_scaled"], feature_columns=["b"], drop=False
+            ),
+            "predict": SklearnPredictor(
+                LogisticRegression(),
+                feature_columns=["a_scaled", "b_scaled"],
+                target_columns="c",
+                output_columns="d",
+            ),
+        },
+        parallel=parallel,
+        n_jobs=2,
+    )
+
+
+def test_plan_levels() -> None:
+    pipeline = build_pipeline(parallel=True)
+    accesses = [column_access(stage) for stage in pipeline._stages]
+    assert plan_levels(accesses) == [[0, 1], [2]]
+
+    accesses.insert(1, column_access(SelectColumns(["a"])))
+    assert plan_levels(accesses) == [[0], [1], [2], [3]]
+
+
+def test_column_access_from_dict() -> None:
+    access = ColumnAccess.from_dict({"reads": "a", "writes": ["x"], "prefixed": True})
+    assert access.reads == ["a"]
+    assert access.may_write("x_1")
+    assert not access.may_write("a")
+
+
+def test_parallel_pipeline() -> None:
+    df = pandas.DataFrame(
+        data=numpy.random.normal(size=(64, 2)),
+        columns=["a", "b"],
+    )
+    df["c"] = ((df["a"] + df["b"]) > 0).apply(int)
+
+    expected = build_pipeline(parallel=False).apply(df)
+    pipeline = build_pipeline(parallel=True)
+
+    assert pipeline.apply(df).equals(expected)
+    assert pipeline.apply(df).equals(expected)
+
+
+def test_parallel_pipeline_keeps_column_order() -> None:
+    df = pandas.DataFrame({"x": [1, 2, 3]})
+
+    def build(parallel: bool) -> Pipeline:
+        return Pipeline(
+            stages={
+                "add_a": pdpipe.ColByFrameFunc("a", lambda df: df["x"] + 1),
+                "add_b": pdpipe.ColByFrameFunc("b", lambda df: df["a"] + 1),
+                "add_cc": pdpipe.ColByFrameFunc("cc", lambda df: df["x"] * 2),
+            },
+            parallel=parallel,
+            column_access={
+                "add_a": {"reads": ["x"], "writes": ["a"]},
+                "add_b": {"reads": ["a"], "writes": ["b"]},
+                "add_cc": {"reads": ["x"], "writes": ["cc"]},
+            },
+        )
+
+    pipeline = build(parallel=True)
+    accesses = pipeline._get_column_accesses()
+    assert plan_levels(accesses) == [[0, 2], [1]]
+
+    expected = build(parallel=False).apply(df)
+    output = pipeline.apply(df)
+    assert list(output.columns) == list(expected.columns) == ["x", "a", "b", "cc"]
+    assert output.equals(expected)
+
+
+def test_run_level_gives_stages_their_own_data_frames() -> None:
+    df = pandas.DataFrame({"x": [1.0, 2.0], "y": [3.0, 4.0]})
+    inputs = []
+
+    def apply_stage(stage: pdpipe.PdPipelineStage, df: pandas.DataFrame):  # type: ignore
+        inputs.append(df)
+        return stage.apply(df)
+
+    stages = [
+        pdpipe.ColByFrameFunc("a", lambda df: df["x"] + 1),
+        pdpipe.ColByFrameFunc("b", lambda df: df["y"] + 1),
+    ]
+    accesses = [
+        ColumnAccess(reads=["x"], writes=["a"]),
+        ColumnAccess(reads=["y"], writes=["b"]),
+    ]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        output = run_level(stages, accesses, df, apply_stage, executor)
+
+    assert list(output.columns) == ["x", "y", "a", "b"]
+    assert len({id(input_df) for input_df in inputs + [df]}) == 3
+    # inputs are shallow copies
+    assert all(
+        numpy.shares_memory(input_df["x"].to_numpy(), df["x"].to_numpy())
+        for input_df in inputs
+    )
@@ -1,3 +1,5 @@
+import pickle
+
 import pandas
 
 from pdpcli.stages.select_columns import RexColumns, SelectColumns
@@ -25,3 +27,17 @@ def test_rex_columns() -> None:
     output = stage.apply(df)
 
     assert sorted(output.columns) == ["col_1", "col_2"]
+
+
+def test_rex_columns_reuses_resolved_columns() -> None:
+    df = pandas.DataFrame({"col_1": [1], "col_2": [2], "xyz": [3]})
+
+    stage = RexColumns(r"col_\d+")
+    stage.apply(df)
+    stage._columns = []
+    output = stage.apply(df)
+
+    assert list(output.columns) == ["col_1", "col_2"]
+
+    restored = pickle.loads(pickle.dumps(stage))
+    assert list(restored.apply(df).columns) == []
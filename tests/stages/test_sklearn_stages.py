@@ -1,9 +1,13 @@
+import pickle
+
 import numpy
 import pandas
+from scipy import sparse
 from sklearn.decomposition import PCA
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 
+from pdpcli.matrix import MatrixDtype
 from pdpcli.stages.sklearn_stages import SklearnPredictor, SklearnTransformer
 
 
@@ -84,3 +88,126 @@ def test_sklearn_transformer_without_feature_columns() -> None:
         "pca_6",
         "pca_7",
     ]
+
+
+def test_sklearn_transformer_does_not_copy_input_columns() -> None:
+    df = pandas.DataFrame(data=numpy.random.normal(size=(64, 2)), columns=["a", "b"])
+    df["id"] = numpy.arange(64)
+
+    stage = SklearnTransformer(
+        transformer=PCA(n_components=2),
+        output_columns="pca",
+        feature_columns=["a", "b"],
+        drop=False,
+    )
+    output = stage.apply(df)
+
+    assert list(output.columns) == ["a", "b", "id", "pca_0", "pca_1"]
+    assert numpy.shares_memory(output["id"].to_numpy(), df["id"].to_numpy())
+    assert numpy.shares_memory(output["a"].to_numpy(), df["a"].to_numpy())
+
+
+def test_sklearn_stages_with_matrix_output_format() -> None:
+    df = pandas.DataFrame()
+    df["text"] = ["a first sentence", "a second sentence", "third", "fourth"]
+    df["label"] = [0, 1, 0, 1]
+
+    transformer = SklearnTransformer(
+        transformer=TfidfVectorizer(),
+        feature_columns="text",
+        output_columns="tfidf",
+        output_format="matrix",
+    )
+    predictor = SklearnPredictor(
+        estimator=LogisticRegression(),
+        feature_columns="tfidf",
+        target_columns="label",
+        output_columns="prediction",
+    )
+    output = predictor.apply(transformer.apply(df))
+
+    assert list(output.columns) == ["label", "tfidf", "prediction"]
+    assert isinstance(output["tfidf"].dtype, MatrixDtype)
+    assert sparse.issparse(output["tfidf"].array.matrix)
+    assert output["tfidf"].array.matrix.shape == (4, 5)
+
+    chunks = pandas.concat([transformer.apply(df[:2]), transformer.apply(df[2:])])
+    assert chunks["tfidf"].array.matrix.shape == (4, 5)
+
+
+def test_sklearn_predictor_with_batches() -> None:
+    df = pandas.DataFrame(
+        data=numpy.random.normal(size=(100, 2)),
+        columns=["a", "b"],
+    )
+    df["c"] = ((df["a"] + df["b"]) > 0).apply(int)
+
+    stage = SklearnPredictor(
+        estimator=LogisticRegression(),
+        feature_columns=["a", "b"],
+        target_columns="c",
+        output_columns="proba",
+        prediction_method="predict_proba",
+        batch_size=30,
+        n_jobs=2,
+    )
+    output = stage.apply(df)
+
+    expected = stage._estimator.predict_proba(df[["a", "b"]])
+    assert list(output.columns) == ["a", "b", "c", "proba_0", "proba_1"]
+    assert numpy.allclose(output[["proba_0", "proba_1"]].values, expected)
+
+
+def test_sklearn_predictor_reuses_worker_processes() -> None:
+    df = pandas.DataFrame(
+        data=numpy.random.normal(size=(100, 2)),
+        columns=["a", "b"],
+    )
+    df["c"] = ((df["a"] + df["b"]) > 0).apply(int)
+
+    stage = SklearnPredictor(
+        estimator=LogisticRegression(),
+        feature_columns=["a", "b"],
+        target_columns="c",
+        output_columns="prediction",
+        batch_size=30,
+        n_jobs=2,
+        backend="process",
+    )
+    output = stage.apply(df)
+    process_pool = stage._process_pool
+    assert process_pool is not None
+
+    assert stage.transform(df).equals(output)
+    assert stage._process_pool is process_pool
+
+    # copies start their own workers
+    copied_stage = pickle.loads(pickle.dumps(stage))
+    assert copied_stage._process_pool is None
+    assert copied_stage.transform(df).equals(output)
+
+    # workers with the old estimator are not used after fitting again
+    stage.fit_transform(df)
+    assert stage._process_pool is not process_pool
+    stage._shutdown_process_pool()
+    copied_stage._shutdown_process_pool()
+
+
+def test_sklearn_predictor_fixes_feature_columns_at_fit() -> None:
+    df = pandas.DataFrame(
+        data=numpy.random.normal(size=(64, 3)),
+        columns=["a", "b", "x"],
+    )
+    df["c"] = ((df["a"] + df["b"]) > 0).apply(int)
+
+    stage = SklearnPredictor(
+        estimator=LogisticRegression(),
+        target_columns="c",
+        output_columns="d",
+    )
+    stage.apply(df)
+    assert stage._fitted_feature_columns == ["a", "b", "x"]
+
+    reordered = df[["c", "x", "b", "a"]]
+    expected = stage._estimator.predict(df[["a", "b", "x"]])
+    assert (stage.apply(reordered)["d"].values == expected).all()
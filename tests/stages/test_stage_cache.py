@@ -0,0 +1,72 @@
+import tempfile
+from pathlib import Path
+
+import numpy
+import pandas
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from pdpcli.cache import Cache, compute_key
+from pdpcli.stages import Pipeline
+from pdpcli.stages.executor import PipelineExecutor
+from pdpcli.stages.sklearn_stages import SklearnPredictor, SklearnTransformer
+from pdpcli.stages.stage_cache import StageCache
+
+
+def build_pipeline(C: float) -> Pipeline:
+    return Pipeline(
+        stages={
+            "scale": SklearnTransformer(
+                StandardScaler(), ["a_scaled", "b_scaled"], feature_columns=["a", "b"]
+            ),
+            "predict": SklearnPredictor(
+                LogisticRegression(C=C),
+                feature_columns=["a_scaled", "b_scaled"],
+                target_columns="c",
+                output_columns="d",
+            ),
+        }
+    )
+
+
+def test_stage_cache() -> None:
+    df = pandas.DataFrame(
+        data=numpy.random.normal(size=(64, 2)),
+        columns=["a", "b"],
+    )
+    df["c"] = ((df["a"] + df["b"]) > 0).apply(int)
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        stage_cache = StageCache(Cache(Path(tempdir) / "stages"))
+        executor = PipelineExecutor([stage_cache])
+
+        expected = build_pipeline(C=1.0).fit_transform(df)
+        assert executor.fit_transform(build_pipeline(C=1.0), df).equals(expected)
+        assert (len(stage_cache.hits), len(stage_cache.misses)) == (0, 2)
+        # outputs are stored as columns apart from pickled stages
+        for key in stage_cache.misses:
+            assert stage_cache._cache.get_path(key).suffix == Cache.FRAME_SUFFIX
+
+        pipeline = build_pipeline(C=1.0)
+        assert executor.fit_transform(pipeline, df).equals(expected)
+        assert (len(stage_cache.hits), len(stage_cache.misses)) == (2, 0)
+
+        # fitted states are restored from the cache
+        assert pipeline.is_fitted
+        assert pipeline.apply(df).equals(expected)
+
+        # only stages after the edited stage are recomputed
+        executor.fit_transform(build_pipeline(C=0.1), df)
+        assert (len(stage_cache.hits), len(stage_cache.misses)) == (1, 1)
+
+        # stages are fitted again if their states are evicted
+        stage_cache._cache.remove(compute_key(stage_cache.misses[-1], "stage"))
+        executor.fit_transform(build_pipeline(C=0.1), df)
+        assert (len(stage_cache.hits), len(stage_cache.misses)) == (1, 1)
+
+        executor.apply(pipeline, df)
+        assert (len(stage_cache.hits), len(stage_cache.misses)) == (0, 2)
+        executor.apply(pipeline, df.iloc[:32])
+        assert (len(stage_cache.hits), len(stage_cache.misses)) == (0, 2)
+        assert executor.apply(pipeline, df).equals(expected)
+        assert (len(stage_cache.hits), len(stage_cache.misses)) == (2, 0)
@@ -0,0 +1,25 @@
+import tempfile
+from pathlib import Path
+
+import numpy
+import pandas
+from sklearn.decomposition import PCA
+
+from pdpcli import artifact
+from pdpcli.stages.sklearn_stages import SklearnTransformer
+
+
+def test_save_and_load_pipeline():
+    df = pandas.DataFrame(data=numpy.random.normal(size=(256, 128)))
+    stage = SklearnTransformer(transformer=PCA(n_components=64), output_columns="pca")
+    expected = stage.apply(df)
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        file_path = Path(tempdir) / "pipeline.pdp"
+        artifact.save_pipeline(stage, file_path, threshold=1024)
+        loaded = artifact.load_pipeline(file_path)
+
+        components = loaded._transformer.components_
+        assert not components.flags.owndata
+        assert components.flags.writeable
+        assert numpy.allclose(loaded.apply(df).values, expected.values)
@@ -0,0 +1,81 @@
+import json
+import tempfile
+from pathlib import Path
+
+from pdpcli.benchmark import (
+    BenchmarkResult,
+    compare_results,
+    generate_dataframe,
+    run_benchmark,
+)
+from pdpcli.commands import create_parser
+from pdpcli.commands.bench import BenchCommand  # noqa: F401
+
+
+def _result(rows_per_sec: float, peak_rss: int) -> BenchmarkResult:
+    return BenchmarkResult(
+        name="sklearn",
+        rows=100,
+        columns=4,
+        format=".csv",
+        fit_time=0.1,
+        wall_time=100 / rows_per_sec,
+        rows_per_sec=rows_per_sec,
+        peak_rss=peak_rss,
+        memory_delta=0,
+        stages={},
+    )
+
+
+def test_generate_dataframe():
+    df = generate_dataframe(
+        10, numeric_columns=2, categorical_columns=1, text_columns=1
+    )
+    assert list(df.columns) == ["num_0", "num_1", "cat_0", "text_0", "target"]
+    assert len(df) == 10
+    assert set(df["target"]) <= {0, 1}
+    assert df.equals(
+        generate_dataframe(10, numeric_columns=2, categorical_columns=1, text_columns=1)
+    )
+
+
+def test_run_benchmark():
+    result = run_benchmark("benchmarks/sklearn.yml", 100, repeat=1, isolated=False)
+    assert result.name == "sklearn"
+    assert result.rows == 100
+    assert result.rows_per_sec > 0
+    assert set(result.stages) == {"read", "select", "scale", "predict", "write"}
+
+
+def test_compare_results():
+    baseline = [_result(1000.0, 1000)]
+    assert compare_results([_result(950.0, 1050)], baseline, 0.1) == []
+    assert len(compare_results([_result(800.0, 1050)], baseline, 0.1)) == 1
+    assert len(compare_results([_result(800.0, 2000)], baseline, 0.1)) == 2
+
+
+def test_bench_command():
+    with tempfile.TemporaryDirectory() as tempdir:
+        output_file = Path(tempdir) / "results.json"
+
+        parser = create_parser()
+        args = parser.parse_args(
+            [
+                "bench",
+                "benchmarks/sklearn.yml",
+                "--rows",
+                "100",
+                "--repeat",
+                "1",
+                "--in-process",
+                "--output-file",
+                str(output_file),
+            ]
+        )
+        args.func(args)
+
+        with open(output_file) as fp:
+            report = json.load(fp)
+        assert "environment" in report
+        results = [BenchmarkResult.from_dict(r) for r in report["results"]]
+        assert [(r.name, r.rows) for r in results] == [("sklearn", 100)]
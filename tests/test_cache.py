@@ -0,0 +1,64 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pandas
+
+from pdpcli.cache import Cache, compute_key
+
+
+def test_cache_save_and_load():
+    with tempfile.TemporaryDirectory() as tempdir:
+        cache = Cache(Path(tempdir) / "test")
+        key = compute_key("foo", {"bar": 1})
+
+        assert cache.load(key) is None
+
+        cache.save(key, {"value": 123})
+        assert cache.contains(key)
+        assert cache.load(key) == {"value": 123}
+        assert [entry.key for entry in cache.entries()] == [key]
+
+        cache.clear()
+        assert cache.entries() == []
+
+
+def test_cache_stores_data_frames_as_feather_files():
+    with tempfile.TemporaryDirectory() as tempdir:
+        cache = Cache(Path(tempdir) / "test")
+        df = pandas.DataFrame(
+            {"a": [1, 2], "b": ["x", None], "c": pandas.Categorical(["p", "q"])},
+            index=[3, 5],
+        )
+        cache.save("frame", df)
+        assert cache.get_path("frame").suffix == Cache.FRAME_SUFFIX
+        assert cache.load("frame").equals(df)
+
+        # arrow would convert lists to arrays, so they are pickled
+        df = pandas.DataFrame({"a": [[1], [2, 3]]})
+        cache.save("frame", df)
+        assert cache.get_path("frame").suffix == Cache.SUFFIX
+        assert cache.load("frame").equals(df)
+        assert [entry.key for entry in cache.entries()] == ["frame"]
+
+        cache.remove("frame")
+        assert not cache.contains("frame")
+
+
+def test_cache_evicts_least_recently_used_entries():
+    with tempfile.TemporaryDirectory() as tempdir:
+        cache = Cache(Path(tempdir) / "test")
+        cache.save("a", b"x" * 1000)
+        cache.save("b", b"x" * 1000)
+        os.utime(cache.get_path("a"), (0, 0))
+        os.utime(cache.get_path("b"), (1, 1))
+
+        # access to "a" makes "b" the least recently used entry
+        cache.load("a")
+
+        cache.max_size = 2500
+        cache.save("c", b"x" * 1000)
+
+        assert cache.contains("a")
+        assert not cache.contains("b")
+        assert cache.contains("c")
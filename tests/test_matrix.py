@@ -0,0 +1,48 @@
+import numpy
+import pandas
+from scipy import sparse
+
+from pdpcli.matrix import MatrixArray
+
+
+def test_matrix_array_with_sparse_matrix():
+    matrix = sparse.random(5, 100, density=0.1, format="csr")
+    series = pandas.Series(MatrixArray(matrix))
+
+    assert len(series) == 5
+    assert series.iloc[1].shape == (1, 100)
+    assert series.iloc[[3, 1]].array.matrix.shape == (2, 100)
+
+    concatenated = pandas.concat([series, series], ignore_index=True)
+    assert sparse.issparse(concatenated.array.matrix)
+    assert concatenated.array.matrix.shape == (10, 100)
+
+    reindexed = series.reindex([0, 10])
+    assert reindexed.array.matrix[1].nnz == 0
+
+
+def test_matrix_array_with_dense_matrix():
+    matrix = numpy.arange(12).reshape(4, 3)
+    df = pandas.DataFrame({"a": range(4)})
+    df["m"] = MatrixArray(matrix)
+
+    selected = df[df["a"] % 2 == 0]
+    assert numpy.array_equal(selected["m"].array.matrix, matrix[[0, 2]])
+
+
+def test_matrix_array_factorize():
+    dense = numpy.array([[1, 2], [3, 4], [1, 2]])
+    for matrix in (dense, sparse.csr_matrix(dense)):
+        df = pandas.DataFrame({"a": [1, 2, 3], "b": [0, 0, 0]})
+        df["m"] = MatrixArray(matrix)
+
+        codes, uniques = df["m"].array.factorize()
+        assert codes.tolist() == [0, 1, 0]
+        assert isinstance(uniques, MatrixArray)
+        assert uniques.matrix.shape == (2, 2)
+        assert sparse.issparse(uniques.matrix) == sparse.issparse(matrix)
+
+        assert len(df["m"].unique()) == 2
+        assert df.groupby("m")["a"].sum().tolist() == [4, 2]
+        assert df.drop_duplicates(subset=["b", "m"])["a"].tolist() == [1, 2]
+        assert df["m"].array.duplicated().tolist() == [False, False, True]
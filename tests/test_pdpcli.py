@@ -1,5 +1,79 @@
+import subprocess
+import sys
+
 from pdpcli import __version__
 
+# modules which must not be imported to parse command line arguments
+HEAVY_MODULES = ["pandas", "pdpipe", "sklearn", "scipy", "nltk", "minato", "sqlalchemy"]
+
+# modules which must not be imported until data of their formats are used
+FORMAT_MODULES = ["pyarrow.parquet", "pyarrow.dataset", "sqlalchemy"]
+
+# budget of cumulative import time of the CLI in microseconds
+IMPORT_TIME_BUDGET = 1_000_000
+
 
 def test_version():
     assert __version__ == "0.4.1"
+
+
+def test_cli_does_not_import_heavy_modules():
+    code = "\n".join(
+        [
+            "import sys",
+            "from pdpcli.commands import create_parser",
+            "create_parser().parse_args(['apply', 'pipeline.pkl', 'input.csv'])",
+            f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])",
+        ]
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == "[]"
+
+
+def test_packages_do_not_import_heavy_modules():
+    code = "\n".join(
+        [
+            "import sys",
+            "import pdpcli.configs",
+            "import pdpcli.data",
+            f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])",
+        ]
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == "[]"
+
+
+def test_data_readers_do_not_import_modules_of_unused_formats():
+    code = "\n".join(
+        [
+            "import sys",
+            "from pdpcli.data import DataReader, DataWriter",
+            "DataReader.from_path('input.csv').read('tests/fixture/data/data.csv')",
+            "DataWriter.from_path('output.csv')",
+            f"print([m for m in {FORMAT_MODULES!r} if m in sys.modules])",
+        ]
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == "[]"
+
+
+def test_cli_import_time():
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import pdpcli.commands"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # lines are formatted as "import time: self | cumulative | module"
+    cumulative_times = {
+        fields[2].strip(): int(fields[1])
+        for fields in (line.split("|") for line in output.stderr.splitlines())
+        if len(fields) == 3 and fields[1].strip().isdigit()
+    }
+    assert cumulative_times["pdpcli.commands"] < IMPORT_TIME_BUDGET
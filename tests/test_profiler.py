@@ -0,0 +1,63 @@
+import json
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import pandas
+import pdpipe
+
+from pdpcli.data import CsvDataReader, CsvDataWriter
+from pdpcli.profiler import Profiler
+from pdpcli.stages import Pipeline
+from pdpcli.stages.executor import PipelineExecutor
+
+
+def test_profiler():
+    pipeline = Pipeline(
+        stages={
+            "drop": pdpipe.ColDrop("b"),
+            "encode": pdpipe.OneHotEncode("c"),
+        }
+    )
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        input_file = tempdir / "input.csv"
+        output_file = tempdir / "output.csv"
+        pandas.DataFrame(
+            {"a": [1, 2, 3, 4], "b": [5, 6, 7, 8], "c": ["x", "y", "x", "y"]}
+        ).to_csv(input_file, index=False)
+
+        with Profiler() as profiler:
+            reader = profiler.wrap_reader(CsvDataReader())
+            writer = profiler.wrap_writer(CsvDataWriter())
+            df = PipelineExecutor([profiler]).apply(pipeline, reader.read(input_file))
+            writer.write_chunks([df.iloc[:2], df.iloc[2:]], output_file)
+
+        assert len(pandas.read_csv(output_file)) == 4
+
+        summary = {item["name"]: item for item in profiler.summarize()}
+        assert list(summary) == ["read", "drop", "encode", "write"]
+        assert summary["read"]["output_rows"] == 4
+        assert summary["drop"]["category"] == "fit"
+        assert (
+            summary["drop"]["input_columns"],
+            summary["drop"]["output_columns"],
+        ) == (
+            3,
+            2,
+        )
+        # peaks of stages are measured with tracemalloc.reset_peak of Python 3.9+
+        assert (summary["encode"]["memory_peak"] is not None) == hasattr(
+            tracemalloc, "reset_peak"
+        )
+        assert summary["write"]["input_rows"] == 4
+        assert "encode" in profiler.format_table()
+
+        profiler.save(tempdir / "profile.json")
+        profiler.save_trace(tempdir / "trace.json")
+        with open(tempdir / "profile.json") as fp:
+            assert len(json.load(fp)["events"]) == len(profiler.events)
+        with open(tempdir / "trace.json") as fp:
+            trace_events = json.load(fp)["traceEvents"]
+        assert {event["ph"] for event in trace_events} == {"X"}
+        assert trace_events[0]["name"] == "read"
@@ -0,0 +1,44 @@
+import sys
+
+import colt
+import pdpipe
+
+from pdpcli.registrable import LazyRegistrable
+from pdpcli.stages import Stage
+
+
+class Animal(LazyRegistrable):
+    pass
+
+
+def test_lazy_registrable(tmp_path, monkeypatch):
+    (tmp_path / "lazy_animals.py").write_text(
+        "from tests.test_registrable import Animal\n"
+        "@Animal.register('dog')\n"
+        "class Dog(Animal):\n"
+        "    pass\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    Animal.register_lazy("dog", "lazy_animals")
+
+    assert "lazy_animals" not in sys.modules
+    assert Animal.by_name("dog").__name__ == "Dog"
+    assert "lazy_animals" in sys.modules
+    monkeypatch.delitem(sys.modules, "lazy_animals")
+
+
+def test_lazy_stages_are_registered_by_their_modules():
+    colt.import_modules(["pdpcli.stages"])
+    lazy_modules = LazyRegistrable.lazy_modules[Stage]
+    for name, (subclass, _) in Stage._registry[Stage].items():
+        if subclass.__module__.startswith("pdpipe"):
+            continue
+        if name in lazy_modules:
+            assert subclass.__module__ == lazy_modules[name]
+        else:
+            # stages imported by pdpcli.stages are registered eagerly
+            assert subclass.__module__ in sys.modules
+
+
+def test_pdpipe_stages_are_registered_as_fallback():
+    assert Stage.by_name("col_drop") is pdpipe.ColDrop
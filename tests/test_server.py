@@ -0,0 +1,185 @@
+import http.client
+import json
+import os
+import pickle
+import tempfile
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pandas
+import pdpipe
+import pytest
+
+from pdpcli.exceptions import ConfigurationError
+from pdpcli.server import MicroBatcher, PipelineServer, ServedPipeline
+
+
+def _pipeline() -> pdpipe.PdPipeline:
+    return pdpipe.PdPipeline([pdpipe.ColDrop("b"), pdpipe.ColRename({"a": "x"})])
+
+
+def test_micro_batcher():
+    served = ServedPipeline("test", _pipeline)
+    batcher = MicroBatcher(served, workers=2, max_delay=0.05)
+
+    dfs = [pandas.DataFrame({"a": [i, i + 1], "b": ["p", "q"]}) for i in range(8)]
+    dfs.append(pandas.DataFrame({"a": [1.5], "b": ["r"]}))
+    batcher._executor = Mock(wraps=batcher._executor)
+    with ThreadPoolExecutor(max_workers=len(dfs)) as executor:
+        results = list(executor.map(batcher.apply, dfs))
+    batcher.close()
+
+    for df, result in zip(dfs, results):
+        assert result.equals(df[["a"]].rename(columns={"a": "x"}))
+    # concurrent requests are applied together
+    assert 0 < batcher._executor.transform.call_count < len(dfs)
+
+
+def test_micro_batcher_isolates_failed_requests():
+    pipeline = pdpipe.PdPipeline([pdpipe.ColDrop("b")])
+    batcher = MicroBatcher(ServedPipeline("test", lambda: pipeline), max_delay=0.05)
+
+    dfs = [pandas.DataFrame({"a": [1], "b": [2]}), pandas.DataFrame({"a": [3]})]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(batcher.apply, df) for df in dfs]
+    batcher.close()
+
+    assert futures[0].result().equals(pandas.DataFrame({"a": [1]}))
+    assert futures[1].exception() is not None
+
+
+def test_micro_batcher_maps_rows_by_positions():
+    # rows are dropped and the index is reset, so output indices do not
+    # correspond to positions in concatenated inputs
+    pipeline = pdpipe.PdPipeline(
+        [
+            pdpipe.RowDrop({"a": lambda x: x < 0}),
+            pdpipe.AdHocStage(transform=lambda df: df.reset_index(drop=True)),
+        ]
+    )
+    pipeline.fit(pandas.DataFrame({"a": [1]}))
+    batcher = MicroBatcher(ServedPipeline("test", lambda: pipeline), max_delay=0.05)
+
+    dfs = [pandas.DataFrame({"a": [-1, 1]}), pandas.DataFrame({"a": [2, 3]})]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(batcher.apply, dfs))
+    batcher.close()
+
+    assert results[0]["a"].tolist() == [1]
+    assert results[1]["a"].tolist() == [2, 3]
+    assert all(list(result.columns) == ["a"] for result in results)
+
+
+def test_micro_batcher_applies_copies_of_pipelines():
+    served = ServedPipeline("test", _pipeline)
+    batcher = MicroBatcher(served, workers=2, max_delay=0.05)
+    batcher._executor = Mock(wraps=batcher._executor)
+
+    dfs = [pandas.DataFrame({"a": [i], "b": ["p"]}) for i in range(4)]
+    with ThreadPoolExecutor(max_workers=len(dfs)) as executor:
+        list(executor.map(batcher.apply, dfs))
+    batcher.close()
+
+    pipelines = [args[0] for args, _ in batcher._executor.transform.call_args_list]
+    assert pipelines
+    assert all(pipeline is not served.pipeline for pipeline in pipelines)
+    assert not batcher._executor.apply.called
+
+
+def test_served_pipeline_refuses_unfitted_pipelines():
+    pipeline = pdpipe.PdPipeline([pdpipe.OneHotEncode("a")])
+    with pytest.raises(ConfigurationError):
+        ServedPipeline("test", lambda: pipeline)
+
+    pipeline.fit(pandas.DataFrame({"a": ["p", "q"]}))
+    served = ServedPipeline("test", lambda: pipeline)
+    batcher = MicroBatcher(served)
+    result = batcher.apply(pandas.DataFrame({"a": ["q", "r"]}))
+    batcher.close()
+    # categories are not learned from requests
+    assert list(result.columns) == ["a_q"]
+
+
+def test_micro_batcher_survives_unexpected_errors():
+    batcher = MicroBatcher(ServedPipeline("test", _pipeline))
+    with patch.object(MicroBatcher, "_group_requests", side_effect=RuntimeError):
+        with pytest.raises(RuntimeError):
+            batcher.apply(pandas.DataFrame({"a": [1], "b": ["p"]}))
+
+    result = batcher.apply(pandas.DataFrame({"a": [1], "b": ["p"]}))
+    batcher.close()
+    assert result.equals(pandas.DataFrame({"x": [1]}))
+
+
+def test_served_pipeline_reload():
+    with tempfile.TemporaryDirectory() as tempdir:
+        file_path = Path(tempdir) / "pipeline.pkl"
+        with file_path.open("wb") as fp:
+            pickle.dump(pdpipe.PdPipeline([pdpipe.ColDrop("b")]), fp)
+
+        def load() -> pdpipe.PdPipeline:
+            with file_path.open("rb") as fp:
+                return pickle.load(fp)
+
+        served = ServedPipeline("test", load, str(file_path))
+        assert not served.reload_if_modified()
+
+        with file_path.open("wb") as fp:
+            pickle.dump(pdpipe.PdPipeline([pdpipe.ColDrop("a")]), fp)
+        os.utime(file_path, (0, served._mtime + 1))
+        assert served.reload_if_modified()
+        assert served.version == 1
+        assert list(served.pipeline.apply(pandas.DataFrame({"a": [1], "b": [2]}))) == [
+            "b"
+        ]
+
+        # unfitted pipelines are not reloaded
+        with file_path.open("wb") as fp:
+            pickle.dump(pdpipe.PdPipeline([pdpipe.OneHotEncode("a")]), fp)
+        os.utime(file_path, (0, served._mtime + 1))
+        assert not served.reload_if_modified()
+        assert served.version == 1
+
+
+def test_pipeline_server():
+    server = PipelineServer([ServedPipeline("test", _pipeline)])
+    http_server = server.make_server(port=0)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    url = "http://127.0.0.1:{}".format(http_server.server_address[1])
+    try:
+        records = [{"a": 1, "b": "p"}, {"a": 2, "b": "q"}]
+        request = urllib.request.Request(
+            url + "/apply/test",
+            data=json.dumps(records).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request) as response:
+            assert json.loads(response.read()) == [{"x": 1}, {"x": 2}]
+
+        request = urllib.request.Request(
+            url + "/apply",
+            data=b"a,b\n1,p\n",
+            headers={"Content-Type": "text/csv"},
+        )
+        with urllib.request.urlopen(request) as response:
+            assert response.read() == b"x\n1\n"
+
+        with urllib.request.urlopen(url + "/health") as response:
+            assert "test" in json.loads(response.read())["pipelines"]
+
+        connection = http.client.HTTPConnection(
+            "127.0.0.1", http_server.server_address[1]
+        )
+        connection.putrequest("POST", "/apply/test")
+        connection.putheader("Content-Length", "abc")
+        connection.endheaders()
+        assert connection.getresponse().status == 400
+        connection.close()
+    finally:
+        http_server.shutdown()
+        http_server.server_close()
+        server.close()
@@ -1,5 +1,8 @@
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
+
+from pandas._config.config import OptionError
 
 from pdpcli import util
 
@@ -16,3 +19,17 @@ def test_get_args_list():
 
     args = util.get_args_list(func)
     assert args == ["a", "b"]
+
+
+def test_get_file_ext():
+    assert util.get_file_ext("data.csv.gz") == ".gz"
+    assert util.get_file_ext("data.csv.gz", compound=True) == ".csv.gz"
+
+
+def test_copy_on_write_without_option():
+    # pandas before 1.5 has no copy-on-write mode
+    with patch("pandas.get_option", side_effect=OptionError), patch(
+        "pandas.set_option", side_effect=OptionError
+    ):
+        assert not util.copy_on_write_enabled()
+        assert not util.set_copy_on_write(True)